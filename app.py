@@ -3,12 +3,306 @@
 
 このアプリケーションは、2つのExcelファイルを比較・加工し、
 3シートを含む1つのExcelファイルを出力します。
+照合（比較データの計算）と出力（Excel生成）は別々に実行でき、
+照合後は異常値の基準を変えたときの件数をすぐに確認できます。
 """
 
+import time
 import streamlit as st
 from datetime import datetime
-from modules.data_processor import process_excel_files
+from functools import partial
+from modules.data_processor import (
+    prepare_comparison, build_output, select_abnormal, process_excel_files, PREPARE_WEIGHT
+)
+from modules.preview import get_page, DEFAULT_PAGE_SIZE
+from modules.anomaly_detector import DETECTION_METHODS, normalize_band_edges, band_labels
+from modules.rate_index import preview_abnormal, count_abnormal
+from modules.data_quality import describe_quality
 from utils.file_validator import validate_file
+from utils.excel_handler import read_threshold_table
+from utils.result_cache import make_cache_key, get_cached_result, store_result, HANDLE_ENTRY_BYTES
+from utils.bundle_writer import (
+    OUTPUT_FORMATS, DEFAULT_COMPRESSION_LEVEL, MIN_COMPRESSION_LEVEL, MAX_COMPRESSION_LEVEL
+)
+from utils.result_store import put_result, has_result, open_result
+from utils.metrics import build_run_record, record_run
+from utils.profiling import run_profiled, PROFILE_ENABLED, PROFILE_EXTENSION
+from utils.upload_buffer import open_upload, track_peak_memory, describe_peak_memory
+from utils.job_queue import submit_job, wait_for_job, discard_job, report_progress
+from utils.worker_pool import start_background_warm_up, start_process_pool
+from modules.sharding import DEFAULT_WORKERS
+
+
+def parse_band_input(text):
+    """
+    段階別の基準の入力（例: "10, 20, 50"）を基準値のリストに変換
+
+    Args:
+        text: カンマ区切りの基準値
+
+    Returns:
+        list: 昇順の基準値（未入力の場合はNone）
+
+    Raises:
+        ValueError: 数値として読めない値が含まれる場合
+    """
+    values = [value.strip() for value in text.replace('、', ',').split(',') if value.strip()]
+    if not values:
+        return None
+    try:
+        return normalize_band_edges(float(value) for value in values)
+    except ValueError:
+        raise ValueError("段階別の基準は「10, 20, 50」のように正の数値をカンマ区切りで入力してください")
+
+
+def read_stored_result(handle):
+    """
+    結果ストアから出力ファイルを読み出す（ダウンロードボタンのクリック時に呼び出される）
+
+    Args:
+        handle: 結果ストアのハンドル
+
+    Returns:
+        bytes: 出力ファイルの内容
+    """
+    with open_result(handle) as stored_file:
+        return stored_file.read()
+
+
+def get_upload_buffer(slot, uploaded_file):
+    """
+    アップロードファイルを一時ファイルに1回だけ書き出し、メモリマップしたバッファを取得
+
+    同じファイルのままの再描画ではバッファを再利用します。以降のバリデーション・読み込み・
+    キャッシュキーの計算はこのバッファを参照し、アップロードファイルの中身をコピーしません。
+
+    Args:
+        slot: アップロード欄のキー（'previous' or 'current'）
+        uploaded_file: Streamlitのアップロードファイル
+
+    Returns:
+        UploadBuffer: メモリマップしたバッファ（utils.upload_buffer）
+    """
+    buffers = st.session_state.setdefault('upload_buffers', {})
+    file_id, buffer = buffers.get(slot, (None, None))
+    if file_id != uploaded_file.file_id:
+        # 差し替えられた前のバッファは処理中のジョブが参照しなくなった時点で解放される
+        buffer = open_upload(uploaded_file)
+        buffers[slot] = (uploaded_file.file_id, buffer)
+    return buffer
+
+
+def report_job_progress(event, offset=0.0, weight=1.0):
+    """
+    処理の進捗イベントをジョブの進捗として通知
+
+    Args:
+        event: prepare_comparison() / build_output() が通知する進捗イベント
+        offset: ジョブ全体の進捗に換算するときの開始位置
+        weight: ジョブ全体の進捗に換算するときの幅
+    """
+    message = event['label']
+    if event['total']:
+        message += f"（{event['done']:,} / {event['total']:,}{event['unit']}）"
+    report_progress(offset + weight * event['fraction'], message)
+
+
+def get_prepared(previous_file, current_file, progress_callback):
+    """
+    照合結果を取得（同じファイルの照合結果がキャッシュにあれば再利用）
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+        progress_callback: 照合処理の進捗イベントの通知先
+
+    Returns:
+        tuple: (照合結果のキャッシュキー, prepare_comparison() の戻り値)
+    """
+    prepared_key = make_cache_key(previous_file, current_file, None, stage='prepare')
+    prepared = get_cached_result(prepared_key)
+
+    if prepared is None:
+        # バリデーション
+        validate_file(previous_file, "前回データ")
+        validate_file(current_file, "今回データ")
+
+        prepared = prepare_comparison(previous_file, current_file, progress_callback=progress_callback)
+        frames_bytes = sum(
+            int(prepared[name].memory_usage(deep=True).sum())
+            for name in ('previous_df', 'current_df', 'comparison_df')
+        )
+        store_result(prepared_key, prepared, frames_bytes)
+
+    return prepared_key, prepared
+
+
+def run_preparation(previous_file, current_file):
+    """
+    バリデーションから比較データの計算までを実行（ワーカースレッドで実行される）
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+
+    Returns:
+        str: 照合結果のキャッシュキー
+    """
+    prepared_key, _ = get_prepared(previous_file, current_file, report_job_progress)
+    return prepared_key
+
+
+def run_profiled_processing(previous_file, current_file, threshold, options):
+    """
+    プロファイルを取得しながらバリデーションから出力ファイルの生成までを実行
+
+    処理時間を計測するため、照合結果・処理結果・ステージ結果のキャッシュは使用しません。
+
+    Returns:
+        tuple: (結果ストアのハンドル, 処理統計dict, プロファイルの結果ストアのハンドル)
+    """
+    validate_file(previous_file, "前回データ")
+    validate_file(current_file, "今回データ")
+
+    # メトリクスの記録は process_excel_files() が行う
+    (output_buffer, stats), profile = run_profiled(
+        process_excel_files,
+        previous_file,
+        current_file,
+        threshold=threshold,
+        use_cache=False,
+        progress_callback=report_job_progress,
+        **options
+    )
+    return put_result(output_buffer), stats, put_result(profile)
+
+
+def run_processing(previous_file, current_file, threshold, options, profile=False):
+    """
+    バリデーションからExcel生成までを実行（ワーカースレッドで実行される）
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+        threshold: 異常値の基準（±%、または路線・市区町村別の閾値テーブル）
+        options: build_output() に渡すその他のオプション
+        profile: プロファイル（関数ごとの所要時間・メモリ確保箇所）を取得するか
+
+    Returns:
+        tuple: (結果ストアのハンドル, 処理統計dict, プロファイルの結果ストアのハンドル or None)
+    """
+    if profile:
+        return run_profiled_processing(previous_file, current_file, threshold, options)
+
+    # 同じファイル・同じ基準値の処理結果があれば再利用
+    cache_key = make_cache_key(previous_file, current_file, threshold, **options)
+    cached = get_cached_result(cache_key)
+
+    if cached is not None and has_result(cached[0]):
+        return cached + (None,)
+
+    started_at = time.perf_counter()
+    try:
+        with track_peak_memory() as memory:
+            # 照合済みであれば照合結果を再利用し、出力処理のみ実行
+            _, prepared = get_prepared(
+                previous_file,
+                current_file,
+                partial(report_job_progress, weight=PREPARE_WEIGHT)
+            )
+            output_buffer, stats = build_output(
+                prepared,
+                threshold=threshold,
+                progress_callback=partial(report_job_progress, offset=PREPARE_WEIGHT, weight=1.0 - PREPARE_WEIGHT),
+                **options
+            )
+    except ValueError as e:
+        record_run(build_run_record(seconds=time.perf_counter() - started_at, error=str(e)))
+        raise
+    output_size = output_buffer.getbuffer().nbytes
+    stats = dict(stats, **memory)
+
+    # 実行回数・所要時間・データ量をメトリクスとして記録（ステージごとの所要時間はコマンドライン版・HTTPサービス版のみ）
+    record_run(build_run_record(stats, seconds=time.perf_counter() - started_at, output_bytes=output_size))
+
+    # 出力は共有の結果ストアに預け、セッションにはハンドルのみを保持する
+    handle = put_result(output_buffer)
+    store_result(cache_key, (handle, stats), HANDLE_ENTRY_BYTES)
+
+    return handle, stats, None
+
+
+def get_abnormal_preview(prepared_key, prepared, threshold, abnormal_options):
+    """
+    プレビュー用の異常値データを取得（同じ照合結果・同じ基準の2回目以降はキャッシュを使用）
+
+    ページ移動や並べ替えのたびに抽出し直さないように、抽出結果をキャッシュします。
+    同じDataFrameを返すため、列ごとの並べ替え順のキャッシュ（modules.preview）も再利用されます。
+
+    Args:
+        prepared_key: 照合結果のキャッシュキー
+        prepared: prepare_comparison() の戻り値
+        threshold: 異常値の基準（±%、または路線・市区町村別の閾値テーブル）
+        abnormal_options: select_abnormal() に渡す検出方法のオプション
+
+    Returns:
+        DataFrame: 異常値のデータ
+    """
+    cache_key = ('abnormal_preview', prepared_key, repr(threshold), repr(sorted(abnormal_options.items())))
+    abnormal_df = get_cached_result(cache_key)
+    if abnormal_df is None:
+        abnormal_df = select_abnormal(prepared['comparison_df'], threshold=threshold, **abnormal_options)
+        store_result(cache_key, abnormal_df, int(abnormal_df.memory_usage(deep=True).sum()))
+    return abnormal_df
+
+
+def wait_with_progress(job_id):
+    """
+    ジョブの完了まで待ち順位・進捗を表示しながら待機
+
+    Args:
+        job_id: ジョブID
+
+    Returns:
+        ジョブの実行結果
+
+    Raises:
+        ValueError: ジョブがエラー終了した場合
+    """
+    status_placeholder = st.empty()
+    progress_bar = st.progress(0.0)
+    while True:
+        status = wait_for_job(job_id, timeout=0.5)
+        if status['state'] == 'queued':
+            status_placeholder.info(f"⏳ 順番待ちです（{status['position']}番目）")
+        elif status['state'] == 'running':
+            status_placeholder.info(f"⚙️ 処理中です... {status['message']}")
+            progress_bar.progress(status['progress'])
+        else:
+            break
+    status_placeholder.empty()
+    progress_bar.empty()
+    discard_job(job_id)
+
+    if status['state'] == 'error':
+        raise ValueError(status['error'])
+
+    return status['result']
+
+
+@st.cache_resource
+def warm_up_workers():
+    """
+    処理モジュールのウォームアップを開始（サーバー起動後の最初の画面表示で1回だけ実行）
+
+    初回の処理要求が pandas / openpyxl の読み込みなどで遅くならないように、
+    ジョブ実行スレッドと同じプロセス内、および分割並列処理のワーカープロセスを事前に温めておきます。
+    """
+    start_background_warm_up()
+    if DEFAULT_WORKERS > 1:
+        start_process_pool(DEFAULT_WORKERS)
+    return True
+
 
 # ページ設定
 st.set_page_config(
@@ -17,6 +311,8 @@ st.set_page_config(
     layout="centered"
 )
 
+warm_up_workers()
+
 # セッション状態初期化
 if 'processed' not in st.session_state:
     st.session_state['processed'] = False
@@ -24,6 +320,12 @@ if 'output' not in st.session_state:
     st.session_state['output'] = None
 if 'stats' not in st.session_state:
     st.session_state['stats'] = None
+if 'profile' not in st.session_state:
+    st.session_state['profile'] = None
+if 'prepared_key' not in st.session_state:
+    st.session_state['prepared_key'] = None
+if 'prepared_files' not in st.session_state:
+    st.session_state['prepared_files'] = None
 
 # タイトル
 st.title("📊 エクセルデータ加工システム")
@@ -36,23 +338,57 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("前回データ")
-    previous_file = st.file_uploader(
+    previous_upload = st.file_uploader(
         "前回データをアップロード",
         type=['xlsx', 'csv'],
         key="previous"
     )
-    if previous_file:
-        st.success(f"✅ {previous_file.name}")
+    if previous_upload:
+        st.success(f"✅ {previous_upload.name}")
 
 with col2:
     st.subheader("今回データ")
-    current_file = st.file_uploader(
+    current_upload = st.file_uploader(
         "今回データをアップロード",
         type=['xlsx', 'csv'],
         key="current"
     )
-    if current_file:
-        st.success(f"✅ {current_file.name}")
+    if current_upload:
+        st.success(f"✅ {current_upload.name}")
+
+# アップロードファイルは一時ファイルに1回だけ書き出し、以降の処理はメモリマップしたバッファを参照
+previous_file = get_upload_buffer('previous', previous_upload) if previous_upload else None
+current_file = get_upload_buffer('current', current_upload) if current_upload else None
+
+# 照合結果（アップロードファイルが変わった場合は使わない）
+prepared = None
+if previous_file and current_file:
+    uploaded_files = (previous_upload.file_id, current_upload.file_id)
+    if st.session_state['prepared_files'] == uploaded_files:
+        prepared = get_cached_result(st.session_state['prepared_key'])
+
+    if prepared is None:
+        st.caption("照合を先に実行すると、異常値の基準を変えたときの件数や比較データの内容を"
+                   "出力ファイルを作成せずにすぐ確認できます")
+        if st.button("🔍 データを照合", use_container_width=True):
+            try:
+                job_id = submit_job(
+                    run_preparation,
+                    previous_file,
+                    current_file,
+                    size_bytes=previous_file.size + current_file.size
+                )
+                st.session_state['prepared_key'] = wait_with_progress(job_id)
+                st.session_state['prepared_files'] = uploaded_files
+                prepared = get_cached_result(st.session_state['prepared_key'])
+            except Exception as e:
+                st.error(f"❌ エラーが発生しました: {str(e)}")
+
+    if prepared is not None:
+        st.success(
+            f"✅ 照合済み: 比較データ {len(prepared['comparison_df']):,}行"
+            f"（前回 {len(prepared['previous_df']):,}行 / 今回 {len(prepared['current_df']):,}行）"
+        )
 
 st.markdown("---")
 
@@ -66,7 +402,213 @@ threshold = st.number_input(
     step=1,
     help="値上げ率がこの値以上（またはマイナスこの値以下）の場合、異常値シートに表示されます"
 )
-st.info(f"💡 現在の設定: ±{threshold}%以上のデータを異常値として抽出します")
+
+detection_mode = st.radio(
+    "検出方法",
+    ["固定の基準値（±%）", "グループ内の統計"],
+    horizontal=True,
+    help="グループ内の統計では、路線・市区町村ごとの値上げ率の分布から外れているデータを抽出します"
+)
+
+processing_options = {}
+if detection_mode == "グループ内の統計":
+    stat_col1, stat_col2, stat_col3 = st.columns(3)
+    with stat_col1:
+        group_by = st.selectbox(
+            "グループ",
+            ['railroad', 'cityid'],
+            format_func=lambda col: {'railroad': '路線（railroad）', 'cityid': '市区町村（cityid）'}[col]
+        )
+    with stat_col2:
+        detector = st.selectbox(
+            "統計量",
+            list(DETECTION_METHODS),
+            format_func=lambda method: DETECTION_METHODS[method]
+        )
+    with stat_col3:
+        score_threshold = st.number_input(
+            "偏差スコアの基準",
+            min_value=1.0,
+            max_value=10.0,
+            value=3.5,
+            step=0.5
+        )
+    processing_options = {
+        'detector': detector,
+        'group_by': group_by,
+        'score_threshold': score_threshold,
+    }
+    st.info(f"💡 現在の設定: グループ内で偏差スコア±{score_threshold}以上のデータを異常値として抽出します")
+else:
+    band_col1, band_col2 = st.columns([3, 1])
+    with band_col1:
+        band_text = st.text_input(
+            "段階別の基準（任意、カンマ区切り）",
+            placeholder="10, 20, 50",
+            help="指定すると上の基準値の代わりに使用し、異常値シートに「異常値区分」列を追加します"
+        )
+    with band_col2:
+        band_sheets = st.checkbox("区分ごとにシートを分ける", help="区分ごとの異常値シートを追加します")
+    try:
+        bands = parse_band_input(band_text)
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        bands = None
+
+if detection_mode == "固定の基準値（±%）" and bands is not None:
+    processing_options = {'bands': bands, 'band_sheets': band_sheets}
+    st.info(f"💡 現在の設定: ±{bands[0]:g}%以上のデータを{len(bands)}段階に区分して抽出します")
+
+    # 照合済みであれば、区分ごとの件数を値上げ率インデックスから即時表示
+    if prepared is not None:
+        counts = [count_abnormal(prepared['rate_index'], edge) for edge in bands] + [0]
+        band_cols = st.columns(len(bands))
+        for i, label in reversed(list(enumerate(band_labels(bands)))):
+            band_cols[len(bands) - 1 - i].metric(label, f"{counts[i] - counts[i + 1]:,}件")
+elif detection_mode == "固定の基準値（±%）":
+    threshold_file = st.file_uploader(
+        "路線・市区町村別の基準（任意）",
+        type=['xlsx', 'csv'],
+        key="threshold_table",
+        help="railroad, cityid, threshold の3列を持つファイル。指定のない路線・市区町村には上の基準値が適用されます"
+    )
+    if threshold_file:
+        try:
+            threshold = read_threshold_table(threshold_file, default_threshold=threshold)
+            table_size = len(threshold['railroad']) + len(threshold['cityid']) + len(threshold['railroad_cityid'])
+            st.info(
+                f"💡 現在の設定: {table_size}件の路線・市区町村別の基準を適用し、"
+                f"それ以外は±{threshold['default']:g}%以上のデータを異常値として抽出します"
+            )
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+            threshold_file = None
+    if not threshold_file:
+        st.info(f"💡 現在の設定: ±{threshold}%以上のデータを異常値として抽出します")
+
+        # 照合済みであれば、値上げ率インデックスから件数と上位データを即時表示
+        if prepared is not None:
+            abnormal_count, top_df = preview_abnormal(
+                prepared['rate_index'], prepared['comparison_df'], threshold
+            )
+            st.metric("異常値の件数（プレビュー）", f"{abnormal_count:,}件")
+            if abnormal_count > 0:
+                st.caption("値上げ率の絶対値が大きい上位データ")
+                st.dataframe(top_df, hide_index=True, use_container_width=True)
+
+# 追加シートの設定
+sheet_col1, sheet_col2 = st.columns(2)
+with sheet_col1:
+    processing_options['summary_sheet'] = st.checkbox(
+        "集計シートを追加",
+        value=True,
+        help="路線別・市区町村別の件数、平均/中央値、平均値上げ率、異常値件数、値上げ率の分布をまとめたシートを追加します"
+    )
+with sheet_col2:
+    processing_options['top_movers'] = st.number_input(
+        "上位変動シートの件数（0で出力しない）",
+        min_value=0,
+        max_value=1000,
+        value=20,
+        step=5,
+        help="値上げ率の上位・下位の件数（全体と路線別）。レビュー対象の駅を絞り込むのに使います"
+    )
+
+delta_col1, delta_col2, delta_col3 = st.columns(3)
+with delta_col1:
+    delta_mode = st.checkbox(
+        "差分のみ出力",
+        help="比較データシートに、価格が変化した行と片方の期間にしかない行だけを出力します"
+    )
+with delta_col2:
+    delta_tolerance = st.number_input(
+        "変化とみなさない範囲（±%）",
+        min_value=0.0,
+        max_value=50.0,
+        value=1.0,
+        step=0.5,
+        disabled=not delta_mode
+    )
+with delta_col3:
+    processing_options['source_sheets'] = st.checkbox(
+        "前回・今回データのシートを出力",
+        value=True,
+        help="オフにすると、アップロードしたデータそのもののシートを省略してファイルを小さくします"
+    )
+if delta_mode:
+    processing_options['delta_tolerance'] = delta_tolerance
+
+format_col1, format_col2 = st.columns(2)
+with format_col1:
+    output_format = st.selectbox(
+        "出力形式",
+        list(OUTPUT_FORMATS),
+        format_func=lambda name: OUTPUT_FORMATS[name]['label'],
+        help="CSV・Parquetはシートごとのファイルと備考行（metadata.json）をzipにまとめて出力します。Excelより高速です"
+    )
+with format_col2:
+    compression_level = st.slider(
+        "圧縮レベル",
+        min_value=MIN_COMPRESSION_LEVEL,
+        max_value=MAX_COMPRESSION_LEVEL,
+        value=DEFAULT_COMPRESSION_LEVEL,
+        disabled=output_format == 'xlsx',
+        help="大きいほどファイルが小さくなり、書き出しに時間がかかります"
+    )
+if output_format != 'xlsx':
+    processing_options['output_format'] = output_format
+    processing_options['compression_level'] = compression_level
+
+profile_run = st.checkbox(
+    "プロファイルを取得",
+    value=PROFILE_ENABLED,
+    help="処理が遅い場合の調査用に、関数ごとの所要時間・メモリ確保の多い箇所をまとめたzipを出力ファイルと一緒にダウンロードできるようにします（キャッシュは使わずに全て処理し直します）"
+)
+
+# 照合済みであれば、比較データ・異常値シートを出力ファイルを作成せずにページ単位で表示
+if prepared is not None:
+    st.markdown("---")
+    st.header("👀 プレビュー")
+
+    preview_col1, preview_col2, preview_col3 = st.columns([2, 2, 1])
+    with preview_col1:
+        preview_sheet = st.radio("シート", ["比較データ", "異常値シート"], horizontal=True)
+    if preview_sheet == "比較データ":
+        preview_df = prepared['comparison_df']
+    else:
+        abnormal_options = {
+            name: processing_options[name]
+            for name in ('detector', 'group_by', 'score_threshold', 'bands')
+            if name in processing_options
+        }
+        preview_df = get_abnormal_preview(
+            st.session_state['prepared_key'], prepared, threshold, abnormal_options
+        )
+    with preview_col2:
+        sort_by = st.selectbox(
+            "並べ替え",
+            [None] + list(preview_df.columns),
+            format_func=lambda column: "（元の順序）" if column is None else column
+        )
+    with preview_col3:
+        descending = st.checkbox("降順", value=True, disabled=sort_by is None)
+
+    page_number = st.number_input(
+        "ページ",
+        min_value=1,
+        value=1,
+        step=1,
+        key=f"preview_page_{preview_sheet}"
+    )
+    page_df, page_number, pages = get_page(
+        preview_df, page_number, sort_by=sort_by, ascending=not descending
+    )
+    first_row = (page_number - 1) * DEFAULT_PAGE_SIZE + 1
+    st.caption(
+        f"{len(preview_df):,}行中 {min(first_row, len(preview_df)):,}〜{first_row + len(page_df) - 1:,}行目"
+        f"（{page_number:,} / {pages:,}ページ）"
+    )
+    st.dataframe(page_df, hide_index=True, use_container_width=True)
 
 st.markdown("---")
 
@@ -75,24 +617,27 @@ st.header("⚡ データ処理")
 
 # ボタンの有効化条件
 if previous_file and current_file:
+    if prepared is not None:
+        st.caption("出力ファイル（Excel・zip）はこのボタンを押したときだけ作成されます。確認だけであれば上のプレビューで十分です")
     if st.button("🚀 データ処理を実行", type="primary", use_container_width=True):
         try:
-            with st.spinner("処理中です...しばらくお待ちください"):
-                # バリデーション
-                validate_file(previous_file, "前回データ")
-                validate_file(current_file, "今回データ")
+            # 共有ワーカーの待ち行列に投入（アップロードサイズで受付を制限）
+            job_id = submit_job(
+                run_processing,
+                previous_file,
+                current_file,
+                threshold,
+                processing_options,
+                profile_run,
+                size_bytes=previous_file.size + current_file.size
+            )
+            handle, stats, profile_handle = wait_with_progress(job_id)
 
-                # メイン処理（基準値を渡す）
-                output_buffer, stats = process_excel_files(
-                    previous_file,
-                    current_file,
-                    threshold=threshold
-                )
-
-                # セッション状態に保存
-                st.session_state['output'] = output_buffer
-                st.session_state['stats'] = stats
-                st.session_state['processed'] = True
+            # セッション状態に保存（出力本体は結果ストアが保持）
+            st.session_state['output'] = handle
+            st.session_state['stats'] = stats
+            st.session_state['profile'] = profile_handle
+            st.session_state['processed'] = True
 
             # 成功メッセージ
             st.success("✅ 処理が完了しました！")
@@ -100,8 +645,17 @@ if previous_file and current_file:
             📊 **処理結果**
             - 前回データ: {stats['previous_rows']}行
             - 今回データ: {stats['current_rows']}行
-            - 比較データ: {stats['comparison_rows']}行
+            - 比較データ: {stats['comparison_rows']}行（出力: {stats.get('output_comparison_rows', stats['comparison_rows'])}行）
             """)
+            peak_memory = describe_peak_memory(stats)
+            if peak_memory:
+                st.caption(f"最大メモリ使用量: {peak_memory}")
+            quality = stats.get('quality')
+            if quality and quality['total'] > 0:
+                st.warning(
+                    f"⚠️ 入力データに確認が必要な値があります: {describe_quality(quality)}。"
+                    f"位置は出力ファイルの「データ品質」シートで確認できます"
+                )
 
         except Exception as e:
             st.error(f"❌ エラーが発生しました: {str(e)}")
@@ -114,18 +668,35 @@ st.markdown("---")
 # セクション3: ダウンロード
 st.header("📥 結果ダウンロード")
 
+if st.session_state.get('processed', False) and not has_result(st.session_state['output']):
+    # 保持期間を過ぎて結果ストアから削除された場合
+    st.session_state['processed'] = False
+    st.session_state['output'] = None
+    st.warning("⚠️ 処理結果の保持期間が過ぎました。もう一度処理を実行してください")
+
 if st.session_state.get('processed', False):
-    output_buffer = st.session_state['output']
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"output_{timestamp}.xlsx"
+    output_info = OUTPUT_FORMATS[st.session_state['stats'].get('output_format', 'xlsx')]
+    filename = f"output_{timestamp}.{output_info['extension']}"
 
+    # クリックされたときだけ結果ストアから読み出す（再描画ごとに出力ファイルをメモリにコピーしない）
     st.download_button(
         label="📥 結果をダウンロード",
-        data=output_buffer,
+        data=partial(read_stored_result, st.session_state['output']),
         file_name=filename,
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        mime=output_info['mime'],
         type="primary",
         use_container_width=True
     )
+
+    # プロファイルを取得した場合（出力ファイルと同じくクリックされたときだけ読み出す）
+    if st.session_state.get('profile') and has_result(st.session_state['profile']):
+        st.download_button(
+            label="📈 プロファイルをダウンロード",
+            data=partial(read_stored_result, st.session_state['profile']),
+            file_name=f"output_{timestamp}.{PROFILE_EXTENSION}",
+            mime="application/zip",
+            use_container_width=True
+        )
 else:
     st.info("💡 処理を実行すると、ダウンロードボタンが表示されます")
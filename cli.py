@@ -0,0 +1,152 @@
+"""
+エクセルデータ加工システム（コマンドライン版）
+
+Streamlit版と同じ処理を、ファイルパスを指定して実行します。
+後続のデータ処理（ETL）向けに、Excel以外の出力形式（CSV / CSV.gz / Parquet のzip）にも対応しています。
+
+使い方:
+    python cli.py 前回データ.xlsx 今回データ.xlsx -o output.zip --format csv.gz
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from modules.data_processor import process_excel_files
+from modules.anomaly_detector import DETECTION_METHODS
+from modules.sharding import SHARD_KEYS, DEFAULT_WORKERS
+from utils.profiling import run_profiled, PROFILE_ENABLED, PROFILE_EXTENSION
+from utils.upload_buffer import describe_peak_memory
+from utils.bundle_writer import (
+    OUTPUT_FORMATS, DEFAULT_COMPRESSION_LEVEL, MIN_COMPRESSION_LEVEL, MAX_COMPRESSION_LEVEL
+)
+
+
+def parse_bands(text):
+    """
+    段階別の基準（例: "10,20,50"）をリストに変換
+    """
+    try:
+        return [float(value) for value in text.split(',') if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("段階別の基準は「10,20,50」のようにカンマ区切りで指定してください")
+
+
+def build_parser():
+    """
+    コマンドライン引数のパーサーを作成
+    """
+    parser = argparse.ArgumentParser(description="前回データと今回データを比較・加工して出力します")
+    parser.add_argument('previous_file', help="前回データのファイル（.xlsx / .csv）")
+    parser.add_argument('current_file', help="今回データのファイル（.xlsx / .csv）")
+    parser.add_argument('-o', '--output', help="出力ファイルのパス（省略時は output_日時.拡張子）")
+    parser.add_argument('--format', dest='output_format', choices=list(OUTPUT_FORMATS), default='xlsx',
+                        help="出力形式（デフォルト: xlsx）")
+    parser.add_argument('--compression-level', type=int, default=DEFAULT_COMPRESSION_LEVEL,
+                        choices=range(MIN_COMPRESSION_LEVEL, MAX_COMPRESSION_LEVEL + 1), metavar='LEVEL',
+                        help=f"zip出力の圧縮レベル（{MIN_COMPRESSION_LEVEL}〜{MAX_COMPRESSION_LEVEL}、"
+                             f"デフォルト: {DEFAULT_COMPRESSION_LEVEL}）")
+    parser.add_argument('--threshold', type=float, default=20, help="異常値の基準（±%%、デフォルト: 20）")
+    parser.add_argument('--bands', type=parse_bands, help="段階別の基準（例: 10,20,50）")
+    parser.add_argument('--band-sheets', action='store_true', help="段階別の区分ごとのシートを追加")
+    parser.add_argument('--detector', choices=['threshold'] + list(DETECTION_METHODS), default='threshold',
+                        help="異常値の検出方法（デフォルト: threshold）")
+    parser.add_argument('--group-by', choices=['railroad', 'cityid'], default='railroad',
+                        help="統計的検出のグループ（デフォルト: railroad）")
+    parser.add_argument('--score-threshold', type=float, default=3.5,
+                        help="統計的検出の偏差スコアの基準（デフォルト: 3.5）")
+    parser.add_argument('--summary', action='store_true', help="集計シートを追加")
+    parser.add_argument('--top-movers', type=int, default=0, help="上位変動シートの件数（デフォルト: 0 = 出力しない）")
+    parser.add_argument('--delta-tolerance', type=float,
+                        help="差分のみ出力する場合の許容範囲（±%%、省略時は全行出力）")
+    parser.add_argument('--no-source-sheets', action='store_true', help="前回データ・今回データのシートを省略")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"計算・マッチングを並列に実行するプロセス数（1 = 並列化しない、デフォルト: {DEFAULT_WORKERS}）")
+    parser.add_argument('--shard-by', choices=list(SHARD_KEYS), default='railroad',
+                        help="並列処理の分割の単位（デフォルト: railroad）")
+    parser.add_argument('--cache-dir', default=None,
+                        help="ステージごとの処理結果を保存し、次回以降の実行で再利用するディレクトリ"
+                             "（デフォルト: 環境変数 EXCEL_APP_STAGE_CACHE_DIR）")
+    parser.add_argument('--profile', action='store_true', default=PROFILE_ENABLED,
+                        help=f"処理のプロファイル（関数ごとの所要時間・メモリ確保箇所・ステージごとの所要時間）を"
+                             f"出力ファイルと同じ場所に .{PROFILE_EXTENSION} で保存（キャッシュは使わない、"
+                             f"環境変数 EXCEL_APP_PROFILE=1 でも有効）")
+    return parser
+
+
+def print_progress(event):
+    """
+    進捗をエラー出力に1行で表示
+    """
+    print(f"\r[{event['fraction']:6.1%}] {event['label']}", end='', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    """
+    コマンドラインから処理を実行
+
+    Returns:
+        int: 終了コード（0: 成功、1: 失敗）
+    """
+    args = build_parser().parse_args(argv)
+
+    output_path = args.output
+    if output_path is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_path = f"output_{timestamp}.{OUTPUT_FORMATS[args.output_format]['extension']}"
+
+    options = dict(
+        threshold=args.threshold,
+        progress_callback=print_progress,
+        detector=args.detector,
+        group_by=args.group_by,
+        score_threshold=args.score_threshold,
+        bands=args.bands,
+        band_sheets=args.band_sheets,
+        summary_sheet=args.summary,
+        top_movers=args.top_movers,
+        delta_tolerance=args.delta_tolerance,
+        source_sheets=not args.no_source_sheets,
+        output_format=args.output_format,
+        compression_level=args.compression_level,
+        workers=args.workers,
+        shard_by=args.shard_by,
+        cache_dir=args.cache_dir
+    )
+
+    try:
+        if args.profile:
+            # プロファイル取得時はキャッシュを使わずに全ステージを実行
+            (output, stats), profile = run_profiled(
+                process_excel_files, args.previous_file, args.current_file, use_cache=False, **options
+            )
+        else:
+            output, stats = process_excel_files(args.previous_file, args.current_file, **options)
+    except ValueError as e:
+        print(f"\n❌ {str(e)}", file=sys.stderr)
+        return 1
+
+    with open(output_path, 'wb') as f:
+        f.write(output.getbuffer())
+
+    print(file=sys.stderr)
+    print(f"✅ 出力しました: {output_path}")
+    print(f"  前回データ: {stats['previous_rows']}行")
+    print(f"  今回データ: {stats['current_rows']}行")
+    print(f"  比較データ: {stats['comparison_rows']}行（出力: {stats['output_comparison_rows']}行）")
+    print(f"  異常値: {stats['abnormal_rows']}行")
+    print(f"  キャッシュを使用したステージ: {stats['stage_cache_hits']} / {len(stats['stages'])}")
+    peak_memory = describe_peak_memory(stats)
+    if peak_memory:
+        print(f"  最大メモリ使用量: {peak_memory}")
+
+    if args.profile:
+        profile_path = f"{output_path}.{PROFILE_EXTENSION}"
+        with open(profile_path, 'wb') as f:
+            f.write(profile.getbuffer())
+        print(f"  プロファイル: {profile_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
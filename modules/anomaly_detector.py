@@ -0,0 +1,254 @@
+"""
+異常値検出モジュール
+
+このモジュールは、比較データからの統計的な異常値検出を担当します。
+- 路線（railroad）や市区町村（cityid）ごとのグループ統計による外れ値検出
+- 中央値/MAD によるロバストな偏差スコア、または平均/標準偏差によるZスコア
+- グループ集計はすべて groupby().transform() で一括計算（グループごとのループなし）
+- 路線・市区町村別の閾値テーブルを比較データ全行に一括で割り当て
+- 値上げ率の段階別（例: ±10% / ±20% / ±50%）の区分を一括で判定
+"""
+
+from modules.calculator import parse_rate_column
+
+# 検出方法ごとの表示名
+DETECTION_METHODS = {
+    'mad': '中央値/MAD',
+    'zscore': '平均/標準偏差',
+}
+
+# グループ化に使えるカラム
+GROUP_COLUMNS = ['railroad', 'cityid']
+
+# 路線と市区町村の組み合わせキーの区切り文字
+_PAIR_SEPARATOR = '\x1f'
+
+# MADを標準偏差相当に換算する係数（正規分布の場合）
+MAD_SCALE = 1.4826
+
+# MADが0のときに代わりに使う平均絶対偏差の換算係数
+MEAN_AD_SCALE = 1.253314
+
+
+def calculate_deviation_scores(comparison_df, group_by='railroad', method='mad'):
+    """
+    各行の値上げ率がグループ内でどれだけ外れているかのスコアを計算
+
+    Args:
+        comparison_df: 比較データのDataFrame（値上げ率を含む）
+        group_by: グループ化するカラム（'railroad' or 'cityid'）
+        method: 'mad'（中央値/MAD） or 'zscore'（平均/標準偏差）
+
+    Returns:
+        tuple: (偏差スコアのSeries, グループ中心値のSeries, グループ件数のSeries)
+               値上げ率が「データなし」の行、グループのばらつきが0の行のスコアはNaN
+    """
+    import numpy as np
+
+    if group_by not in GROUP_COLUMNS:
+        raise ValueError(f"グループ化カラムが不正です: {group_by}")
+    if method not in DETECTION_METHODS:
+        raise ValueError(f"検出方法が不正です: {method}")
+
+    rate = parse_rate_column(comparison_df['値上げ率'])
+    keys = comparison_df[group_by]
+    grouped = rate.groupby(keys, sort=False)
+
+    # 値上げ率のある行数（グループごと）
+    count = grouped.transform('count')
+
+    if method == 'mad':
+        center = grouped.transform('median')
+        deviation = rate - center
+        abs_deviation = deviation.abs().groupby(keys, sort=False)
+        mad = abs_deviation.transform('median')
+        mean_ad = abs_deviation.transform('mean')
+        # 値上げ率は整数%のためMADが0になりやすい。その場合は平均絶対偏差で代用する
+        scale = np.where(mad > 0, mad * MAD_SCALE, mean_ad * MEAN_AD_SCALE)
+    else:
+        center = grouped.transform('mean')
+        deviation = rate - center
+        scale = grouped.transform('std').to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = deviation / np.where(scale > 0, scale, np.nan)
+
+    return score, center, count
+
+
+def extract_statistical_outliers(comparison_df, group_by='railroad', method='mad',
+                                 score_threshold=3.5, min_group_size=5):
+    """
+    グループ内の統計から外れている行を異常値として抽出
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        group_by: グループ化するカラム（デフォルト: 'railroad'）
+        method: 'mad'（中央値/MAD） or 'zscore'（平均/標準偏差）
+        score_threshold: 偏差スコアの閾値（絶対値がこの値以上を抽出、デフォルト: 3.5）
+        min_group_size: 判定対象とするグループの最小件数（デフォルト: 5）
+
+    Returns:
+        DataFrame: 異常値のデータ（グループ中心値・偏差スコア列を追加、スコアの降順）
+    """
+    score, center, count = calculate_deviation_scores(comparison_df, group_by=group_by, method=method)
+
+    flagged = (score.abs() >= score_threshold) & (count >= min_group_size)
+
+    center_label = 'グループ中央値' if method == 'mad' else 'グループ平均'
+    outlier_df = comparison_df.loc[flagged].assign(**{
+        center_label: center[flagged].round(1),
+        '偏差スコア': score[flagged].round(2),
+    })
+
+    return outlier_df.sort_values(by='偏差スコア', ascending=False, kind='stable')
+
+
+def normalize_cityid(cityid_series):
+    """
+    cityidを照合用の文字列に変換
+
+    数値として読み込まれたcityid（13101 / 13101.0）と文字列のcityid（"13101"）を
+    同じキーとして扱えるようにします。
+
+    Args:
+        cityid_series: cityidのSeries
+
+    Returns:
+        Series: 照合用の文字列
+    """
+    import pandas as pd
+
+    numeric = pd.to_numeric(cityid_series, errors='coerce')
+    is_integer = numeric.notna() & (numeric % 1 == 0)
+    keys = cityid_series.astype(str).astype(object)
+    keys[is_integer] = numeric[is_integer].astype('int64').astype(str)
+    return keys
+
+
+def resolve_thresholds(comparison_df, threshold):
+    """
+    比較データの各行に適用する異常値の閾値を求める
+
+    閾値テーブルは以下の形式のdictで、優先順位は
+    路線×市区町村 > 市区町村 > 路線 > default です。
+        {
+            'default': 20,
+            'railroad': {'JR山手線': 10, ...},
+            'cityid': {'13101': 30, ...},
+            'railroad_cityid': {('JR山手線', '13101'): 5, ...},
+        }
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        threshold: 閾値（数値）または閾値テーブル（dict）
+
+    Returns:
+        数値（threshold が数値の場合はそのまま）または各行の閾値のndarray
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not isinstance(threshold, dict):
+        return threshold
+
+    thresholds = np.full(len(comparison_df), float(threshold.get('default', 20)))
+
+    def apply_mapping(keys, mapping):
+        # 1回のmapでテーブルを全行に割り当て、該当した行だけ上書きする
+        mapped = keys.map(pd.Series(mapping, dtype='float64')).to_numpy(dtype='float64')
+        np.copyto(thresholds, mapped, where=~np.isnan(mapped))
+
+    railroad_keys = comparison_df['railroad'].astype(str)
+    cityid_keys = normalize_cityid(comparison_df['cityid'])
+
+    if threshold.get('railroad'):
+        apply_mapping(railroad_keys, {str(k): v for k, v in threshold['railroad'].items()})
+
+    if threshold.get('cityid'):
+        city_table = pd.Series(threshold['cityid'])
+        city_table.index = normalize_cityid(city_table.index.to_series())
+        apply_mapping(cityid_keys, city_table.to_dict())
+
+    if threshold.get('railroad_cityid'):
+        pair_table = pd.Series(threshold['railroad_cityid'])
+        pair_railroads = pair_table.index.get_level_values(0).astype(str)
+        pair_cityids = normalize_cityid(pd.Series(pair_table.index.get_level_values(1)))
+        pair_table.index = pair_railroads + _PAIR_SEPARATOR + pair_cityids.to_numpy()
+        apply_mapping(railroad_keys + _PAIR_SEPARATOR + cityid_keys, pair_table.to_dict())
+
+    return thresholds
+
+
+def describe_threshold(threshold):
+    """
+    閾値の設定内容を備考行向けの文字列にする
+
+    Args:
+        threshold: 閾値（数値）または閾値テーブル（dict）
+
+    Returns:
+        str: 例 "±20%"、"路線・市区町村別の基準（既定±20%）"
+    """
+    if not isinstance(threshold, dict):
+        return f"±{threshold}%"
+    return f"路線・市区町村別の基準（既定±{threshold.get('default', 20)}%）"
+
+
+def normalize_band_edges(bands):
+    """
+    段階別の基準値を検証し、昇順に並べ替える
+
+    Args:
+        bands: 基準値のリスト（例: [10, 20, 50]）
+
+    Returns:
+        list: 重複を除いて昇順に並べた基準値
+
+    Raises:
+        ValueError: 基準値が空、または正の数値でない場合
+    """
+    edges = sorted({float(edge) for edge in bands})
+    if not edges or edges[0] <= 0:
+        raise ValueError("段階別の基準値には正の数値を1つ以上指定してください")
+    return edges
+
+
+def band_labels(edges):
+    """
+    段階別の区分の表示名を作成
+
+    Args:
+        edges: normalize_band_edges() で整えた基準値
+
+    Returns:
+        list: 区分1〜区分Nの表示名（例: ['±10%以上20%未満', '±20%以上50%未満', '±50%以上']）
+    """
+    labels = []
+    for i, lower in enumerate(edges):
+        if i + 1 < len(edges):
+            labels.append(f"±{lower:g}%以上{edges[i + 1]:g}%未満")
+        else:
+            labels.append(f"±{lower:g}%以上")
+    return labels
+
+
+def classify_bands(rate, edges):
+    """
+    値上げ率の絶対値を段階別の区分に一括で分類
+
+    Args:
+        rate: 値上げ率の数値のSeries（parse_rate_column() の戻り値）
+        edges: normalize_band_edges() で整えた基準値
+
+    Returns:
+        ndarray: 区分番号（0: 最小の基準値未満または「データなし」、
+                 i: edges[i-1] 以上 edges[i] 未満、len(edges): 最大の基準値以上）
+    """
+    import numpy as np
+
+    abs_rate = rate.abs().to_numpy()
+    bands = np.digitize(abs_rate, edges, right=False)
+    # np.digitize はNaNを最上位の区分に分類するため、「データなし」は0に戻す
+    bands[np.isnan(abs_rate)] = 0
+    return bands
@@ -4,22 +4,106 @@
 このモジュールは、各種価格計算を担当します。
 - 今回データのJ〜M列（新築換算平均価格、新築時平均価格、中古平均価格、新築換算ー中古）
 - 比較データのH, I列（差異、値上げ率）
+- 値上げ率の文字列から数値への変換
+- 価格列の数値への一括変換（数値以外の値はNaN）
+
+J〜M列・H, I列の計算は、列単位の一括計算（'vectorized'）と従来の行ごとの計算（'legacy'）を
+環境変数 EXCEL_APP_CALC_ENGINE で切り替えられます。結果（値・型・「データなし」の位置）は同じで、
+scripts/equivalence_harness.py で両者の一致を確認できます。
 """
 
-import pandas as pd
 import math
+import os
+
+# pandas は初回使用時に読み込む（起動時間短縮のため）
+
+# 計算の実装（'vectorized': 列単位の一括計算 or 'legacy': 行ごとの計算）
+CALC_ENGINES = ('vectorized', 'legacy')
+CALC_ENGINE = os.environ.get('EXCEL_APP_CALC_ENGINE', 'vectorized')
+
+# 計算できない値の表示
+NO_DATA = "データなし"
+
+# 一括計算で扱う値の絶対値の上限（浮動小数点数で整数を正確に表せる範囲、超える場合は行ごとに計算）
+MAX_EXACT_VALUE = 2 ** 53
+
+# 一括計算で数値の列として扱う型（pandas.api.types.infer_dtype() の結果）
+NUMERIC_INFERRED_TYPES = ('integer', 'floating', 'mixed-integer-float', 'empty')
+
+
+def _resolve_engine(engine):
+    """
+    計算の実装名を確認（Noneの場合は環境変数の設定）
+    """
+    engine = CALC_ENGINE if engine is None else engine
+    if engine not in CALC_ENGINES:
+        raise ValueError(f"計算の実装は {', '.join(CALC_ENGINES)} のいずれかを指定してください: {engine}")
+    return engine
+
+
+def _with_no_data(values, valid, index):
+    """
+    valid の位置は整数、それ以外は「データなし」のSeriesを作成
+
+    型は行ごとの計算（apply）の結果と同じ推論になるようにする
+    （全て整数: int64、全て「データなし」: 文字列、混在: object）
+    """
+    import numpy as np
+    import pandas as pd
+
+    if valid.all():
+        return pd.Series(values.astype(np.int64), index=index)
+    result = np.full(len(valid), NO_DATA, dtype=object)
+    result[valid] = values[valid].astype(np.int64).tolist()
+    return pd.Series(result, index=index).infer_objects()
 
 
-def calculate_j_k_l_m_columns(df):
+def calculate_j_k_l_m_columns(df, engine=None):
     """
     J〜M列を計算してDataFrameに追加
 
     Args:
         df: 今回データのDataFrame（F, G, H列を含む）
+        engine: 計算の実装（'vectorized' or 'legacy'、デフォルト: 環境変数 EXCEL_APP_CALC_ENGINE）
 
     Returns:
         J〜M列が追加されたDataFrame
     """
+    import numpy as np
+
+    if _resolve_engine(engine) == 'legacy' or len(df) == 0:
+        return _calculate_j_k_l_m_columns_legacy(df)
+
+    # 数値以外の値（文字列など）は「データなし」として計算する
+    # （該当セルは data_quality.check_data_quality() でデータ品質シートに出力される）
+    prices = []
+    for column in ['priceunitconvnewly', 'priceunitnewly', 'priceunitusedsigned']:
+        values = coerce_numeric(df[column]).to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values) & (values != 0)
+        # 坪単価換算: value × 0.3025 × 70 を偶数丸め（round() と同じ）
+        converted = np.rint(values * 0.3025 * 70)
+        if not (np.abs(converted[valid]) < MAX_EXACT_VALUE).all():
+            # 無限大・極端に大きい値は行ごとの計算と同じ結果（エラー）にするため従来の実装で計算
+            return _calculate_j_k_l_m_columns_legacy(df)
+        prices.append((converted, valid))
+
+    # J〜L列: 新築換算平均価格、新築時平均価格、中古平均価格
+    for name, (values, valid) in zip(['新築換算平均価格', '新築時平均価格', '中古平均価格'], prices):
+        df[name] = _with_no_data(values, valid, df.index)
+
+    # M列: 新築換算ー中古
+    (j_values, j_valid), _, (l_values, l_valid) = prices
+    df['新築換算ー中古'] = _with_no_data(j_values - l_values, j_valid & l_valid, df.index)
+
+    return df
+
+
+def _calculate_j_k_l_m_columns_legacy(df):
+    """
+    J〜M列を行ごとに計算（従来の実装）
+    """
+    import pandas as pd
+
     def calc_price(value):
         """
         坪単価換算
@@ -31,14 +115,17 @@ def calculate_j_k_l_m_columns(df):
         result = round(value * 0.3025 * 70, 0)
         return int(result)
 
+    # 数値以外の値（文字列など）は「データなし」として計算する
+    # （該当セルは data_quality.check_data_quality() でデータ品質シートに出力される）
+
     # J列: 新築換算平均価格
-    df['新築換算平均価格'] = df['priceunitconvnewly'].apply(calc_price)
+    df['新築換算平均価格'] = coerce_numeric(df['priceunitconvnewly']).apply(calc_price)
 
     # K列: 新築時平均価格
-    df['新築時平均価格'] = df['priceunitnewly'].apply(calc_price)
+    df['新築時平均価格'] = coerce_numeric(df['priceunitnewly']).apply(calc_price)
 
     # L列: 中古平均価格
-    df['中古平均価格'] = df['priceunitusedsigned'].apply(calc_price)
+    df['中古平均価格'] = coerce_numeric(df['priceunitusedsigned']).apply(calc_price)
 
     # M列: 新築換算ー中古
     def calc_diff(row):
@@ -51,22 +138,71 @@ def calculate_j_k_l_m_columns(df):
             return "データなし"
         return int(j - l)
 
-    df['新築換算ー中古'] = df.apply(calc_diff, axis=1)
+    # 0行の場合もSeriesを返すように result_type='reduce' を指定（分割処理で今回データがない分割など）
+    df['新築換算ー中古'] = df.apply(calc_diff, axis=1, result_type='reduce')
 
     return df
 
 
-def calculate_comparison_columns(df):
+def calculate_comparison_columns(df, engine=None):
     """
     比較データのH列（差異）とI列（値上げ率）を計算
 
     Args:
         df: 比較データのDataFrame
             （前回新築換算平均価格, 今回新築換算平均価格を含む）
+        engine: 計算の実装（'vectorized' or 'legacy'、デフォルト: 環境変数 EXCEL_APP_CALC_ENGINE）
 
     Returns:
         H, I列が追加されたDataFrame
     """
+    import numpy as np
+    import pandas as pd
+
+    if _resolve_engine(engine) == 'legacy' or len(df) == 0:
+        return _calculate_comparison_columns_legacy(df)
+
+    prices = []
+    for column in ['前回新築換算平均価格', '今回新築換算平均価格']:
+        series = df[column]
+        no_data = (series.isna() | (series == NO_DATA)).to_numpy(dtype=bool)
+        if not pd.api.types.is_numeric_dtype(series):
+            remaining = series[~no_data]
+            if pd.api.types.infer_dtype(remaining, skipna=True) not in NUMERIC_INFERRED_TYPES:
+                # 数値以外の値は行ごとの計算と同じエラーにするため従来の実装で計算
+                return _calculate_comparison_columns_legacy(df)
+            series = series.where(~no_data)
+        values = pd.to_numeric(series).to_numpy(dtype=np.float64, na_value=np.nan)
+        if not (np.abs(values[~no_data]) < MAX_EXACT_VALUE).all():
+            # 無限大・極端に大きい値は行ごとの計算と同じ結果（エラー）にするため従来の実装で計算
+            return _calculate_comparison_columns_legacy(df)
+        prices.append((values, ~no_data))
+
+    (prev, prev_valid), (curr, curr_valid) = prices
+    valid = prev_valid & curr_valid
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # H列: 差異（今回 - 前回、int() と同じく0方向に切り捨て）
+        diff = np.trunc(curr - prev)
+
+        # I列: 値上げ率（(今回 / 前回 - 1) × 100 を切り上げ、％記号付き）
+        rate_valid = valid & (prev != 0)
+        rate = np.ceil((curr / prev - 1) * 100)
+
+    df['差異'] = _with_no_data(diff, valid, df.index)
+    rate_text = np.full(len(df), NO_DATA, dtype=object)
+    rate_text[rate_valid] = [f"{value}%" for value in rate[rate_valid].astype(np.int64).tolist()]
+    df['値上げ率'] = pd.Series(rate_text, index=df.index).infer_objects()
+
+    return df
+
+
+def _calculate_comparison_columns_legacy(df):
+    """
+    比較データのH, I列を行ごとに計算（従来の実装）
+    """
+    import pandas as pd
+
     def calc_diff(row):
         """
         差異計算: 今回 - 前回
@@ -105,3 +241,52 @@ def calculate_comparison_columns(df):
     df['値上げ率'] = df.apply(calc_rate, axis=1)
 
     return df
+
+
+def parse_rate_column(rate_series):
+    """
+    値上げ率の列（"5%" 形式の文字列）を数値の列に一括変換
+
+    例: "5%" -> 5.0, "-3%" -> -3.0, "データなし" -> NaN
+
+    Args:
+        rate_series: 値上げ率のSeries
+
+    Returns:
+        Series: 値上げ率の数値（float、変換できない値はNaN）
+    """
+    import pandas as pd
+
+    return pd.to_numeric(
+        rate_series.astype(str).str.replace('%', '', regex=False),
+        errors='coerce'
+    )
+
+
+def coerce_numeric(series):
+    """
+    価格などの列を数値の列に一括変換
+
+    CSVから文字列として読み込まれた数値（"12345"、"1,234"、前後の空白付き）も数値として扱います。
+
+    例: 100 -> 100, "1,234" -> 1234, "データなし" -> NaN, "abc" -> NaN
+
+    Args:
+        series: 変換するSeries
+
+    Returns:
+        Series: 数値のSeries（変換できない値・空欄はNaN）
+    """
+    import pandas as pd
+
+    numeric = pd.to_numeric(series, errors='coerce')
+    if pd.api.types.is_numeric_dtype(series):
+        return numeric
+
+    # 変換できなかった値（桁区切り・前後の空白付きなど）だけを文字列として整えて再変換
+    retry = numeric.isna() & series.notna()
+    if retry.any():
+        text = series[retry].astype(str).str.strip().str.replace(',', '', regex=False)
+        numeric = numeric.astype('float64')
+        numeric[retry] = pd.to_numeric(text, errors='coerce')
+    return numeric
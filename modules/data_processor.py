@@ -2,99 +2,371 @@
 メイン処理モジュール
 
 このモジュールは、全モジュールを統合してメイン処理フローを制御します。
-- ファイル読み込み → 計算 → マッチング → 出力の一連の流れ
+- ファイル読み込み → 計算 → マッチング（照合処理）→ 出力の一連の流れ
+- 照合処理と出力処理は個別にも実行可能（基準値を変えての再出力用）
 - 処理統計情報の返却
-- 異常値の抽出（±20%以上）
+- 処理の実行回数・所要時間・データ量のメトリクス記録（utils.metrics）
+- 異常値の抽出（±20%以上、またはグループ内の統計による外れ値）
 """
 
-from io import BytesIO
+import time
 from datetime import datetime
-import pandas as pd
-from utils.excel_handler import read_excel_with_comment, write_excel_with_sheets
-from modules.calculator import calculate_j_k_l_m_columns, calculate_comparison_columns
+from utils.excel_handler import read_excel_with_comment, write_excel_with_sheets, COMPARISON_HEADER_FILLS
+from utils.bundle_writer import write_bundle, DEFAULT_COMPRESSION_LEVEL
+from utils.metrics import build_run_record, record_run
+from utils.upload_buffer import track_peak_memory
+from modules.calculator import calculate_j_k_l_m_columns, calculate_comparison_columns, parse_rate_column
 from modules.matcher import create_comparison_dataframe
+from modules.sharding import run_sharded, DEFAULT_WORKERS
+from modules.rate_index import build_rate_index
+from modules.pipeline import run_pipeline
+from modules.data_quality import check_data_quality, describe_quality, QUALITY_SHEET_NAME
+from modules.summary import build_summary, build_top_movers, SUMMARY_SHEET_NAME, TOP_MOVERS_SHEET_NAME
+from modules.anomaly_detector import (
+    extract_statistical_outliers, resolve_thresholds, describe_threshold, DETECTION_METHODS,
+    normalize_band_edges, band_labels, classify_bands
+)
 
+# 段階別抽出時に追加する区分の列名
+BAND_COLUMN = '異常値区分'
 
-def extract_abnormal_values(comparison_df, threshold=20):
+# 照合処理のステージ（ステージ名, 表示名, 照合処理全体に占める進捗の割合）
+PREPARE_STAGES = [
+    ('read_previous', '前回データ読み込み', 0.30),
+    ('read_current', '今回データ読み込み', 0.30),
+    ('quality', 'データ品質チェック', 0.05),
+    ('calculate', '今回データの計算', 0.15),
+    ('match', 'マッチング', 0.10),
+    ('compare', '比較データの計算', 0.10),
+]
+
+# 出力処理のステージ（ステージ名, 表示名, 出力処理全体に占める進捗の割合）
+BUILD_STAGES = [
+    ('abnormal', '異常値の抽出', 0.10),
+    ('write', 'Excelファイル生成', 0.90),
+]
+
+# process_excel_files() 全体の進捗に占める照合処理の割合
+PREPARE_WEIGHT = 0.55
+
+
+def _stage_reporter(progress_callback, stages, stage, unit='行'):
+    """
+    ステージ内の進捗を全体の進捗イベントに変換する関数を作成
+
+    Args:
+        progress_callback: 進捗イベントの通知先（Noneの場合は何もしない関数を返す）
+        stages: ステージの定義（PREPARE_STAGES or BUILD_STAGES）
+        stage: ステージ名
+        unit: 進捗の単位（'行' or 'バイト'）
+
+    Returns:
+        function: report(done, total) 形式の関数
+    """
+    offset = 0.0
+    for name, label, weight in stages:
+        if name == stage:
+            break
+        offset += weight
+
+    def report(done, total):
+        if progress_callback is None:
+            return
+        ratio = done / total if total else 1.0
+        progress_callback({
+            'stage': stage,
+            'label': label,
+            'done': done,
+            'total': total,
+            'unit': unit,
+            'fraction': offset + weight * min(ratio, 1.0),
+        })
+
+    return report
+
+
+def _scaled_callback(progress_callback, offset, weight):
+    """
+    進捗イベントの進捗率を offset〜offset+weight の範囲に変換する通知先を作成
+
+    Args:
+        progress_callback: 元の通知先（Noneの場合はNoneを返す）
+        offset: 進捗率の開始位置
+        weight: 進捗率の幅
+
+    Returns:
+        function or None: 変換後の通知先
+    """
+    if progress_callback is None:
+        return None
+
+    def callback(event):
+        progress_callback(dict(event, fraction=offset + weight * event['fraction']))
+
+    return callback
+
+
+def extract_abnormal_values(comparison_df, threshold=20, bands=None):
     """
     比較データから異常値（±threshold%以上）を抽出
 
     Args:
         comparison_df: 比較データのDataFrame
         threshold: 閾値（デフォルト: 20%）
+            数値の代わりに路線・市区町村別の閾値テーブル（dict）も指定可能
+            （形式は anomaly_detector.resolve_thresholds() を参照）
+        bands: 段階別の基準値のリスト（例: [10, 20, 50]、オプション）
+            指定した場合は threshold の代わりに最小の基準値以上を抽出し、
+            「異常値区分」列を追加して区分の高い順に並べる
 
     Returns:
         DataFrame: 異常値のデータ
     """
-    def parse_rate(rate_str):
-        """
-        値上げ率の文字列から数値を抽出
-        例: "5%" -> 5, "-3%" -> -3, "データなし" -> None
-        """
-        if pd.isna(rate_str) or rate_str == "データなし":
-            return None
-        try:
-            # %記号を除去して数値に変換
-            return float(str(rate_str).replace('%', ''))
-        except (ValueError, AttributeError):
-            return None
-
-    # 値上げ率を数値に変換
-    comparison_df['_rate_numeric'] = comparison_df['値上げ率'].apply(parse_rate)
-
-    # ±threshold%以上のデータを抽出
-    abnormal_df = comparison_df[
-        (comparison_df['_rate_numeric'].notna()) &
-        ((comparison_df['_rate_numeric'] >= threshold) |
-         (comparison_df['_rate_numeric'] <= -threshold))
-    ].copy()
+    import numpy as np
 
-    # 値上げ率の数値で降順ソート
-    if not abnormal_df.empty:
-        abnormal_df = abnormal_df.sort_values(by='_rate_numeric', ascending=False)
+    # 値上げ率を数値に変換（"データなし" はNaN）
+    rate = parse_rate_column(comparison_df['値上げ率'])
+
+    if bands is not None:
+        # 全行の区分を1回の digitize で判定し、区分→値上げ率の降順に並べる
+        edges = normalize_band_edges(bands)
+        band = classify_bands(rate, edges)
+        positions = np.flatnonzero(band > 0)
+        order = np.lexsort((-rate.to_numpy()[positions], -band[positions]))
+        positions = positions[order]
+
+        labels = np.array(band_labels(edges), dtype=object)
+        return comparison_df.iloc[positions].assign(**{
+            BAND_COLUMN: labels[band[positions] - 1],
+        })
 
-    # 一時カラムを削除
-    if '_rate_numeric' in abnormal_df.columns:
-        abnormal_df = abnormal_df.drop(columns=['_rate_numeric'])
+    # 各行の閾値を求め、±閾値%以上のデータを1回の比較で抽出（NaNは常にFalse）
+    thresholds = resolve_thresholds(comparison_df, threshold)
+    is_abnormal = rate.abs() >= thresholds
+
+    # 値上げ率の数値で降順ソート
+    abnormal_rate = rate[is_abnormal]
+    abnormal_df = comparison_df[is_abnormal].sort_values(
+        by='値上げ率', ascending=False, key=lambda _: abnormal_rate
+    )
 
     return abnormal_df
 
 
-def process_excel_files(previous_file, current_file, threshold=20):
+def extract_changed_rows(comparison_df, tolerance=0):
     """
-    Excelファイルを処理して4シート出力を生成
+    比較データから価格が変化した行（差分）を抽出
+
+    前回・今回の新築換算平均価格の変化率が±tolerance%を超える行と、
+    片方の期間にしか価格がない行を、元の並び順のまま返します。
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        tolerance: 変化とみなさない範囲（%、デフォルト: 0 = 価格が少しでも変わった行）
+
+    Returns:
+        DataFrame: 差分の行
+    """
+    import pandas as pd
+
+    previous_price = pd.to_numeric(comparison_df['前回新築換算平均価格'], errors='coerce')
+    current_price = pd.to_numeric(comparison_df['今回新築換算平均価格'], errors='coerce')
+
+    is_changed = (
+        previous_price.isna() | current_price.isna() |
+        ((current_price - previous_price).abs() > previous_price.abs() * (tolerance / 100))
+    )
+
+    return comparison_df[is_changed.to_numpy()]
+
+
+def split_abnormal_bands(abnormal_df, bands):
+    """
+    段階別に抽出した異常値データを区分ごとに分割
+
+    Args:
+        abnormal_df: extract_abnormal_values(bands=...) の戻り値
+        bands: 段階別の基準値のリスト
+
+    Returns:
+        list: (区分の表示名, DataFrame) のリスト（区分の高い順）
+    """
+    labels = band_labels(normalize_band_edges(bands))
+    return [
+        (label, abnormal_df[abnormal_df[BAND_COLUMN] == label])
+        for label in reversed(labels)
+    ]
+
+
+def prepare_comparison(previous_file, current_file, progress_callback=None, workers=None, shard_by='railroad'):
+    """
+    ファイル読み込みから比較データの計算までを実行（出力ファイルは作成しない）
 
     Args:
         previous_file: 前回データのファイル
         current_file: 今回データのファイル
-        threshold: 異常値の基準（デフォルト: 20%）
+        progress_callback: 進捗イベントの通知先（オプション、形式は process_excel_files() を参照）
+        workers: 今回データの計算〜比較データの計算を分割して並列に実行するプロセス数
+            （デフォルト: 環境変数 EXCEL_APP_SHARD_WORKERS、1以下の場合は分割しない）
+        shard_by: 分割の単位（'railroad': 路線 or 'city_prefix': 市区町村コードの上2桁）
 
     Returns:
-        tuple: (出力ExcelのBytesIO, 処理統計dict)
+        dict: 照合結果
+            previous_df, previous_comment, current_df, current_comment,
+            comparison_df, rate_index（値上げ率インデックス）,
+            quality_df, quality_stats（データ品質チェックの結果）
 
     Raises:
         ValueError: 処理エラー
     """
     try:
         # 1. ファイル読み込み
-        previous_df, previous_comment = read_excel_with_comment(previous_file)
-        current_df, current_comment = read_excel_with_comment(current_file)
+        previous_df, previous_comment = read_excel_with_comment(
+            previous_file,
+            progress_callback=_stage_reporter(progress_callback, PREPARE_STAGES, 'read_previous', unit='バイト')
+        )
+        current_df, current_comment = read_excel_with_comment(
+            current_file,
+            progress_callback=_stage_reporter(progress_callback, PREPARE_STAGES, 'read_current', unit='バイト')
+        )
 
-        # 2. 今回データの計算（J〜M列）
-        current_df = calculate_j_k_l_m_columns(current_df)
+        # 2. データ品質チェック（価格列の数値以外・ゼロ・負の値、キー欠損）
+        report = _stage_reporter(progress_callback, PREPARE_STAGES, 'quality')
+        report(0, len(previous_df) + len(current_df))
+        quality_df, quality_stats = check_data_quality([
+            ('前回データ', previous_df),
+            ('今回データ', current_df),
+        ])
 
-        # 3. 比較データの作成
-        comparison_df = create_comparison_dataframe(previous_df, current_df)
+        if workers is None:
+            workers = DEFAULT_WORKERS
 
-        # 4. 比較データの計算（H, I列）
-        comparison_df = calculate_comparison_columns(comparison_df)
+        if workers > 1:
+            # 3〜5. 路線などの単位で分割し、今回データの計算からH, I列の計算までを並列に実行
+            report = _stage_reporter(progress_callback, PREPARE_STAGES, 'calculate')
+            report(0, len(current_df))
+            current_df, comparison_df = run_sharded(
+                previous_df,
+                current_df,
+                workers=workers,
+                shard_by=shard_by,
+                progress_callback=_stage_reporter(progress_callback, PREPARE_STAGES, 'match')
+            )
+            report = _stage_reporter(progress_callback, PREPARE_STAGES, 'compare')
+        else:
+            # 3. 今回データの計算（J〜M列）
+            report = _stage_reporter(progress_callback, PREPARE_STAGES, 'calculate')
+            report(0, len(current_df))
+            current_df = calculate_j_k_l_m_columns(current_df)
 
-        # 5. 異常値シートの作成（ユーザー指定の閾値を使用）
-        abnormal_df = extract_abnormal_values(comparison_df, threshold=threshold)
+            # 4. 比較データの作成
+            report = _stage_reporter(progress_callback, PREPARE_STAGES, 'match')
+            report(0, len(previous_df) + len(current_df))
+            comparison_df = create_comparison_dataframe(previous_df, current_df)
+
+            # 5. 比較データの計算（H, I列）
+            report = _stage_reporter(progress_callback, PREPARE_STAGES, 'compare')
+            report(0, len(comparison_df))
+            comparison_df = calculate_comparison_columns(comparison_df)
+
+        # 6. 基準値プレビュー用の値上げ率インデックスを作成
+        rate_index = build_rate_index(comparison_df)
+        report(len(comparison_df), len(comparison_df))
+
+        return {
+            'previous_df': previous_df,
+            'previous_comment': previous_comment,
+            'current_df': current_df,
+            'current_comment': current_comment,
+            'comparison_df': comparison_df,
+            'rate_index': rate_index,
+            'quality_df': quality_df,
+            'quality_stats': quality_stats,
+        }
+
+    except Exception as e:
+        raise ValueError(f"データ処理中にエラーが発生しました: {str(e)}")
+
+
+def select_abnormal(comparison_df, threshold=20, detector='threshold', group_by='railroad',
+                    score_threshold=3.5, bands=None):
+    """
+    検出方法に応じて異常値を抽出（異常値シート・プレビュー共通）
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        threshold, detector, group_by, score_threshold, bands: 形式は process_excel_files() を参照
+
+    Returns:
+        DataFrame: 異常値のデータ
+    """
+    if detector == 'threshold':
+        return extract_abnormal_values(comparison_df, threshold=threshold, bands=bands)
+    return extract_statistical_outliers(
+        comparison_df,
+        group_by=group_by,
+        method=detector,
+        score_threshold=score_threshold
+    )
+
+
+def build_output(prepared, threshold=20, progress_callback=None,
+                 detector='threshold', group_by='railroad', score_threshold=3.5,
+                 bands=None, band_sheets=False, summary_sheet=False, top_movers=0,
+                 delta_tolerance=None, source_sheets=True,
+                 output_format='xlsx', compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 quality_sheet=True, abnormal_df=None):
+    """
+    照合結果から異常値を抽出し、4シートのExcelファイルを生成
+
+    照合結果（prepared）のDataFrameは変更しないため、同じ照合結果から
+    基準値を変えて何度でも出力できます。
+
+    Args:
+        prepared: prepare_comparison() の戻り値
+        threshold: 異常値の基準（デフォルト: 20%、路線・市区町村別の閾値テーブルも指定可能）
+        progress_callback: 進捗イベントの通知先（オプション、形式は process_excel_files() を参照）
+        detector: 異常値の検出方法（形式は process_excel_files() を参照）
+        group_by: 統計的検出のグループ化カラム
+        score_threshold: 統計的検出の偏差スコアの閾値
+        bands: 段階別の基準値のリスト（形式は process_excel_files() を参照）
+        band_sheets: 段階別の区分ごとのシートを追加するか
+        summary_sheet: 路線別・市区町村別の集計シートを追加するか
+        top_movers: 上位変動シートに抽出する件数（0の場合はシートを追加しない）
+        delta_tolerance: 差分出力の許容範囲（%、Noneの場合は比較データを全行出力）
+        source_sheets: 前回データ・今回データのシートを出力するか
+        output_format: 出力形式（形式は process_excel_files() を参照）
+        compression_level: zipバンドルの圧縮レベル
+        quality_sheet: データ品質シートを追加するか
+        abnormal_df: 抽出済みの異常値データ（省略時は select_abnormal() で抽出）
+
+    Returns:
+        tuple: (出力ファイルのBytesIO, 処理統計dict)
+
+    Raises:
+        ValueError: 処理エラー
+    """
+    try:
+        previous_df = prepared['previous_df']
+        current_df = prepared['current_df']
+        comparison_df = prepared['comparison_df']
+
+        # 5. 異常値シートの作成（ユーザー指定の閾値・検出方法を使用）
+        report = _stage_reporter(progress_callback, BUILD_STAGES, 'abnormal')
+        report(0, len(comparison_df))
+        if abnormal_df is None:
+            abnormal_df = select_abnormal(
+                comparison_df,
+                threshold=threshold,
+                detector=detector,
+                group_by=group_by,
+                score_threshold=score_threshold,
+                bands=bands
+            )
 
         # 6. 前回データの備考行を作成（各列に個別のテキストを設定）
         previous_comment_dict = {
-            'A1': previous_comment,  # 元の備考行
+            'A1': prepared['previous_comment'],  # 元の備考行
             'F1': '新築換算坪単価',
             'G1': '新築坪単価',
             'H1': '成約中古坪単価',
@@ -104,7 +376,7 @@ def process_excel_files(previous_file, current_file, threshold=20):
 
         # 6. 今回データの備考行を作成（各列に個別のテキストを設定）
         current_comment_dict = {
-            'A1': current_comment,  # 元の備考行
+            'A1': prepared['current_comment'],  # 元の備考行
             'F1': '新築換算坪単価',
             'G1': '新築坪単価',
             'H1': '成約中古坪単価',
@@ -114,25 +386,99 @@ def process_excel_files(previous_file, current_file, threshold=20):
 
         # 7. 比較データの備考行を作成
         today = datetime.now().strftime('%Y年%m月%d日')
-        comparison_comment = f"前回データと今回データの比較（{today}処理）"
+        if delta_tolerance is None:
+            output_comparison_df = comparison_df
+            comparison_comment = f"前回データと今回データの比較（{today}処理）"
+        else:
+            # 差分出力: 異常値・集計は全行から求め、比較データシートには変化した行だけを書き込む
+            output_comparison_df = extract_changed_rows(comparison_df, tolerance=delta_tolerance)
+            comparison_comment = (
+                f"前回データと今回データの比較（価格の変化が±{delta_tolerance:g}%を超える行・"
+                f"片方のみの行、全{len(comparison_df):,}行中{len(output_comparison_df):,}行、{today}処理）"
+            )
 
         # 8. 異常値シートの備考行を作成
-        abnormal_comment = f"値上げ率±{threshold}%以上の異常値データ（{today}処理）"
-
-        # 9. Excelファイル生成（4シート）
-        output = write_excel_with_sheets(
-            previous_df, previous_comment_dict,
-            current_df, current_comment_dict,
-            comparison_df, comparison_comment,
-            abnormal_df, abnormal_comment
-        )
+        extra_sheets = []
+        if quality_sheet:
+            extra_sheets.append((
+                QUALITY_SHEET_NAME,
+                prepared['quality_df'],
+                f"データ品質チェック: {describe_quality(prepared['quality_stats'])}（{today}処理）",
+                None,
+            ))
+
+        if summary_sheet:
+            extra_sheets.append((
+                SUMMARY_SHEET_NAME,
+                build_summary(comparison_df, abnormal_df),
+                f"路線別・市区町村別の集計（値上げ率の区間別件数を含む、{today}処理）",
+                None,
+            ))
+
+        if top_movers > 0:
+            extra_sheets.append((
+                TOP_MOVERS_SHEET_NAME,
+                build_top_movers(comparison_df, n=top_movers),
+                f"値上げ率の上位・下位{top_movers}件（全体・路線別、{today}処理）",
+                None,
+            ))
+
+        if detector == 'threshold' and bands is not None:
+            edges = normalize_band_edges(bands)
+            abnormal_comment = (
+                f"値上げ率±{edges[0]:g}%以上の異常値データ"
+                f"（区分: {' / '.join(f'{edge:g}%' for edge in edges)}、{today}処理）"
+            )
+            if band_sheets:
+                extra_sheets += [
+                    (f"異常値_{label}", band_df, f"値上げ率{label}の異常値データ（{today}処理）",
+                     COMPARISON_HEADER_FILLS)
+                    for label, band_df in split_abnormal_bands(abnormal_df, edges)
+                ]
+        elif detector == 'threshold':
+            abnormal_comment = f"値上げ率{describe_threshold(threshold)}以上の異常値データ（{today}処理）"
+        else:
+            abnormal_comment = (
+                f"{group_by}ごとの{DETECTION_METHODS[detector]}から偏差スコア±{score_threshold}以上"
+                f"外れている異常値データ（{today}処理）"
+            )
+
+        write_progress = _stage_reporter(progress_callback, BUILD_STAGES, 'write')
+        if output_format == 'xlsx':
+            # 9. Excelファイル生成（4シート、前回・今回データを省略する場合は2シート）
+            output = write_excel_with_sheets(
+                previous_df if source_sheets else None, previous_comment_dict,
+                current_df if source_sheets else None, current_comment_dict,
+                output_comparison_df, comparison_comment,
+                abnormal_df, abnormal_comment,
+                progress_callback=write_progress,
+                extra_sheets=extra_sheets
+            )
+        else:
+            # 9. zipバンドル生成（Excelと同じシート構成を1シート1ファイルで格納）
+            sheets = []
+            if source_sheets:
+                sheets.append(('前回データ', previous_df, previous_comment_dict))
+                sheets.append(('今回データ', current_df, current_comment_dict))
+            sheets.append(('比較データ', output_comparison_df, comparison_comment))
+            sheets.append(('異常値シート', abnormal_df, abnormal_comment))
+            sheets.extend((name, df, comment) for name, df, comment, _ in extra_sheets)
+            output = write_bundle(
+                sheets,
+                output_format=output_format,
+                compression_level=compression_level,
+                progress_callback=write_progress
+            )
 
         # 10. 統計情報
         stats = {
             'previous_rows': len(previous_df),
             'current_rows': len(current_df),
             'comparison_rows': len(comparison_df),
+            'output_comparison_rows': len(output_comparison_df),
             'abnormal_rows': len(abnormal_df),
+            'output_format': output_format,
+            'quality': prepared['quality_stats'],
             'processed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
@@ -140,3 +486,97 @@ def process_excel_files(previous_file, current_file, threshold=20):
 
     except Exception as e:
         raise ValueError(f"データ処理中にエラーが発生しました: {str(e)}")
+
+
+def process_excel_files(previous_file, current_file, threshold=20, progress_callback=None,
+                        detector='threshold', group_by='railroad', score_threshold=3.5,
+                        bands=None, band_sheets=False, summary_sheet=False, top_movers=0,
+                        delta_tolerance=None, source_sheets=True,
+                        output_format='xlsx', compression_level=DEFAULT_COMPRESSION_LEVEL,
+                        quality_sheet=True, workers=None, shard_by='railroad', cache_dir=None,
+                        use_cache=True):
+    """
+    Excelファイルを処理して4シート出力を生成
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+        threshold: 異常値の基準（デフォルト: 20%、路線・市区町村別の閾値テーブルも指定可能）
+        progress_callback: 進捗イベントの通知先（オプション）
+            各ステージの進捗ごとに以下のdictを引数として呼び出される
+            {'stage': ステージ名, 'label': 表示名, 'done': 処理済み数,
+             'total': 全体数, 'unit': '行' or 'バイト', 'fraction': 全体の進捗率}
+        detector: 異常値の検出方法（デフォルト: 'threshold'）
+            'threshold': 値上げ率が±threshold%以上
+            'mad' / 'zscore': group_by ごとの統計から外れている行（偏差スコアで判定）
+        group_by: 統計的検出のグループ化カラム（'railroad' or 'cityid'）
+        score_threshold: 統計的検出の偏差スコアの閾値（デフォルト: 3.5）
+        bands: 段階別の基準値のリスト（例: [10, 20, 50]、オプション）
+            指定した場合は threshold の代わりに使用し、異常値シートに「異常値区分」列を追加する
+        band_sheets: 段階別の区分ごとのシート（例: 「異常値_±50%以上」）を追加するか（デフォルト: False）
+        summary_sheet: 路線別・市区町村別の集計シート（「集計」）を追加するか（デフォルト: False）
+        top_movers: 値上げ率の上位・下位N件（全体・路線別）を抽出した「上位変動」シートの件数
+            （デフォルト: 0 = シートを追加しない）
+        delta_tolerance: 差分出力の許容範囲（%、デフォルト: None = 比較データを全行出力）
+            指定した場合、比較データシートには価格の変化が±delta_tolerance%を超える行と
+            片方の期間にしかない行だけを書き込む
+        source_sheets: 前回データ・今回データのシートを出力するか（デフォルト: True）
+        output_format: 出力形式（デフォルト: 'xlsx'）
+            'xlsx': シートごとのExcelファイル
+            'csv' / 'csv.gz' / 'parquet': シートごとのファイルと備考行の metadata.json を格納したzip
+        compression_level: zipバンドルの圧縮レベル（1〜9、デフォルト: 6）
+        quality_sheet: 入力データの数値以外の値・ゼロ・負の値・キー欠損の位置を一覧にした
+            「データ品質」シートを追加するか（デフォルト: True）
+        workers: 今回データの計算〜比較データの計算を並列に実行するプロセス数
+            （デフォルト: 環境変数 EXCEL_APP_SHARD_WORKERS、1以下の場合は分割しない）
+        shard_by: 並列処理の分割の単位（'railroad': 路線 or 'city_prefix': 市区町村コードの上2桁）
+        cache_dir: ステージ結果を保存するディレクトリ（デフォルト: 環境変数 EXCEL_APP_STAGE_CACHE_DIR、
+            空の場合はメモリ上のキャッシュのみ）
+        use_cache: False の場合はステージ結果のキャッシュを使わずに全ステージを実行（プロファイル取得用）
+
+    Returns:
+        tuple: (出力ファイルのBytesIO, 処理統計dict)
+            処理統計にはステージごとのキャッシュ使用・所要時間（stages, stage_cache_hits）、
+            最大メモリ使用量（peak_rss_bytes, peak_rss_increase_bytes）を含む
+
+    Raises:
+        ValueError: 処理エラー
+    """
+    started_at = time.perf_counter()
+    try:
+        # ステージごとの結果をキャッシュし、入力・設定が変わったステージ以降だけを実行（modules.pipeline）
+        with track_peak_memory() as memory:
+            output, stats = run_pipeline(
+                previous_file,
+                current_file,
+                threshold=threshold,
+                progress_callback=progress_callback,
+                workers=workers,
+                shard_by=shard_by,
+                cache_dir=cache_dir,
+                use_cache=use_cache,
+                detector=detector,
+                group_by=group_by,
+                score_threshold=score_threshold,
+                bands=bands,
+                band_sheets=band_sheets,
+                summary_sheet=summary_sheet,
+                top_movers=top_movers,
+                delta_tolerance=delta_tolerance,
+                source_sheets=source_sheets,
+                output_format=output_format,
+                compression_level=compression_level,
+                quality_sheet=quality_sheet
+            )
+    except ValueError as e:
+        record_run(build_run_record(seconds=time.perf_counter() - started_at, error=str(e)))
+        raise
+
+    # 入力ファイルの読み込みを含む処理全体の最大メモリ使用量（utils.upload_buffer）
+    stats = dict(stats, **memory)
+
+    # 実行回数・所要時間・データ量をメトリクスとして記録（utils.metrics）
+    record_run(build_run_record(
+        stats, seconds=time.perf_counter() - started_at, output_bytes=output.getbuffer().nbytes
+    ))
+    return output, stats
@@ -0,0 +1,144 @@
+"""
+データ品質チェックモジュール
+
+このモジュールは、入力データの品質チェック（データ品質シート）を担当します。
+- 価格列（F〜H列）の数値以外の値・ゼロ・負の値を検出し、件数と位置（行番号）を集計
+- キー列（stationid, railroad）の欠損を検出
+- 判定は列ごとの一括変換とマスクで行う（行ごとのPythonループなし）
+"""
+
+from modules.calculator import coerce_numeric
+
+# データ品質シートの名前
+QUALITY_SHEET_NAME = 'データ品質'
+
+# チェック対象の価格列
+PRICE_COLUMNS = ['priceunitconvnewly', 'priceunitnewly', 'priceunitusedsigned']
+
+# 欠損をチェックするキー列
+KEY_COLUMNS = ['stationid', 'railroad']
+
+# 問題の種類ごとの表示名
+ISSUE_LABELS = {
+    'invalid': '数値以外',
+    'zero': 'ゼロ',
+    'negative': '負の値',
+    'missing_key': 'キー欠損',
+}
+
+# 出力シート上の行番号 = データの位置 + この値（1行目: 備考行、2行目: ヘッダー行）
+SHEET_ROW_OFFSET = 3
+
+
+def _blank_mask(raw):
+    """
+    空欄（NaN・空文字・空白のみ）のマスクを作成
+    """
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(raw):
+        return raw.isna().to_numpy()
+    return (raw.isna() | (raw.astype(str).str.strip() == '')).to_numpy()
+
+
+def _issue_masks(df):
+    """
+    列ごとの問題のマスクを作成
+
+    Returns:
+        tuple: ((列名, 問題の種類, マスクのndarray) のリスト, 価格列ごとの空欄件数dict)
+    """
+    masks = []
+    blank_counts = {}
+
+    for column in PRICE_COLUMNS:
+        if column not in df.columns:
+            continue
+        raw = df[column]
+        numeric = coerce_numeric(raw)
+        is_blank = _blank_mask(raw)
+        values = numeric.to_numpy(dtype='float64')
+
+        blank_counts[column] = int(is_blank.sum())
+        masks.append((column, 'invalid', numeric.isna().to_numpy() & ~is_blank))
+        masks.append((column, 'zero', values == 0))
+        masks.append((column, 'negative', values < 0))
+
+    for column in KEY_COLUMNS:
+        if column not in df.columns:
+            continue
+        masks.append((column, 'missing_key', _blank_mask(df[column])))
+
+    return masks, blank_counts
+
+
+def check_data_quality(datasets):
+    """
+    入力データの品質をチェック
+
+    Args:
+        datasets: (データ名, DataFrame) のリスト（例: [('前回データ', df), ('今回データ', df)]）
+
+    Returns:
+        tuple: (問題のあるセルのDataFrame, 集計dict)
+            DataFrameの列: データ, 行番号（出力シート上の行）, stationid, railroad, 列, 問題, 値
+            集計dict: {'invalid': 件数, 'zero': 件数, 'negative': 件数, 'missing_key': 件数,
+                       'blank': 価格列の空欄件数, 'total': 問題の合計件数,
+                       'by_column': [{'data': データ名, 'column': 列名, 'issue': 問題の種類, 'count': 件数}, ...]}
+    """
+    import numpy as np
+    import pandas as pd
+
+    stats = {issue: 0 for issue in ISSUE_LABELS}
+    stats['blank'] = 0
+    stats['by_column'] = []
+    pieces = []
+
+    for dataset_name, df in datasets:
+        masks, blank_counts = _issue_masks(df)
+        stats['blank'] += sum(blank_counts.values())
+
+        for column, issue, mask in masks:
+            positions = np.flatnonzero(mask)
+            if len(positions) == 0:
+                continue
+            stats[issue] += int(len(positions))
+            stats['by_column'].append(
+                {'data': dataset_name, 'column': column, 'issue': issue, 'count': int(len(positions))}
+            )
+
+            rows = df.iloc[positions]
+            pieces.append(pd.DataFrame({
+                'データ': dataset_name,
+                '行番号': positions + SHEET_ROW_OFFSET,
+                'stationid': rows['stationid'].to_numpy() if 'stationid' in df.columns else None,
+                'railroad': rows['railroad'].to_numpy() if 'railroad' in df.columns else None,
+                '列': column,
+                '問題': ISSUE_LABELS[issue],
+                '値': rows[column].astype(str).to_numpy(),
+            }))
+
+    stats['total'] = sum(stats[issue] for issue in ISSUE_LABELS)
+
+    columns = ['データ', '行番号', 'stationid', 'railroad', '列', '問題', '値']
+    if not pieces:
+        return pd.DataFrame(columns=columns), stats
+
+    # データ → 行番号の順に並べ、同じセルの問題はまとめて確認できるようにする
+    quality_df = pd.concat(pieces, ignore_index=True)
+    order = np.lexsort((quality_df['行番号'].to_numpy(), pd.factorize(quality_df['データ'])[0]))
+    return quality_df.iloc[order].reset_index(drop=True), stats
+
+
+def describe_quality(stats):
+    """
+    データ品質の集計を備考行向けの文字列にする
+
+    Args:
+        stats: check_data_quality() の集計dict
+
+    Returns:
+        str: 例 "数値以外 3件 / ゼロ 1件 / 負の値 0件 / キー欠損 0件（価格の空欄 12件）"
+    """
+    counts = ' / '.join(f"{label} {stats[issue]:,}件" for issue, label in ISSUE_LABELS.items())
+    return f"{counts}（価格の空欄 {stats['blank']:,}件）"
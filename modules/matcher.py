@@ -4,67 +4,103 @@
 このモジュールは、前回データと今回データのマッチング処理を担当します。
 - stationid + railroad でマッチングキーを生成
 - 外部結合により両方のデータを保持
-- 比較用DataFrameの作成
+- 比較用DataFrameの作成（入力のコピーや結合用の中間DataFrameは作らず、必要な列だけを取り出す）
 """
 
-import pandas as pd
+from modules.calculator import coerce_numeric
 
+# pandas は初回使用時に読み込む（起動時間短縮のため）
 
-def create_comparison_dataframe(previous_df, current_df):
+
+def build_match_keys(df):
+    """
+    マッチングキー（stationid_railroad）のIndexを作成（入力のDataFrameには列を追加しない）
+    """
+    import pandas as pd
+
+    return pd.Index(df['stationid'].astype(str) + '_' + df['railroad'].astype(str))
+
+
+def match_rows(previous_keys, current_keys, with_keys=False):
+    """
+    前回・今回のマッチングキーを外部結合し、結合後の各行に対応する行位置を求める
+
+    キーを昇順の整数コードに置き換えてから結合し、対応する行がない側の位置は -1 にする
+    （両方のデータを保持、キーの昇順）
+
+    Args:
+        previous_keys: 前回データのマッチングキー（build_match_keys() の結果）
+        current_keys: 今回データのマッチングキー
+        with_keys: True の場合、結合後の各行のマッチングキーも返す
+
+    Returns:
+        tuple: (前回データの行位置, 今回データの行位置[, 結合後の各行のキー])
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(previous_keys.append(current_keys), sort=True)
+    positions = pd.merge(
+        pd.DataFrame({'code': codes[:len(previous_keys)], 'previous': np.arange(len(previous_keys))}),
+        pd.DataFrame({'code': codes[len(previous_keys):], 'current': np.arange(len(current_keys))}),
+        on='code',
+        how='outer',
+        sort=True
+    )
+    previous_positions = positions['previous'].fillna(-1).to_numpy(dtype=np.intp)
+    current_positions = positions['current'].fillna(-1).to_numpy(dtype=np.intp)
+
+    if with_keys:
+        return previous_positions, current_positions, uniques.take(positions['code'].to_numpy())
+    return previous_positions, current_positions
+
+
+def create_comparison_dataframe(previous_df, current_df, with_keys=False):
     """
     前回データと今回データをマッチングして比較用DataFrameを作成
 
     Args:
         previous_df: 前回データ（J列を含む）
         current_df: 今回データ（J列を含む）
+        with_keys: True の場合、比較データの各行のマッチングキーも返す（分割処理の結果の並べ替え用）
 
     Returns:
         比較用DataFrame（A〜G列を含む）
+        with_keys=True の場合は (比較用DataFrame, マッチングキーのIndex)
     """
-    # 1. マッチングキーを作成
-    previous_df = previous_df.copy()
-    current_df = current_df.copy()
+    import pandas as pd
+    from pandas.api.extensions import take
 
-    previous_df['match_key'] = (
-        previous_df['stationid'].astype(str) + '_' +
-        previous_df['railroad'].astype(str)
-    )
-    current_df['match_key'] = (
-        current_df['stationid'].astype(str) + '_' +
-        current_df['railroad'].astype(str)
-    )
-
-    # 2. 必要なカラムのみ抽出
-    prev_cols = ['match_key', 'stationid', 'name', 'railroad2', 'railroad', 'cityid', '新築換算平均価格']
-    curr_cols = ['match_key', 'stationid', 'name', 'railroad2', 'railroad', 'cityid', '新築換算平均価格']
+    # 1. マッチングキーを作成
+    previous_keys = build_match_keys(previous_df)
+    current_keys = build_match_keys(current_df)
 
-    prev_subset = previous_df[prev_cols].copy()
-    curr_subset = current_df[curr_cols].copy()
+    # 2. 外部結合の行対応（行位置の配列）だけを求める
+    matched = match_rows(previous_keys, current_keys, with_keys=with_keys)
+    previous_positions, current_positions = matched[0], matched[1]
 
-    # 3. 外部結合（両方のデータを保持）
-    merged_df = pd.merge(
-        prev_subset,
-        curr_subset,
-        on='match_key',
-        how='outer',
-        suffixes=('_prev', '_curr')
-    )
+    def pick(column):
+        """
+        結合後の行順で前回・今回の列の値を取り出す（対応する行がない場合はNaN）
+        """
+        # .array のまま取り出し、文字列列（Arrow形式など）をPythonオブジェクトに変換しない
+        previous_values = pd.Series(take(previous_df[column].array, previous_positions, allow_fill=True))
+        current_values = pd.Series(take(current_df[column].array, current_positions, allow_fill=True))
+        return previous_values, current_values
 
-    # 4. カラムを整理
+    # 3. カラムを整理（必要な列だけを結合後の行順で1回ずつ取り出す）
     # 基本情報は今回データ優先、なければ前回データ
-    comparison_df = pd.DataFrame()
-    comparison_df['stationid'] = merged_df['stationid_curr'].fillna(merged_df['stationid_prev'])
-    comparison_df['name'] = merged_df['name_curr'].fillna(merged_df['name_prev'])
-    comparison_df['railroad2'] = merged_df['railroad2_curr'].fillna(merged_df['railroad2_prev'])
-    comparison_df['railroad'] = merged_df['railroad_curr'].fillna(merged_df['railroad_prev'])
-    comparison_df['cityid'] = merged_df['cityid_curr'].fillna(merged_df['cityid_prev'])
-
-    # 価格データ
-    comparison_df['前回新築換算平均価格'] = merged_df['新築換算平均価格_prev']
-    comparison_df['今回新築換算平均価格'] = merged_df['新築換算平均価格_curr']
+    comparison_df = pd.DataFrame(index=pd.RangeIndex(len(previous_positions)))
+    for column in ['stationid', 'name', 'railroad2', 'railroad', 'cityid']:
+        previous_values, current_values = pick(column)
+        comparison_df[column] = current_values.fillna(previous_values)
 
-    # 5. NaNを「データなし」に変換（価格列のみ）
-    comparison_df['前回新築換算平均価格'] = comparison_df['前回新築換算平均価格'].fillna("データなし")
-    comparison_df['今回新築換算平均価格'] = comparison_df['今回新築換算平均価格'].fillna("データなし")
+    # 価格データ（CSVの前回データでは「データなし」を含む列が文字列として読み込まれるため数値に変換）
+    # NaNは「データなし」に変換
+    previous_values, current_values = pick('新築換算平均価格')
+    comparison_df['前回新築換算平均価格'] = coerce_numeric(previous_values).fillna("データなし")
+    comparison_df['今回新築換算平均価格'] = coerce_numeric(current_values).fillna("データなし")
 
+    if with_keys:
+        return comparison_df, matched[2]
     return comparison_df
@@ -0,0 +1,339 @@
+"""
+処理パイプラインモジュール
+
+このモジュールは、process_excel_files() の処理をステージ（読み込み・計算・照合・異常値抽出・出力）に分け、
+ステージごとの結果をキャッシュして、入力や設定が変わったステージ以降だけを再実行します。
+- 各ステージのキーは、上流ステージのキー・ステージ固有の設定・コードバージョンから算出
+  （入力ファイルは内容のハッシュを使うため、同じ内容であれば別のファイルでも再利用される）
+- メモリ上のキャッシュは utils.result_cache（サイズ上限付きのLRU）を共用
+- 環境変数 EXCEL_APP_STAGE_CACHE_DIR を指定した場合は、ディスクにも保存してプロセスをまたいで再利用
+  （容量の上限を超えた分は最終使用日時の古い順に削除）
+- ステージごとのキャッシュヒット・実行時間を処理統計に含める
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from datetime import datetime
+
+from utils.result_cache import hash_file, get_code_version, get_cached_result, store_result, _freeze
+
+# ステージ結果をディスクに保存するディレクトリ（空の場合はメモリ上のキャッシュのみ）
+STAGE_CACHE_DIR = os.environ.get('EXCEL_APP_STAGE_CACHE_DIR', '')
+
+# ディスク上のステージ結果の上限バイト数（環境変数で変更可能、デフォルト: 1GB）
+MAX_DISK_CACHE_BYTES = int(os.environ.get('EXCEL_APP_STAGE_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+
+# ステージ結果のファイルの拡張子
+CACHE_FILE_SUFFIX = '.stage.pkl'
+
+_disk_lock = threading.Lock()
+
+
+def stage_key(stage, upstream_keys, params=None):
+    """
+    ステージのキャッシュキーを算出
+
+    Args:
+        stage: ステージ名
+        upstream_keys: 上流ステージのキーのリスト
+        params: ステージの結果に影響する設定
+            （閾値テーブルの (railroad, cityid) のようなタプルのキーを含むdictも指定可能）
+
+    Returns:
+        str: キャッシュキー（16進数）
+    """
+    digest = hashlib.sha256()
+    # dictはキーを文字列にして並べ替えた形に変換（json.dumps の default はdictのキーには適用されないため）
+    digest.update(json.dumps(
+        [stage, get_code_version(), list(upstream_keys), _freeze(params)],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=repr
+    ).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _value_bytes(value):
+    """
+    ステージ結果のおおよそのサイズ（バイト）
+    """
+    if isinstance(value, (tuple, list)):
+        return sum(_value_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_value_bytes(item) for item in value.values())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, 'memory_usage'):
+        return int(value.memory_usage(deep=True).sum())
+    return sys.getsizeof(value)
+
+
+def _disk_path(cache_dir, key):
+    return os.path.join(cache_dir, key + CACHE_FILE_SUFFIX)
+
+
+def _load_from_disk(cache_dir, key):
+    """
+    ディスクからステージ結果を読み込む（存在しない・壊れている場合はNone）
+    """
+    path = _disk_path(cache_dir, key)
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+        # 最近使用したものとして更新日時を更新（容量超過時の削除順に使用）
+        os.utime(path)
+        return value
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def _save_to_disk(cache_dir, key, value):
+    """
+    ステージ結果をディスクに保存し、上限を超えた分を古い順に削除
+
+    保存に失敗しても処理は続行します（次回の処理でそのステージが再実行されるだけ）。
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _disk_path(cache_dir, key)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except (OSError, pickle.PicklingError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    with _disk_lock:
+        entries = []
+        for file_name in os.listdir(cache_dir):
+            if not file_name.endswith(CACHE_FILE_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(cache_dir, file_name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total_bytes <= MAX_DISK_CACHE_BYTES:
+                break
+            try:
+                os.remove(os.path.join(cache_dir, file_name))
+            except OSError:
+                pass
+            total_bytes -= size
+
+
+def clear_disk_cache(cache_dir=None):
+    """
+    ディスク上のステージ結果を全て削除
+
+    Args:
+        cache_dir: ディレクトリ（デフォルト: 環境変数 EXCEL_APP_STAGE_CACHE_DIR）
+    """
+    cache_dir = STAGE_CACHE_DIR if cache_dir is None else cache_dir
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+    with _disk_lock:
+        for file_name in os.listdir(cache_dir):
+            if file_name.endswith(CACHE_FILE_SUFFIX):
+                os.remove(os.path.join(cache_dir, file_name))
+
+
+def _make_runner(cache_dir, stages, use_cache=True):
+    """
+    ステージを実行する関数を作成（キャッシュにあれば再利用し、なければ実行して保存）
+
+    Args:
+        cache_dir: ディスクキャッシュのディレクトリ（空の場合はメモリのみ）
+        stages: ステージごとの記録の格納先（ステージ名 -> {'cached', 'seconds'}）
+        use_cache: False の場合はキャッシュを読み書きせずに全ステージを実行
+
+    Returns:
+        function: run(stage, upstream_keys, params, compute) -> (キー, 結果)
+    """
+    def run(stage, upstream_keys, params, compute):
+        started_at = time.perf_counter()
+        key = stage_key(stage, upstream_keys, params)
+        memory_key = ('stage', stage, key)
+
+        value = get_cached_result(memory_key) if use_cache else None
+        if value is None and use_cache and cache_dir:
+            value = _load_from_disk(cache_dir, key)
+            if value is not None:
+                store_result(memory_key, value, _value_bytes(value))
+
+        cached = value is not None
+        if not cached:
+            value = compute()
+            if use_cache:
+                store_result(memory_key, value, _value_bytes(value))
+                if cache_dir:
+                    _save_to_disk(cache_dir, key, value)
+
+        stages[stage] = {'cached': cached, 'seconds': time.perf_counter() - started_at}
+        return key, value
+
+    return run
+
+
+def run_pipeline(previous_file, current_file, threshold=20, progress_callback=None,
+                 workers=None, shard_by='railroad', cache_dir=None, use_cache=True, **output_options):
+    """
+    ステージごとの結果をキャッシュしながら、ファイル読み込みから出力ファイルの生成までを実行
+
+    結果は process_excel_files() と同じです。ステージの依存関係は以下のとおりで、
+    例えば基準値だけを変えた場合は、読み込み〜比較データの計算にキャッシュを使い、
+    異常値の抽出と出力ファイルの生成だけを実行します。
+
+        read_previous, read_current → quality
+        read_current → calculate
+        read_previous, calculate → match → compare → abnormal
+        quality, compare, abnormal → write（出力オプション・処理日ごと）
+
+    並列処理（workers > 1）の場合は calculate〜compare を1つのステージ（compare）として実行します。
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+        threshold, progress_callback, workers, shard_by: 形式は process_excel_files() を参照
+        cache_dir: ステージ結果を保存するディレクトリ（デフォルト: 環境変数 EXCEL_APP_STAGE_CACHE_DIR、
+            空の場合はメモリ上のキャッシュのみ）
+        use_cache: False の場合はキャッシュを読み書きせずに全ステージを実行（プロファイル取得用）
+        **output_options: build_output() に渡すその他のオプション
+
+    Returns:
+        tuple: (出力ファイルのBytesIO, 処理統計dict)
+            処理統計には build_output() の統計に加えて、以下を含む
+            stages: ステージ名 -> {'cached': キャッシュを使用したか, 'seconds': 所要時間}
+            stage_cache_hits: キャッシュを使用したステージ数
+
+    Raises:
+        ValueError: 処理エラー
+    """
+    from io import BytesIO
+    from utils.excel_handler import read_excel_with_comment
+    from modules.calculator import calculate_j_k_l_m_columns, calculate_comparison_columns
+    from modules.matcher import create_comparison_dataframe
+    from modules.sharding import run_sharded, DEFAULT_WORKERS
+    from modules.data_quality import check_data_quality
+    from modules.data_processor import (
+        build_output, select_abnormal, _stage_reporter, _scaled_callback,
+        PREPARE_STAGES, BUILD_STAGES, PREPARE_WEIGHT
+    )
+
+    cache_dir = STAGE_CACHE_DIR if cache_dir is None else cache_dir
+    if workers is None:
+        workers = DEFAULT_WORKERS
+
+    prepare_callback = _scaled_callback(progress_callback, 0.0, PREPARE_WEIGHT)
+    build_callback = _scaled_callback(progress_callback, PREPARE_WEIGHT, 1.0 - PREPARE_WEIGHT)
+
+    def reporter(stage, unit='行'):
+        return _stage_reporter(prepare_callback, PREPARE_STAGES, stage, unit=unit)
+
+    stages = {}
+    run = _make_runner(cache_dir, stages, use_cache=use_cache)
+
+    try:
+        # 1. ファイル読み込み（キーは内容のハッシュ）
+        previous_key, (previous_df, previous_comment) = run(
+            'read_previous', [hash_file(previous_file)], None,
+            lambda: read_excel_with_comment(previous_file, progress_callback=reporter('read_previous', 'バイト'))
+        )
+        current_key, (current_df, current_comment) = run(
+            'read_current', [hash_file(current_file)], None,
+            lambda: read_excel_with_comment(current_file, progress_callback=reporter('read_current', 'バイト'))
+        )
+
+        # 2. データ品質チェック
+        quality_key, (quality_df, quality_stats) = run(
+            'quality', [previous_key, current_key], None,
+            lambda: check_data_quality([('前回データ', previous_df), ('今回データ', current_df)])
+        )
+
+        # 3〜5. 今回データの計算 → マッチング → 比較データの計算
+        # （キャッシュした上流の結果を変更しないように、列を追加する処理には浅いコピーを渡す）
+        if workers > 1:
+            # 分割して並列に実行する場合は3〜5を1つのステージとして実行（結果は分割しない場合と同じ）
+            compare_key, (calculated_df, comparison_df) = run(
+                'compare', [previous_key, current_key], {'shard_by': shard_by},
+                lambda: run_sharded(
+                    previous_df, current_df.copy(deep=False),
+                    workers=workers, shard_by=shard_by, progress_callback=reporter('match')
+                )
+            )
+        else:
+            calculate_key, calculated_df = run(
+                'calculate', [current_key], None,
+                lambda: calculate_j_k_l_m_columns(current_df.copy(deep=False))
+            )
+            match_key, matched_df = run(
+                'match', [previous_key, calculate_key], None,
+                lambda: create_comparison_dataframe(previous_df, calculated_df)
+            )
+            compare_key, comparison_df = run(
+                'compare', [match_key], None,
+                lambda: calculate_comparison_columns(matched_df.copy(deep=False))
+            )
+        reporter('compare')(len(comparison_df), len(comparison_df))
+
+        # 6. 異常値の抽出
+        abnormal_params = {
+            'threshold': threshold,
+            'detector': output_options.get('detector', 'threshold'),
+            'group_by': output_options.get('group_by', 'railroad'),
+            'score_threshold': output_options.get('score_threshold', 3.5),
+            'bands': output_options.get('bands'),
+        }
+        abnormal_key, abnormal_df = run(
+            'abnormal', [compare_key], abnormal_params,
+            lambda: select_abnormal(comparison_df, **abnormal_params)
+        )
+
+        # 7. 出力ファイルの生成（備考行に処理日が入るため、日付が変わった場合は再生成）
+        prepared = {
+            'previous_df': previous_df,
+            'previous_comment': previous_comment,
+            'current_df': calculated_df,
+            'current_comment': current_comment,
+            'comparison_df': comparison_df,
+            'quality_df': quality_df,
+            'quality_stats': quality_stats,
+        }
+
+        def write():
+            output, stats = build_output(
+                prepared, threshold=threshold, progress_callback=build_callback,
+                abnormal_df=abnormal_df, **output_options
+            )
+            return output.getvalue(), stats
+
+        _, (output_bytes, stats) = run(
+            'write',
+            [previous_key, current_key, quality_key, compare_key, abnormal_key],
+            dict(output_options, processed_on=datetime.now().strftime('%Y-%m-%d')),
+            write
+        )
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"データ処理中にエラーが発生しました: {str(e)}")
+
+    _stage_reporter(build_callback, BUILD_STAGES, 'write', unit='バイト')(len(output_bytes), len(output_bytes))
+
+    stats = dict(
+        stats,
+        processed_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        stages=stages,
+        stage_cache_hits=sum(1 for stage in stages.values() if stage['cached'])
+    )
+    return BytesIO(output_bytes), stats
@@ -0,0 +1,106 @@
+"""
+プレビューモジュール
+
+このモジュールは、出力ファイルを作成せずに比較データ・異常値シートを画面で確認するためのページ分割を担当します。
+- 表示する1ページ分の行だけを取り出す（DataFrame全体のコピーやExcel生成は行わない）
+- 列ごとの並べ替え順（行位置の配列）を1回だけ計算してキャッシュし、ページ移動では再計算しない
+- 値上げ率・価格の列は「データなし」を除いて数値として並べ替え、「データなし」は末尾に置く
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+from modules.calculator import parse_rate_column, coerce_numeric
+
+# 1ページの行数の既定値
+DEFAULT_PAGE_SIZE = 100
+
+# 「5%」形式の文字列を数値に変換して並べ替える列
+RATE_COLUMNS = ['値上げ率']
+
+# キャッシュする並べ替え順の数（DataFrame・列・昇順/降順の組み合わせごと）
+SORT_CACHE_SIZE = 16
+
+_lock = threading.Lock()
+_sort_cache = OrderedDict()  # (DataFrameのid, 列名, 昇順か) -> (DataFrameの弱参照, 行位置の配列)
+
+
+def _sort_values(series):
+    """
+    並べ替えに使う値（値上げ率・数値と「データなし」の混在列は数値、その他の混在列は文字列）
+    """
+    if series.name in RATE_COLUMNS:
+        return parse_rate_column(series)
+    if series.dtype == object:
+        has_value = series.notna() & (series != 'データなし')
+        numeric = coerce_numeric(series)
+        if numeric.notna().sum() == has_value.sum():
+            return numeric
+        # 数値と文字列が混在する列は文字列として並べ替える（型の異なる値は比較できないため）
+        return series.astype(str).where(has_value)
+    return series
+
+
+def sort_positions(df, column, ascending=True):
+    """
+    列の値で並べ替えた行位置の配列を取得（同じDataFrame・列・順序の2回目以降はキャッシュを使用）
+
+    Args:
+        df: 並べ替えるDataFrame
+        column: 並べ替えの列名
+        ascending: 昇順か（デフォルト: True）
+
+    Returns:
+        ndarray: 行位置の配列（欠損・「データなし」は末尾、同じ値は元の行順）
+    """
+    import numpy as np
+
+    key = (id(df), column, ascending)
+    with _lock:
+        cached = _sort_cache.get(key)
+        if cached is not None and cached[0]() is df:
+            _sort_cache.move_to_end(key)
+            return cached[1]
+
+    values = _sort_values(df[column]).reset_index(drop=True)
+    positions = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+    positions = positions.astype(np.intp, copy=False)
+
+    with _lock:
+        _sort_cache[key] = (weakref.ref(df), positions)
+        _sort_cache.move_to_end(key)
+        while len(_sort_cache) > SORT_CACHE_SIZE:
+            _sort_cache.popitem(last=False)
+    return positions
+
+
+def page_count(total_rows, page_size=DEFAULT_PAGE_SIZE):
+    """
+    ページ数（0行の場合も1ページ）
+    """
+    return max(1, -(-total_rows // page_size))
+
+
+def get_page(df, page, page_size=DEFAULT_PAGE_SIZE, sort_by=None, ascending=True):
+    """
+    1ページ分の行を取得
+
+    Args:
+        df: プレビューするDataFrame
+        page: ページ番号（1始まり、範囲外の場合は最初・最後のページ）
+        page_size: 1ページの行数（デフォルト: 100）
+        sort_by: 並べ替えの列名（Noneの場合は元の行順）
+        ascending: 昇順か（デフォルト: True）
+
+    Returns:
+        tuple: (1ページ分のDataFrame, ページ番号, ページ数)
+    """
+    pages = page_count(len(df), page_size)
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, len(df))
+
+    if sort_by is None:
+        return df.iloc[start:stop], page, pages
+    return df.iloc[sort_positions(df, sort_by, ascending)[start:stop]], page, pages
@@ -0,0 +1,72 @@
+"""
+値上げ率インデックスモジュール
+
+このモジュールは、異常値の基準を変えたときの件数・上位データの即時プレビューを担当します。
+- マッチング後に値上げ率の絶対値をソートした配列を1回だけ作成
+- 任意の基準値に対する異常値件数を二分探索で算出
+- 値上げ率の絶対値が大きい順の上位データを取得
+"""
+
+from modules.calculator import parse_rate_column
+
+
+def build_rate_index(comparison_df):
+    """
+    比較データから値上げ率インデックスを作成
+
+    Args:
+        comparison_df: 比較データのDataFrame（値上げ率を含む）
+
+    Returns:
+        dict: sorted_abs（値上げ率の絶対値の昇順配列、「データなし」を除く）,
+              order（比較データの行位置を値上げ率の絶対値の降順に並べた配列、同値は元の行順）
+    """
+    import numpy as np
+
+    abs_rate = parse_rate_column(comparison_df['値上げ率']).abs().to_numpy()
+    valid_positions = np.flatnonzero(~np.isnan(abs_rate))
+    valid_abs = abs_rate[valid_positions]
+
+    # 件数算出用は絶対値の昇順、上位データ用は絶対値の降順（同値は元の行順）
+    ascending = np.argsort(valid_abs, kind='stable')
+    descending = np.lexsort((valid_positions, -valid_abs))
+
+    return {
+        'sorted_abs': valid_abs[ascending],
+        'order': valid_positions[descending],
+    }
+
+
+def count_abnormal(rate_index, threshold):
+    """
+    値上げ率が±threshold%以上の件数を二分探索で算出
+
+    Args:
+        rate_index: build_rate_index() の戻り値
+        threshold: 異常値の基準（%）
+
+    Returns:
+        int: 異常値の件数
+    """
+    import numpy as np
+
+    sorted_abs = rate_index['sorted_abs']
+    return int(len(sorted_abs) - np.searchsorted(sorted_abs, threshold, side='left'))
+
+
+def preview_abnormal(rate_index, comparison_df, threshold, limit=10):
+    """
+    値上げ率が±threshold%以上のデータのうち、絶対値の大きい上位を取得
+
+    Args:
+        rate_index: build_rate_index() の戻り値
+        comparison_df: インデックス作成元の比較データ
+        threshold: 異常値の基準（%）
+        limit: 取得する最大行数（デフォルト: 10）
+
+    Returns:
+        tuple: (異常値の件数, 上位データのDataFrame)
+    """
+    count = count_abnormal(rate_index, threshold)
+    top_positions = rate_index['order'][:min(count, limit)]
+    return count, comparison_df.iloc[top_positions]
@@ -0,0 +1,229 @@
+"""
+分割並列処理モジュール
+
+このモジュールは、全国規模のデータ向けに、今回データの計算（J〜M列）から
+マッチング・比較データの計算（H, I列）までを路線（または市区町村コードの上2桁）ごとに
+分割し、プロセスプールで並列に実行します。
+- マッチングキーが同じ行は必ず同じ分割に入れる（分割しても照合結果は変わらない）
+- 行数が均等になるように路線などのグループを分割にまとめる
+- ワーカーは常駐のプロセスプール（utils.worker_pool、ウォームアップ済み）を使用
+- 入力データは共有メモリに1回だけ配置し、各ワーカーには分割の行位置だけを渡す（DataFrameをpickleしない）
+- 分割ごとの結果を連結し、分割しない場合と同じ行順・値に戻す
+"""
+
+import os
+
+from modules.calculator import calculate_j_k_l_m_columns, calculate_comparison_columns
+from modules.matcher import build_match_keys, create_comparison_dataframe
+from utils.shared_frames import share_frame, attach_frame, release_blocks
+from utils.worker_pool import get_process_pool
+
+# 並列処理のプロセス数（1以下の場合は分割しない）
+DEFAULT_WORKERS = int(os.environ.get('EXCEL_APP_SHARD_WORKERS', 1))
+
+# 分割の単位
+SHARD_KEYS = {
+    'railroad': '路線',
+    'city_prefix': '市区町村コードの上2桁（都道府県）',
+}
+
+# 1プロセスあたりの分割数（大きな路線があっても各プロセスの処理量を揃えやすくする）
+SHARDS_PER_WORKER = 2
+
+# これより少ない行数（前回 + 今回）ではプロセス起動・転送の負荷の方が大きいため分割しない
+MIN_SHARDED_ROWS = 50000
+
+
+def _group_labels(df, shard_by):
+    """
+    各行のグループ（路線 or 市区町村コードの上2桁）を文字列のSeriesで返す
+    """
+    if shard_by == 'railroad':
+        return df['railroad'].astype(str)
+    return df['cityid'].astype(str).str[:2]
+
+
+def assign_shards(previous_df, current_df, shard_count, shard_by='railroad'):
+    """
+    前回・今回データの各行を分割に割り当てる
+
+    マッチングキー（stationid + railroad）が同じ行は同じ分割に入れます。
+    shard_by='city_prefix' の場合、キーのグループは今回データの（同じキーの最初の行の）市区町村コードを優先し、
+    今回データにないキーは前回データの市区町村コードで決めます。
+
+    Args:
+        previous_df: 前回データ
+        current_df: 今回データ
+        shard_count: 分割数
+        shard_by: 分割の単位（'railroad' or 'city_prefix'）
+
+    Returns:
+        tuple: (前回データの各行の分割番号, 今回データの各行の分割番号)（ndarray）
+
+    Raises:
+        ValueError: 分割の単位が不正な場合
+    """
+    import numpy as np
+    import pandas as pd
+
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"分割の単位が不正です: {shard_by}")
+
+    current_labels = _group_labels(current_df, shard_by)
+    previous_labels = _group_labels(previous_df, shard_by)
+
+    if shard_by != 'railroad':
+        # マッチングキーごとのグループを今回データ優先で1つに決める（路線はキーに含まれるため不要）
+        previous_keys = build_match_keys(previous_df)
+        current_keys = build_match_keys(current_df)
+        label_by_key = pd.Series(
+            np.concatenate([current_labels.to_numpy(), previous_labels.to_numpy()]),
+            index=current_keys.append(previous_keys)
+        )
+        label_by_key = label_by_key[~label_by_key.index.duplicated()]
+        previous_labels = pd.Series(label_by_key.reindex(previous_keys).to_numpy())
+        current_labels = pd.Series(label_by_key.reindex(current_keys).to_numpy())
+
+    # グループを行数の多い順に、その時点で最も行数の少ない分割へ入れる
+    codes, groups = pd.factorize(pd.concat([previous_labels, current_labels], ignore_index=True))
+    group_rows = np.bincount(codes, minlength=len(groups))
+    shard_rows = np.zeros(min(shard_count, len(groups)) or 1, dtype=np.int64)
+    group_shards = np.zeros(len(groups), dtype=np.intp)
+    for group in np.argsort(-group_rows, kind='stable'):
+        shard = int(np.argmin(shard_rows))
+        group_shards[group] = shard
+        shard_rows[shard] += group_rows[group]
+
+    row_shards = group_shards[codes]
+    return row_shards[:len(previous_df)], row_shards[len(previous_df):]
+
+
+def process_shard(previous_df, current_df):
+    """
+    1つの分割について、今回データの計算・マッチング・比較データの計算を実行（ワーカープロセスで実行）
+
+    Returns:
+        tuple: (J〜M列の計算後の今回データ, 比較データ, 比較データの各行のマッチングキー)
+    """
+    current_df = calculate_j_k_l_m_columns(current_df)
+    comparison_df, keys = create_comparison_dataframe(previous_df, current_df, with_keys=True)
+    comparison_df = calculate_comparison_columns(comparison_df)
+    return current_df, comparison_df, keys
+
+
+def process_shared_shard(previous_handle, current_handle, previous_positions, current_positions):
+    """
+    共有メモリ上の入力データから分割の行を取り出して process_shard() を実行（ワーカープロセスで実行）
+    """
+    previous_df, _ = attach_frame(previous_handle, previous_positions)
+    current_df, _ = attach_frame(current_handle, current_positions)
+    return process_shard(previous_df, current_df)
+
+
+def run_sharded(previous_df, current_df, workers=None, shard_by='railroad', progress_callback=None):
+    """
+    今回データの計算からマッチング・比較データの計算までを分割して並列に実行
+
+    分割しない場合（calculate_j_k_l_m_columns → create_comparison_dataframe →
+    calculate_comparison_columns）と同じ結果を返します。
+
+    Args:
+        previous_df: 前回データ
+        current_df: 今回データ（J〜M列は未計算）
+        workers: 同時に実行する分割の数（デフォルト: 環境変数 EXCEL_APP_SHARD_WORKERS、1以下の場合は分割しない）
+            常駐のプロセスプール（utils.worker_pool）は他のジョブと共有し、作り直さない
+        shard_by: 分割の単位（'railroad' or 'city_prefix'）
+        progress_callback: 進捗の通知先（オプション）
+            callback(処理済み行数, 全体行数) の形式で分割の完了ごとに呼び出される
+
+    Returns:
+        tuple: (J〜M列の計算後の今回データ, H, I列の計算後の比較データ)
+
+    Raises:
+        ValueError: 分割の単位が不正な場合
+    """
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    total_rows = len(previous_df) + len(current_df)
+
+    if workers <= 1 or total_rows < MIN_SHARDED_ROWS or len(current_df) == 0:
+        current_df, comparison_df, _ = process_shard(previous_df, current_df)
+        if progress_callback is not None:
+            progress_callback(total_rows, total_rows)
+        return current_df, comparison_df
+
+    previous_shards, current_shards = assign_shards(
+        previous_df, current_df, workers * SHARDS_PER_WORKER, shard_by=shard_by
+    )
+
+    # 入力データを共有メモリに配置（共有メモリが使えない環境では分割ごとにDataFrameを渡す）
+    handles, blocks = [], []
+    try:
+        for df in (previous_df, current_df):
+            handle, frame_blocks = share_frame(df)
+            handles.append(handle)
+            blocks.extend(frame_blocks)
+    except OSError:
+        release_blocks(blocks, unlink=True)
+        handles, blocks = [], []
+
+    results = {}
+    done_rows = 0
+    futures = {}
+    executor = get_process_pool()
+    pending_shards = list(np.unique(np.concatenate([previous_shards, current_shards])))
+
+    def submit_next():
+        shard = pending_shards.pop(0)
+        previous_positions = np.flatnonzero(previous_shards == shard)
+        current_positions = np.flatnonzero(current_shards == shard)
+        if handles:
+            future = executor.submit(
+                process_shared_shard, *handles, previous_positions, current_positions
+            )
+        else:
+            future = executor.submit(
+                process_shard, previous_df.iloc[previous_positions], current_df.iloc[current_positions]
+            )
+        futures[future] = (shard, current_positions, len(previous_positions) + len(current_positions))
+        return future
+
+    try:
+        # 共有のプロセスプールで同時に実行する分割は workers 個まで（他のジョブと並列数を分け合う）
+        running = set()
+        while pending_shards or running:
+            while pending_shards and len(running) < workers:
+                running.add(submit_next())
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard, current_positions, shard_rows = futures[future]
+                results[shard] = (current_positions, future.result())
+                done_rows += shard_rows
+                if progress_callback is not None:
+                    progress_callback(done_rows, total_rows)
+    finally:
+        # エラー時は未実行の分割を取り消し、実行中の分割が終わってから共有メモリを解放する
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        release_blocks(blocks, unlink=True)
+
+    shards = [results[shard] for shard in sorted(results)]
+
+    # 今回データ: 分割前の行順に戻す（今回データの行がない分割は列の型が変わらないように除く）
+    current_shards = [(positions, result) for positions, result in shards if len(positions)]
+    current_positions = np.concatenate([positions for positions, _ in current_shards])
+    calculated_df = pd.concat([result[0] for _, result in current_shards])
+    calculated_df = calculated_df.iloc[np.argsort(current_positions, kind='stable')]
+
+    # 比較データ: マッチングキーの昇順に並べる（同じキーの行は同じ分割内で順序が保たれている）
+    comparison_df = pd.concat([result[1] for _, result in shards], ignore_index=True)
+    keys = shards[0][1][2].append([result[2] for _, result in shards[1:]])
+    key_codes, _ = pd.factorize(keys, sort=True)
+    comparison_df = comparison_df.iloc[np.argsort(key_codes, kind='stable')].reset_index(drop=True)
+
+    return calculated_df, comparison_df
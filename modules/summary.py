@@ -0,0 +1,207 @@
+"""
+集計モジュール
+
+このモジュールは、比較データの路線別・市区町村別の集計（集計シート）を担当します。
+- 件数、マッチ件数、前回・今回の新築換算平均価格の平均/中央値、平均値上げ率、異常値件数
+- 値上げ率の分布（ヒストグラム）
+- 集計値はすべて1回の groupby().agg() でまとめて計算（グループごとのループなし）
+- 値上げ率の上位・下位N件（全体・路線別）を部分選択（argpartition）で抽出（上位変動シート）
+"""
+
+from modules.calculator import parse_rate_column
+from modules.anomaly_detector import normalize_cityid
+
+# 集計シートの名前
+SUMMARY_SHEET_NAME = '集計'
+
+# 値上げ率のヒストグラムの区切り（%）
+RATE_HISTOGRAM_EDGES = [-50, -20, -10, 0, 10, 20, 50]
+
+# 上位変動シートの名前
+TOP_MOVERS_SHEET_NAME = '上位変動'
+
+# 集計単位ごとの表示名
+SUMMARY_GROUPS = {
+    'railroad': '路線',
+    'cityid': '市区町村',
+}
+
+
+def histogram_labels(edges):
+    """
+    ヒストグラムの各区間の表示名を作成
+
+    Args:
+        edges: 区切りの値（昇順）
+
+    Returns:
+        list: 区間の表示名（例: ['-50%未満', '-50〜-20%', ..., '50%以上']）
+    """
+    labels = [f"{edges[0]:g}%未満"]
+    labels += [f"{lower:g}〜{upper:g}%" for lower, upper in zip(edges, edges[1:])]
+    labels.append(f"{edges[-1]:g}%以上")
+    return labels
+
+
+def build_summary(comparison_df, abnormal_df=None, edges=None):
+    """
+    比較データを路線別・市区町村別に集計
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        abnormal_df: 異常値シートのDataFrame（オプション、比較データの行を抽出したもの）
+            指定した場合は各グループに含まれる異常値の件数を集計する
+        edges: 値上げ率のヒストグラムの区切り（デフォルト: RATE_HISTOGRAM_EDGES）
+
+    Returns:
+        DataFrame: 集計結果（路線別の行の後に市区町村別の行が続く）
+    """
+    import numpy as np
+    import pandas as pd
+
+    edges = RATE_HISTOGRAM_EDGES if edges is None else edges
+
+    previous_price = pd.to_numeric(comparison_df['前回新築換算平均価格'], errors='coerce').to_numpy()
+    current_price = pd.to_numeric(comparison_df['今回新築換算平均価格'], errors='coerce').to_numpy()
+    rate = parse_rate_column(comparison_df['値上げ率']).to_numpy()
+
+    if abnormal_df is None:
+        is_abnormal = np.zeros(len(comparison_df), dtype=bool)
+    else:
+        is_abnormal = comparison_df.index.isin(abnormal_df.index)
+
+    # 集計対象の列を1つのDataFrameにまとめる（ヒストグラムは区間ごとの0/1列）
+    values = pd.DataFrame({
+        '前回': previous_price,
+        '今回': current_price,
+        '値上げ率': rate,
+        'マッチ': ~np.isnan(previous_price) & ~np.isnan(current_price),
+        '異常値': is_abnormal,
+    })
+    bins = np.digitize(rate, edges)
+    bins[np.isnan(rate)] = -1
+    labels = histogram_labels(edges)
+    for i, label in enumerate(labels):
+        values[label] = bins == i
+
+    aggregations = {
+        '件数': ('前回', 'size'),
+        'マッチ件数': ('マッチ', 'sum'),
+        '前回新築換算平均価格（平均）': ('前回', 'mean'),
+        '前回新築換算平均価格（中央値）': ('前回', 'median'),
+        '今回新築換算平均価格（平均）': ('今回', 'mean'),
+        '今回新築換算平均価格（中央値）': ('今回', 'median'),
+        '平均値上げ率': ('値上げ率', 'mean'),
+        '異常値件数': ('異常値', 'sum'),
+    }
+    aggregations.update({label: (label, 'sum') for label in labels})
+
+    # cityidは種類ごとに1回だけ正規化し、各行には正規化後の値を割り当てる
+    city_codes, city_uniques = pd.factorize(comparison_df['cityid'])
+    normalized_cities = normalize_cityid(pd.Series(city_uniques, dtype=object)).to_numpy()
+    # 欠損（コード -1）の行はNoneのまま（全て欠損の場合は正規化後の値が空のため、有効な位置だけを参照する）
+    city_keys = np.full(len(city_codes), None, dtype=object)
+    valid_cities = city_codes >= 0
+    city_keys[valid_cities] = normalized_cities[city_codes[valid_cities]]
+
+    group_keys = {
+        'railroad': comparison_df['railroad'].to_numpy(),
+        'cityid': city_keys,
+    }
+
+    tables = []
+    for group_by, keys in group_keys.items():
+        table = values.groupby(keys, dropna=False).agg(**aggregations)
+        table.insert(0, 'キー', table.index.to_series().fillna('データなし').to_numpy())
+        table.insert(0, '集計単位', SUMMARY_GROUPS[group_by])
+        tables.append(table)
+
+    summary_df = pd.concat(tables, ignore_index=True)
+
+    # 価格は円単位、値上げ率は小数第1位に丸める
+    price_columns = [name for name in aggregations if name.startswith(('前回', '今回'))]
+    summary_df[price_columns] = summary_df[price_columns].round(0)
+    summary_df['平均値上げ率'] = summary_df['平均値上げ率'].round(1)
+
+    count_columns = ['マッチ件数', '異常値件数'] + labels
+    summary_df[count_columns] = summary_df[count_columns].astype('int64')
+
+    return summary_df
+
+
+def select_top_positions(values, n):
+    """
+    値の大きい上位n件の位置を部分選択で取得
+
+    全体をソートせず np.argpartition で上位n件を選んでから、その n 件だけを並べ替えます。
+
+    Args:
+        values: 数値のndarray（NaNを含まないこと）
+        n: 取得する件数
+
+    Returns:
+        ndarray: 値の降順（同値は位置の昇順）に並べた位置
+    """
+    import numpy as np
+
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if n >= len(values):
+        candidates = np.arange(len(values))
+    else:
+        candidates = np.argpartition(-values, n - 1)[:n]
+    return candidates[np.lexsort((candidates, -values[candidates]))]
+
+
+def build_top_movers(comparison_df, n=20, by_railroad=True):
+    """
+    値上げ率の上位・下位N件を全体と路線別に抽出
+
+    Args:
+        comparison_df: 比較データのDataFrame
+        n: 各区分で抽出する件数（デフォルト: 20）
+        by_railroad: 路線別の上位・下位も抽出するか（デフォルト: True）
+
+    Returns:
+        DataFrame: 区分・路線・方向・順位の列を先頭に追加した比較データの行
+                   （全体の上昇→下落、続いて路線ごとの上昇→下落の順）
+    """
+    import numpy as np
+    import pandas as pd
+
+    rate = parse_rate_column(comparison_df['値上げ率']).to_numpy()
+    valid = np.flatnonzero(~np.isnan(rate))
+    valid_rate = rate[valid]
+
+    # (区分, 路線, 方向, 比較データの行位置) のリスト
+    sections = [
+        ('全体', '全体', '上昇', valid[select_top_positions(valid_rate, n)]),
+        ('全体', '全体', '下落', valid[select_top_positions(-valid_rate, n)]),
+    ]
+
+    if by_railroad and len(valid):
+        codes, railroads = pd.factorize(
+            comparison_df['railroad'].to_numpy()[valid], sort=True, use_na_sentinel=False
+        )
+        # 路線コードの並べ替えは整数の安定ソート（16bit以下は基数ソート）で行う
+        if len(railroads) < 2 ** 15:
+            codes = codes.astype(np.int16)
+        grouped = np.argsort(codes, kind='stable')
+        boundaries = np.cumsum(np.bincount(codes, minlength=len(railroads)))[:-1]
+
+        for railroad, members in zip(railroads, np.split(grouped, boundaries)):
+            name = 'データなし' if pd.isna(railroad) else railroad
+            member_rate = valid_rate[members]
+            sections.append(('路線別', name, '上昇', valid[members[select_top_positions(member_rate, n)]]))
+            sections.append(('路線別', name, '下落', valid[members[select_top_positions(-member_rate, n)]]))
+
+    positions = np.concatenate([section[3] for section in sections])
+    lengths = [len(section[3]) for section in sections]
+
+    movers_df = comparison_df.iloc[positions].reset_index(drop=True)
+    movers_df.insert(0, '順位', np.concatenate([np.arange(1, length + 1) for length in lengths]))
+    movers_df.insert(0, '方向', np.repeat([section[2] for section in sections], lengths))
+    movers_df.insert(0, '路線', np.repeat(np.array([section[1] for section in sections], dtype=object), lengths))
+    movers_df.insert(0, '区分', np.repeat([section[0] for section in sections], lengths))
+
+    return movers_df
@@ -0,0 +1,438 @@
+"""
+計算処理の等価性検証スクリプト
+
+高速化した実装（一括計算・行位置による照合）が従来の実装と完全に同じ結果を返すかを、
+ランダムに生成したデータと境界値のデータで確認します。
+- J〜M列・H, I列: calculator の 'legacy'（行ごとの計算）と 'vectorized'（一括計算）を比較
+- 比較データ: 従来の pd.merge による照合（reference_comparison_dataframe）と create_comparison_dataframe を比較
+- 出力ファイル: 両方の実装で作成したExcelファイルのセルの値・型・背景色を比較
+比較は列の順序・型・値（偶数丸め・値上げ率の切り上げ・「データなし」の位置を含む）・
+object列の要素の型（int と float の違い）まで行います。
+
+使い方:
+    python scripts/equivalence_harness.py
+    python scripts/equivalence_harness.py --rows 500000 --seeds 5 --workbook-rows 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.calculator import (
+    calculate_j_k_l_m_columns, calculate_comparison_columns, coerce_numeric, NO_DATA
+)
+from modules.matcher import create_comparison_dataframe
+
+# 差分を表示する最大件数（列・シートごと）
+MAX_REPORTED_CELLS = 5
+
+# 生成するデータの路線名
+RAILROADS = [f'路線{i}' for i in range(30)]
+
+
+def _random_prices(rng, rows, with_text):
+    """
+    価格列のランダムな値（ゼロ・欠損・負の値・丸めの境界付近の値、with_text の場合は文字列も含む）
+    """
+    import numpy as np
+
+    values = np.round(rng.uniform(10, 3000, rows), rng.integers(0, 4))
+    kind = rng.integers(0, 10, rows)
+    # 0.3025 × 70 倍したときに x.5 付近になる値（偶数丸めの確認用）
+    halves = (rng.integers(1, 50000, rows) + 0.5) / (0.3025 * 70)
+    values = np.where(kind == 1, halves, values)
+    values = np.where(kind == 2, np.floor(values), values)
+    values = np.where(kind == 3, -values, values)
+    values = np.where(kind == 4, 0.0, values)
+    values = np.where(kind == 5, np.nan, values)
+    if not with_text:
+        return values
+
+    result = values.astype(object)
+    text_kind = rng.integers(0, 6, rows)
+    for position in np.flatnonzero(kind >= 8):
+        value = values[position]
+        result[position] = [
+            NO_DATA, 'abc', f'{value:,.2f}', f' {value} ', None, str(int(value) if value == value else 0)
+        ][text_kind[position]]
+    return result
+
+
+def make_inputs(rows, seed):
+    """
+    ランダムな前回・今回データを作成
+
+    重複したキー・片方にしかないキー・価格のゼロ/欠損/負の値/文字列を含みます。
+    seed が奇数の場合は価格列に文字列を混ぜ（object列）、偶数の場合は数値の列にします。
+
+    Returns:
+        tuple: (前回データ, 今回データ)
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    with_text = seed % 2 == 1
+
+    def base(count):
+        stationid = rng.integers(0, max(1, int(count * 0.8)), count)
+        return pd.DataFrame({
+            'stationid': stationid,
+            'name': [f'駅{i}' for i in stationid],
+            'railroad2': 'x',
+            'railroad': rng.choice(RAILROADS, count),
+            'cityid': rng.integers(13101, 13130, count),
+        })
+
+    current_df = base(rows)
+    for column in ['priceunitconvnewly', 'priceunitnewly', 'priceunitusedsigned']:
+        current_df[column] = _random_prices(rng, rows, with_text)
+
+    previous_rows = max(1, int(rows * 0.9))
+    previous_df = base(previous_rows)
+    previous_prices = np.rint(rng.uniform(500, 60000, previous_rows)).astype(np.int64).astype(object)
+    kind = rng.integers(0, 10, previous_rows)
+    previous_prices[kind == 0] = NO_DATA
+    previous_prices[kind == 1] = 0
+    if with_text:
+        previous_prices[kind == 2] = np.nan
+        previous_prices[kind == 3] = '1,234'
+    previous_df['新築換算平均価格'] = previous_prices
+
+    return previous_df, current_df
+
+
+def edge_case_inputs():
+    """
+    境界値のデータ（空・1行・全て「データなし」・全て数値など）
+
+    Returns:
+        list: (名前, 前回データ, 今回データ) のリスト
+    """
+    import numpy as np
+    import pandas as pd
+
+    def current(prices, stationids=None):
+        count = len(prices)
+        stationids = list(range(count)) if stationids is None else stationids
+        return pd.DataFrame({
+            'stationid': stationids,
+            'name': [f'駅{i}' for i in stationids],
+            'railroad2': 'x',
+            'railroad': '山手線',
+            'cityid': 13101,
+            'priceunitconvnewly': prices,
+            'priceunitnewly': prices,
+            'priceunitusedsigned': prices,
+        })
+
+    def previous(prices, stationids=None):
+        count = len(prices)
+        stationids = list(range(count)) if stationids is None else stationids
+        return pd.DataFrame({
+            'stationid': stationids,
+            'name': [f'駅{i}' for i in stationids],
+            'railroad2': 'x',
+            'railroad': '山手線',
+            'cityid': 13101,
+            '新築換算平均価格': pd.Series(prices, dtype=object),
+        })
+
+    # 0.3025 × 70 倍が x.5 付近になる値・整数になる値（偶数丸めの確認用）
+    exact_halves = [0.5 / 21.175, 1.5 / 21.175, 2.5 / 21.175, 200.0, 400.0]
+    return [
+        ('empty', previous([]), current(pd.Series([], dtype=float))),
+        ('single', previous([8470]), current([400.0])),
+        ('all_no_data', previous([NO_DATA, NO_DATA]), current([0.0, np.nan])),
+        ('all_numeric_int', previous([1000, 2000, 3000]), current([100, 200, 300])),
+        ('halves', previous([1, 2, 3, 4, 5]), current(exact_halves)),
+        ('previous_zero', previous([0, 0]), current([100.0, 0.0])),
+        ('negative', previous([-1000, 1000]), current([-50.0, -50.0])),
+        ('text_prices', previous(['1,000', ' 2000 ', NO_DATA]), current(['1,234', 'abc', ' 300 '])),
+        ('no_overlap', previous([1000, 2000], [10, 11]), current([100.0, 200.0], [20, 21])),
+        ('duplicate_keys', previous([1000, 2000, 3000], [1, 1, 2]), current([100.0, 200.0, 300.0], [1, 1, 1])),
+    ]
+
+
+def reference_comparison_dataframe(previous_df, current_df):
+    """
+    従来の実装（マッチングキー列を追加して pd.merge で外部結合）による比較データの作成
+
+    create_comparison_dataframe() の比較対象として使用します。
+    """
+    import pandas as pd
+
+    previous_df = previous_df.copy()
+    current_df = current_df.copy()
+    previous_df['match_key'] = previous_df['stationid'].astype(str) + '_' + previous_df['railroad'].astype(str)
+    current_df['match_key'] = current_df['stationid'].astype(str) + '_' + current_df['railroad'].astype(str)
+
+    columns = ['match_key', 'stationid', 'name', 'railroad2', 'railroad', 'cityid', '新築換算平均価格']
+    merged_df = pd.merge(
+        previous_df[columns].copy(),
+        current_df[columns].copy(),
+        on='match_key',
+        how='outer',
+        suffixes=('_prev', '_curr')
+    )
+
+    comparison_df = pd.DataFrame()
+    for column in ['stationid', 'name', 'railroad2', 'railroad', 'cityid']:
+        comparison_df[column] = merged_df[f'{column}_curr'].fillna(merged_df[f'{column}_prev'])
+    comparison_df['前回新築換算平均価格'] = coerce_numeric(merged_df['新築換算平均価格_prev']).fillna(NO_DATA)
+    comparison_df['今回新築換算平均価格'] = coerce_numeric(merged_df['新築換算平均価格_curr']).fillna(NO_DATA)
+    return comparison_df
+
+
+def diff_frames(expected, actual, name):
+    """
+    2つのDataFrameの違いを列挙（列の順序・行数・列の型・値・object列の要素の型）
+
+    Returns:
+        list: 違いの説明のリスト（同じ場合は空）
+    """
+    if list(expected.columns) != list(actual.columns):
+        return [f"{name}: 列の順序が異なります {list(expected.columns)} != {list(actual.columns)}"]
+    if len(expected) != len(actual):
+        return [f"{name}: 行数が異なります {len(expected)} != {len(actual)}"]
+    if not expected.index.equals(actual.index):
+        return [f"{name}: 行のインデックスが異なります"]
+
+    diffs = []
+    for column in expected.columns:
+        left = expected[column]
+        right = actual[column]
+        if left.dtype != right.dtype:
+            diffs.append(f"{name}.{column}: 型が異なります {left.dtype} != {right.dtype}")
+            continue
+
+        same = (left == right) | (left.isna() & right.isna())
+        if left.dtype == object:
+            # 1 と 1.0 はExcelの出力が異なるため、要素の型も比較する
+            same &= left.map(type) == right.map(type)
+        mismatched = (~same.to_numpy(dtype=bool)).nonzero()[0]
+        if len(mismatched):
+            samples = ', '.join(
+                f"行{position}: {left.iloc[position]!r} != {right.iloc[position]!r}"
+                for position in mismatched[:MAX_REPORTED_CELLS]
+            )
+            diffs.append(f"{name}.{column}: {len(mismatched)}件の値が異なります（{samples}）")
+    return diffs
+
+
+def _run(function, *args, **kwargs):
+    """
+    関数を実行して (結果, 例外, 秒数) を返す
+    """
+    started_at = time.perf_counter()
+    try:
+        return function(*args, **kwargs), None, time.perf_counter() - started_at
+    except Exception as e:
+        return None, e, time.perf_counter() - started_at
+
+
+def _compare_runs(name, legacy, optimized):
+    """
+    従来の実装と高速化した実装の実行結果を比較（両方が同じ種類の例外を送出した場合も一致とみなす）
+    """
+    (legacy_result, legacy_error, _), (optimized_result, optimized_error, _) = legacy, optimized
+    if legacy_error is not None or optimized_error is not None:
+        if type(legacy_error) is type(optimized_error):
+            return []
+        return [f"{name}: 例外が異なります {legacy_error!r} != {optimized_error!r}"]
+    return diff_frames(legacy_result, optimized_result, name)
+
+
+def check_calculations(previous_df, current_df):
+    """
+    J〜M列・比較データ・H, I列の計算を従来の実装と高速化した実装で実行して比較
+
+    Returns:
+        tuple: (違いの説明のリスト, 段階ごとの秒数 {段階名: (従来, 高速化)})
+    """
+    diffs = []
+    timings = {}
+
+    legacy = _run(calculate_j_k_l_m_columns, current_df.copy(), engine='legacy')
+    optimized = _run(calculate_j_k_l_m_columns, current_df.copy(), engine='vectorized')
+    diffs += _compare_runs('calculate_j_k_l_m_columns', legacy, optimized)
+    timings['calculate_j_k_l_m_columns'] = (legacy[2], optimized[2])
+    if legacy[1] is not None:
+        return diffs, timings
+    calculated_df = legacy[0]
+
+    legacy = _run(reference_comparison_dataframe, previous_df, calculated_df)
+    optimized = _run(create_comparison_dataframe, previous_df, calculated_df)
+    diffs += _compare_runs('create_comparison_dataframe', legacy, optimized)
+    timings['create_comparison_dataframe'] = (legacy[2], optimized[2])
+    if legacy[1] is not None:
+        return diffs, timings
+    comparison_df = legacy[0]
+
+    legacy = _run(calculate_comparison_columns, comparison_df.copy(), engine='legacy')
+    optimized = _run(calculate_comparison_columns, comparison_df.copy(), engine='vectorized')
+    diffs += _compare_runs('calculate_comparison_columns', legacy, optimized)
+    timings['calculate_comparison_columns'] = (legacy[2], optimized[2])
+
+    return diffs, timings
+
+
+def _cell_fill(cell):
+    """
+    セルの背景色（塗りつぶしがない場合はNone）
+    """
+    if cell.fill is None or cell.fill.fill_type is None:
+        return None
+    return cell.fill.start_color.rgb
+
+
+def diff_workbooks(expected, actual):
+    """
+    2つのExcelファイルのシート構成・セルの値と型・背景色の違いを列挙
+
+    Args:
+        expected: 比較元のExcelファイル（BytesIO）
+        actual: 比較先のExcelファイル（BytesIO）
+
+    Returns:
+        list: 違いの説明のリスト（同じ場合は空）
+    """
+    from openpyxl import load_workbook
+
+    expected.seek(0)
+    actual.seek(0)
+    expected_wb = load_workbook(expected)
+    actual_wb = load_workbook(actual)
+    if expected_wb.sheetnames != actual_wb.sheetnames:
+        return [f"シート構成が異なります {expected_wb.sheetnames} != {actual_wb.sheetnames}"]
+
+    diffs = []
+    for sheet_name in expected_wb.sheetnames:
+        expected_ws = expected_wb[sheet_name]
+        actual_ws = actual_wb[sheet_name]
+        if (expected_ws.max_row, expected_ws.max_column) != (actual_ws.max_row, actual_ws.max_column):
+            diffs.append(
+                f"{sheet_name}: 範囲が異なります "
+                f"{expected_ws.max_row}x{expected_ws.max_column} != {actual_ws.max_row}x{actual_ws.max_column}"
+            )
+            continue
+
+        mismatched = []
+        for expected_row, actual_row in zip(expected_ws.iter_rows(), actual_ws.iter_rows()):
+            for expected_cell, actual_cell in zip(expected_row, actual_row):
+                if (type(expected_cell.value) is not type(actual_cell.value)
+                        or expected_cell.value != actual_cell.value
+                        or _cell_fill(expected_cell) != _cell_fill(actual_cell)):
+                    mismatched.append(
+                        f"{expected_cell.coordinate}: {expected_cell.value!r} != {actual_cell.value!r}"
+                    )
+        if mismatched:
+            diffs.append(f"{sheet_name}: {len(mismatched)}セルが異なります（{', '.join(mismatched[:MAX_REPORTED_CELLS])}）")
+    return diffs
+
+
+def build_workbook(previous_df, current_df, engine, **options):
+    """
+    指定した計算の実装で照合〜Excel生成までを実行（ファイル読み込みは行わない）
+
+    Returns:
+        BytesIO: Excelファイル
+    """
+    from modules.data_quality import check_data_quality
+    from modules.data_processor import build_output
+
+    current_df = calculate_j_k_l_m_columns(current_df.copy(), engine=engine)
+    comparison_df = calculate_comparison_columns(
+        create_comparison_dataframe(previous_df, current_df), engine=engine
+    )
+    quality_df, quality_stats = check_data_quality([('前回データ', previous_df), ('今回データ', current_df)])
+    prepared = {
+        'previous_df': previous_df,
+        'previous_comment': '前回データ',
+        'current_df': current_df,
+        'current_comment': '今回データ',
+        'comparison_df': comparison_df,
+        'quality_df': quality_df,
+        'quality_stats': quality_stats,
+    }
+    output, _ = build_output(prepared, **options)
+    return output
+
+
+def check_workbook(previous_df, current_df, **options):
+    """
+    従来の実装と高速化した実装で作成したExcelファイルを比較
+
+    Returns:
+        list: 違いの説明のリスト（同じ場合は空）
+    """
+    return diff_workbooks(
+        build_workbook(previous_df, current_df, 'legacy', **options),
+        build_workbook(previous_df, current_df, 'vectorized', **options)
+    )
+
+
+def run_harness(rows, seeds, workbook_rows, verbose=True):
+    """
+    境界値のデータとランダムなデータで全ての比較を実行
+
+    Args:
+        rows: ランダムなデータの行数
+        seeds: 乱数のシード数（シードごとにデータを作成）
+        workbook_rows: Excelファイルを比較するデータの行数（0の場合はExcelファイルを比較しない）
+        verbose: 経過を表示するか
+
+    Returns:
+        list: 違いの説明のリスト（全て一致した場合は空）
+    """
+    diffs = []
+
+    for name, previous_df, current_df in edge_case_inputs():
+        case_diffs, _ = check_calculations(previous_df, current_df)
+        diffs += [f"[{name}] {diff}" for diff in case_diffs]
+        if verbose:
+            print(f"境界値 {name:<16} {'OK' if not case_diffs else 'NG'}")
+
+    for seed in range(seeds):
+        previous_df, current_df = make_inputs(rows, seed)
+        case_diffs, timings = check_calculations(previous_df, current_df)
+        diffs += [f"[seed={seed}] {diff}" for diff in case_diffs]
+        if verbose:
+            print(f"ランダム seed={seed} {rows:,}行 {'OK' if not case_diffs else 'NG'}")
+            for stage, (legacy_seconds, optimized_seconds) in timings.items():
+                print(f"  {stage:<30} 従来 {legacy_seconds:8.3f}秒  高速化 {optimized_seconds:8.3f}秒")
+
+    if workbook_rows > 0:
+        for seed in range(min(seeds, 2)):
+            previous_df, current_df = make_inputs(workbook_rows, seed)
+            case_diffs = check_workbook(previous_df, current_df, summary_sheet=True, top_movers=5, bands=[10, 20, 50])
+            diffs += [f"[workbook seed={seed}] {diff}" for diff in case_diffs]
+            if verbose:
+                print(f"Excelファイル seed={seed} {workbook_rows:,}行 {'OK' if not case_diffs else 'NG'}")
+
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='高速化した計算処理が従来の実装と同じ結果を返すかを検証')
+    parser.add_argument('--rows', type=int, default=100000, help='ランダムなデータの行数（デフォルト: 100000）')
+    parser.add_argument('--seeds', type=int, default=3, help='乱数のシード数（デフォルト: 3）')
+    parser.add_argument('--workbook-rows', type=int, default=2000,
+                        help='Excelファイルを比較するデータの行数（0 = 比較しない、デフォルト: 2000）')
+    args = parser.parse_args()
+
+    diffs = run_harness(args.rows, args.seeds, args.workbook_rows)
+    if diffs:
+        print(f"\n{len(diffs)}件の違いがあります", file=sys.stderr)
+        for diff in diffs:
+            print(f"  {diff}", file=sys.stderr)
+        return 1
+    print("\n全ての比較で一致しました")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
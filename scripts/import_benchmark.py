@@ -0,0 +1,102 @@
+"""
+起動時インポートコスト計測スクリプト
+
+`python -X importtime` を使い、各モジュールを新しいプロセスでインポートしたときの
+累積インポート時間を計測します。重いライブラリ（pandas / openpyxl / numpy）が
+起動時に読み込まれていないかも確認できます。
+
+使い方:
+    python scripts/import_benchmark.py
+    python scripts/import_benchmark.py --repeat 5 --record import_times.jsonl
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+# 計測対象のモジュール
+TARGET_MODULES = [
+    'utils.excel_handler',
+    'utils.file_validator',
+    'utils.result_cache',
+    'utils.result_store',
+    'utils.job_queue',
+    'utils.worker_pool',
+    'utils.metrics',
+    'utils.profiling',
+    'utils.upload_buffer',
+    'modules.calculator',
+    'modules.matcher',
+    'modules.data_processor',
+    'modules.pipeline',
+]
+
+# 起動時に読み込まれていないことを確認する重いライブラリ
+HEAVY_PACKAGES = ['pandas', 'openpyxl', 'numpy']
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module_name):
+    """
+    モジュールを新しいプロセスでインポートし、インポート時間を計測
+
+    Args:
+        module_name: モジュール名
+
+    Returns:
+        dict: cumulative_us（累積時間・マイクロ秒）, heavy（読み込まれた重いライブラリ）
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    # 出力形式: "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [part.strip() for part in line[len('import time:'):].split('|')]
+        if not parts[1].isdigit():
+            continue
+        cumulative[parts[2].strip()] = int(parts[1])
+
+    return {
+        'cumulative_us': cumulative.get(module_name, 0),
+        'heavy': [name for name in HEAVY_PACKAGES if name in cumulative],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='モジュールごとのインポート時間を計測')
+    parser.add_argument('--repeat', type=int, default=3, help='計測回数（最小値を採用）')
+    parser.add_argument('--record', help='計測結果を追記するJSONLファイル')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'モジュール':<28}{'累積時間(ms)':>14}  重いライブラリ")
+    for module_name in TARGET_MODULES:
+        measurements = [measure_import(module_name) for _ in range(args.repeat)]
+        best = min(measurements, key=lambda m: m['cumulative_us'])
+        results[module_name] = best
+        heavy = ', '.join(best['heavy']) or '-'
+        print(f"{module_name:<28}{best['cumulative_us'] / 1000:>14.1f}  {heavy}")
+
+    if args.record:
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'measured_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'python': sys.version.split()[0],
+                'results': results,
+            }, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+HTTPサービスの負荷計測スクリプト
+
+service.py の API に対して、アップロード → 処理 → ダウンロードの一連のリクエストを
+指定した同時実行数で繰り返し、レイテンシ（全体・段階別）とスループットを計測します。
+
+使い方:
+    python service.py --port 8502 &
+    python scripts/load_generator.py 前回データ.xlsx 今回データ.xlsx --requests 20 --concurrency 4
+    python scripts/load_generator.py 前回データ.xlsx 今回データ.xlsx --record load_results.jsonl
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+# 計測する段階
+PHASES = ['upload', 'process', 'download', 'total']
+
+# ジョブの状態を確認する間隔（秒）
+POLL_INTERVAL = 0.1
+
+
+def _request(url, method='GET', data=None, headers=None):
+    """
+    HTTPリクエストを送信してレスポンス本文を返す
+    """
+    request = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    with urllib.request.urlopen(request) as response:
+        return response.read()
+
+
+def upload_file(base_url, path):
+    """
+    ファイルをアップロードしてアップロードIDを返す
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    body = _request(
+        f"{base_url}/uploads", method='POST', data=data,
+        headers={'X-File-Name': quote(os.path.basename(path)), 'Content-Type': 'application/octet-stream'}
+    )
+    return json.loads(body)['upload_id']
+
+
+def run_once(base_url, previous_path, current_path, options):
+    """
+    アップロード → 処理 → ダウンロードを1回実行し、段階ごとの所要時間（秒）を返す
+
+    Returns:
+        dict: upload, process, download, total（秒）, output_bytes, error（失敗時のメッセージ）
+    """
+    timings = {'error': None}
+    started_at = time.perf_counter()
+    try:
+        previous_upload = upload_file(base_url, previous_path)
+        current_upload = upload_file(base_url, current_path)
+        uploaded_at = time.perf_counter()
+        timings['upload'] = uploaded_at - started_at
+
+        body = _request(
+            f"{base_url}/jobs", method='POST',
+            data=json.dumps({
+                'previous_upload': previous_upload,
+                'current_upload': current_upload,
+                'options': options,
+            }).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        job_id = json.loads(body)['job_id']
+
+        while True:
+            status = json.loads(_request(f"{base_url}/jobs/{job_id}"))
+            if status['state'] in ('done', 'error'):
+                break
+            time.sleep(POLL_INTERVAL)
+        if status['state'] == 'error':
+            raise RuntimeError(status['error'])
+        processed_at = time.perf_counter()
+        timings['process'] = processed_at - uploaded_at
+
+        output = _request(f"{base_url}/jobs/{job_id}/output")
+        timings['download'] = time.perf_counter() - processed_at
+        timings['output_bytes'] = len(output)
+        _request(f"{base_url}/jobs/{job_id}", method='DELETE')
+    except (urllib.error.URLError, RuntimeError, KeyError, ValueError) as e:
+        if isinstance(e, urllib.error.HTTPError):
+            e = f"HTTP {e.code}: {e.read().decode('utf-8', 'replace')}"
+        timings['error'] = str(e)
+
+    timings['total'] = time.perf_counter() - started_at
+    return timings
+
+
+def percentile(values, ratio):
+    """
+    パーセンタイル（最近傍法）
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(ratio * len(ordered)) - 1)]
+
+
+def summarize(results, elapsed):
+    """
+    計測結果を集計
+
+    Returns:
+        dict: requests, errors, elapsed, throughput（成功件数/秒）, phases（段階ごとの p50 / p95 / max 秒）
+    """
+    succeeded = [result for result in results if result['error'] is None]
+    summary = {
+        'requests': len(results),
+        'errors': len(results) - len(succeeded),
+        'elapsed': elapsed,
+        'throughput': len(succeeded) / elapsed if elapsed else 0.0,
+        'phases': {},
+    }
+    for phase in PHASES:
+        values = [result[phase] for result in succeeded]
+        summary['phases'][phase] = {
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'max': max(values) if values else None,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTPサービスのレイテンシとスループットを計測')
+    parser.add_argument('previous_file', help='前回データのファイル')
+    parser.add_argument('current_file', help='今回データのファイル')
+    parser.add_argument('--url', default='http://127.0.0.1:8502', help='サービスのURL')
+    parser.add_argument('--requests', type=int, default=10, help='リクエスト数（デフォルト: 10）')
+    parser.add_argument('--concurrency', type=int, default=2, help='同時実行数（デフォルト: 2）')
+    parser.add_argument('--options', default='{}', help='process_excel_files() の引数（JSON）')
+    parser.add_argument('--record', help='計測結果を追記するJSONLファイル')
+    args = parser.parse_args()
+
+    options = json.loads(args.options)
+    base_url = args.url.rstrip('/')
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(run_once, base_url, args.previous_file, args.current_file, options)
+            for _ in range(args.requests)
+        ]
+        results = [future.result() for future in futures]
+    summary = summarize(results, time.perf_counter() - started_at)
+
+    print(f"リクエスト数: {summary['requests']}（失敗: {summary['errors']}）  同時実行数: {args.concurrency}")
+    print(f"経過時間: {summary['elapsed']:.2f}秒  スループット: {summary['throughput']:.2f}件/秒")
+    print(f"{'段階':<12}{'p50(秒)':>10}{'p95(秒)':>10}{'最大(秒)':>10}")
+    for phase, values in summary['phases'].items():
+        if values['p50'] is None:
+            continue
+        print(f"{phase:<12}{values['p50']:>10.3f}{values['p95']:>10.3f}{values['max']:>10.3f}")
+    for error in sorted({result['error'] for result in results if result['error']}):
+        print(f"エラー: {error}", file=sys.stderr)
+
+    if args.record:
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'measured_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'url': base_url,
+                'concurrency': args.concurrency,
+                'options': options,
+                'summary': summary,
+            }, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
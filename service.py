@@ -0,0 +1,460 @@
+"""
+エクセルデータ加工システム（HTTPサービス版）
+
+他のツールから照合処理を呼び出せるように、process_excel_files() をローカルのHTTP APIとして公開します。
+標準ライブラリの http.server のみを使用し、処理は Streamlit版と同じジョブキュー（utils.job_queue）で実行します。
+
+API:
+    GET    /health                 サービスとジョブキューの状態
+    GET    /metrics                処理の実行回数・所要時間・データ量（Prometheusのテキスト形式）
+    POST   /uploads                ファイルのアップロード（リクエスト本文がファイルの中身）
+                                   ヘッダー X-File-Name にファイル名（URLエンコード可、.xlsx / .csv）
+    POST   /jobs                   処理の開始（JSON: {"previous_upload": ID, "current_upload": ID, "options": {...}}）
+                                   options は process_excel_files() の引数（JOB_OPTIONS）
+                                   workers はサーバーの EXCEL_APP_SHARD_WORKERS までに制限
+    GET    /jobs/<ジョブID>         処理の状態・進捗・処理統計（JSON）
+    GET    /jobs/<ジョブID>/output  出力ファイルのダウンロード
+    DELETE /jobs/<ジョブID>         ジョブと出力ファイルの削除
+
+使い方:
+    python service.py --port 8502
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+from modules.data_processor import process_excel_files
+from modules.sharding import DEFAULT_WORKERS
+from utils.bundle_writer import OUTPUT_FORMATS
+from utils.job_queue import (
+    submit_job, get_job_status, discard_job, report_progress, get_queue_stats, JobTooLargeError
+)
+from utils.result_store import put_result, open_result, delete_result, get_result_size
+from utils.worker_pool import start_background_warm_up
+from utils.metrics import render_prometheus
+
+# 待ち受けるホスト・ポート（デフォルトはローカルのみ）
+DEFAULT_HOST = os.environ.get('EXCEL_APP_SERVICE_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('EXCEL_APP_SERVICE_PORT', 8502))
+
+# 1ファイルのアップロードサイズの上限（デフォルト: 200MB）
+MAX_UPLOAD_BYTES = int(os.environ.get('EXCEL_APP_MAX_UPLOAD_BYTES', 200 * 1024 * 1024))
+
+# JSONリクエスト本文の上限
+MAX_JSON_BYTES = 64 * 1024
+
+# アップロード・ダウンロードの読み書き単位
+CHUNK_SIZE = 1024 * 1024
+
+# 処理に使われなかったアップロードファイルを保持する秒数
+UPLOAD_TTL = 3600
+
+# /jobs の options で指定できる process_excel_files() の引数
+JOB_OPTIONS = [
+    'threshold', 'detector', 'group_by', 'score_threshold', 'bands', 'band_sheets',
+    'summary_sheet', 'top_movers', 'delta_tolerance', 'source_sheets',
+    'output_format', 'compression_level', 'quality_sheet', 'workers', 'shard_by',
+]
+
+_lock = threading.Lock()
+_uploads = {}  # アップロードID -> アップロード情報
+_upload_dir = None
+
+
+def _get_upload_dir():
+    """
+    アップロードファイルの保存先の一時ディレクトリを取得（初回のみ作成、_lock取得中に呼び出す）
+    """
+    global _upload_dir
+    if _upload_dir is None:
+        _upload_dir = tempfile.mkdtemp(prefix='excel_app_uploads_')
+    return _upload_dir
+
+
+def _remove_upload(upload_id):
+    """
+    アップロードファイルを削除（_lock取得中に呼び出す）
+    """
+    upload = _uploads.pop(upload_id, None)
+    if upload is not None and os.path.exists(upload['path']):
+        os.remove(upload['path'])
+
+
+def _cleanup_uploads():
+    """
+    保持期間を過ぎた未使用のアップロードファイルを削除（_lock取得中に呼び出す）
+    """
+    now = time.time()
+    expired = [
+        upload_id for upload_id, upload in _uploads.items()
+        if not upload['in_use'] and now - upload['created_at'] > UPLOAD_TTL
+    ]
+    for upload_id in expired:
+        _remove_upload(upload_id)
+
+
+def save_upload(stream, content_length, file_name):
+    """
+    リクエスト本文をメモリに溜めずに一時ファイルへ書き出す
+
+    Args:
+        stream: リクエスト本文の読み出し元
+        content_length: リクエスト本文のバイト数
+        file_name: ファイル名（拡張子で形式を判定）
+
+    Returns:
+        dict: upload_id, name, size
+
+    Raises:
+        ValueError: ファイル名・サイズが不正な場合、本文が途中で終わった場合
+    """
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in ('.xlsx', '.csv'):
+        raise ValueError(f"{file_name}: .xlsxまたは.csv形式のファイルをアップロードしてください")
+    if content_length > MAX_UPLOAD_BYTES:
+        limit_mb = MAX_UPLOAD_BYTES // (1024 * 1024)
+        raise ValueError(f"アップロードサイズが上限（{limit_mb}MB）を超えています")
+
+    upload_id = uuid.uuid4().hex
+    with _lock:
+        _cleanup_uploads()
+        path = os.path.join(_get_upload_dir(), upload_id + extension)
+
+    remaining = content_length
+    try:
+        with open(path, 'wb') as f:
+            while remaining > 0:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ValueError("アップロードが途中で終了しました")
+                f.write(chunk)
+                remaining -= len(chunk)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    with _lock:
+        _uploads[upload_id] = {
+            'path': path,
+            'name': file_name,
+            'size': content_length,
+            'created_at': time.time(),
+            'in_use': False,
+        }
+    return {'upload_id': upload_id, 'name': file_name, 'size': content_length}
+
+
+def _run_job(previous_path, current_path, upload_ids, options):
+    """
+    ジョブキューのワーカーで処理を実行し、出力ファイルを結果ストアに保存
+
+    Returns:
+        dict: handle（結果ストアのハンドル）, stats（処理統計）
+    """
+    def progress_callback(event):
+        report_progress(event['fraction'], event['label'])
+
+    try:
+        output, stats = process_excel_files(
+            previous_path, current_path, progress_callback=progress_callback, **options
+        )
+        return {'handle': put_result(output), 'stats': stats}
+    finally:
+        # 処理が終わったアップロードファイルは不要
+        with _lock:
+            for upload_id in upload_ids:
+                _remove_upload(upload_id)
+
+
+def validate_options(options):
+    """
+    /jobs の options を検証
+
+    workers（並列処理のプロセス数）はサーバーの設定（環境変数 EXCEL_APP_SHARD_WORKERS）までに制限します。
+
+    Raises:
+        ValueError: 指定できないオプション・不正な出力形式・不正なプロセス数の場合
+    """
+    unknown = sorted(set(options) - set(JOB_OPTIONS))
+    if unknown:
+        raise ValueError(f"指定できないオプションです: {', '.join(unknown)}")
+    if options.get('output_format', 'xlsx') not in OUTPUT_FORMATS:
+        raise ValueError(f"出力形式が不正です: {options['output_format']}")
+    if 'workers' in options:
+        workers = options['workers']
+        if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"workers は1以上の整数で指定してください: {workers}")
+        options['workers'] = min(workers, max(DEFAULT_WORKERS, 1))
+
+
+def create_job(previous_upload, current_upload, options):
+    """
+    アップロード済みのファイルで処理ジョブを作成
+
+    Args:
+        previous_upload: 前回データのアップロードID
+        current_upload: 今回データのアップロードID
+        options: process_excel_files() の引数（validate_options() で検証済み）
+
+    Returns:
+        str: ジョブID
+
+    Raises:
+        KeyError: アップロードIDが存在しない、または別のジョブで使用中の場合
+        JobTooLargeError: アップロードサイズの合計がジョブ1件の上限を超えている場合
+        ValueError: ジョブキューの受付制限を超えている場合
+    """
+    upload_ids = [previous_upload, current_upload]
+    with _lock:
+        uploads = [_uploads[upload_id] for upload_id in upload_ids]
+        if any(upload['in_use'] for upload in uploads):
+            raise KeyError(previous_upload)
+        for upload in uploads:
+            upload['in_use'] = True
+
+    try:
+        return submit_job(
+            _run_job,
+            uploads[0]['path'],
+            uploads[1]['path'],
+            upload_ids,
+            options,
+            size_bytes=sum(upload['size'] for upload in uploads)
+        )
+    except Exception:
+        with _lock:
+            for upload in uploads:
+                upload['in_use'] = False
+        raise
+
+
+def _json_default(value):
+    """
+    JSONに変換できない値（numpyの数値・日時など）の変換
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTPリクエストの処理
+    """
+
+    server_version = 'ExcelApp/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # アクセスログは --verbose 指定時のみ出力
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message):
+        # 本文を読み切っていない場合は接続を再利用しない
+        self.close_connection = True
+        self._send_json(status, {'error': message})
+
+    def _content_length(self):
+        value = self.headers.get('Content-Length')
+        return int(value) if value is not None and value.isdigit() else None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'queue': get_queue_stats()})
+            return
+
+        if self.path == '/metrics':
+            data = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        match = re.fullmatch(r'/jobs/([0-9a-f]+)(/output)?', self.path)
+        if match is None:
+            self._send_error(404, "存在しないパスです")
+            return
+
+        try:
+            status = get_job_status(match.group(1))
+        except KeyError:
+            self._send_error(404, "ジョブが存在しません（期限切れを含む）")
+            return
+
+        if match.group(2) is None:
+            result = status['result'] or {}
+            output_bytes = None
+            if result:
+                try:
+                    output_bytes = get_result_size(result['handle'])
+                except KeyError:
+                    # 出力ファイルの保持期間が過ぎた（または削除された）場合
+                    pass
+            self._send_json(200, {
+                'job_id': match.group(1),
+                'state': status['state'],
+                'position': status['position'],
+                'progress': status['progress'],
+                'message': status['message'],
+                'error': status['error'],
+                'stats': result.get('stats'),
+                'output_bytes': output_bytes,
+            })
+            return
+
+        if status['state'] != 'done':
+            self._send_error(409, f"ジョブが完了していません（状態: {status['state']}）")
+            return
+        self._send_output(match.group(1), status['result'])
+
+    def _send_output(self, job_id, result):
+        """
+        結果ストアの出力ファイルを分割して送信（全体をメモリにコピーしない）
+        """
+        output_format = OUTPUT_FORMATS[result['stats'].get('output_format', 'xlsx')]
+        try:
+            size = get_result_size(result['handle'])
+            output = open_result(result['handle'])
+        except KeyError:
+            self._send_error(410, "出力ファイルの保持期間が過ぎています")
+            return
+
+        with output:
+            self.send_response(200)
+            self.send_header('Content-Type', output_format['mime'])
+            self.send_header('Content-Length', str(size))
+            self.send_header('Content-Disposition',
+                             f'attachment; filename="output_{job_id}.{output_format["extension"]}"')
+            self.end_headers()
+            shutil.copyfileobj(output, self.wfile, CHUNK_SIZE)
+
+    def do_POST(self):
+        content_length = self._content_length()
+        if content_length is None:
+            self._send_error(411, "Content-Length を指定してください")
+            return
+
+        if self.path == '/uploads':
+            file_name = unquote(self.headers.get('X-File-Name', ''))
+            try:
+                upload = save_upload(self.rfile, content_length, file_name)
+            except ValueError as e:
+                self._send_error(413 if content_length > MAX_UPLOAD_BYTES else 400, str(e))
+                return
+            self._send_json(201, upload)
+            return
+
+        if self.path == '/jobs':
+            if content_length > MAX_JSON_BYTES:
+                self._send_error(413, "リクエストが大きすぎます")
+                return
+            try:
+                request = json.loads(self.rfile.read(content_length) or b'{}')
+                options = request.get('options') or {}
+                validate_options(options)
+            except (json.JSONDecodeError, AttributeError):
+                self._send_error(400, "リクエストはJSONで指定してください")
+                return
+            except ValueError as e:
+                self._send_error(400, str(e))
+                return
+
+            try:
+                job_id = create_job(request.get('previous_upload'), request.get('current_upload'), options)
+            except KeyError:
+                self._send_error(404, "アップロードファイルが存在しないか、別のジョブで使用中です")
+                return
+            except JobTooLargeError as e:
+                # ジョブ1件のサイズ上限は再試行しても受け付けられない
+                self._send_error(413, str(e))
+                return
+            except ValueError as e:
+                # ジョブキューの混雑は時間をおいて再試行できる
+                self._send_error(503, str(e))
+                return
+            self._send_json(202, {'job_id': job_id})
+            return
+
+        self._send_error(404, "存在しないパスです")
+
+    def do_DELETE(self):
+        match = re.fullmatch(r'/jobs/([0-9a-f]+)', self.path)
+        if match is None:
+            self._send_error(404, "存在しないパスです")
+            return
+        try:
+            status = get_job_status(match.group(1))
+        except KeyError:
+            self._send_error(404, "ジョブが存在しません（期限切れを含む）")
+            return
+        if status['state'] in ('queued', 'running'):
+            self._send_error(409, "処理中のジョブは削除できません")
+            return
+        if status['result']:
+            delete_result(status['result']['handle'])
+        discard_job(match.group(1))
+        self._send_json(200, {'job_id': match.group(1), 'deleted': True})
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """
+    HTTPサーバーを作成（リクエストごとにスレッドで処理、処理本体はジョブキューで実行）
+
+    Args:
+        host: 待ち受けるホスト
+        port: 待ち受けるポート（0の場合は空いているポート）
+        verbose: アクセスログを出力するか
+
+    Returns:
+        ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="照合処理をローカルのHTTP APIとして公開します")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"待ち受けるホスト（デフォルト: {DEFAULT_HOST}）")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"待ち受けるポート（デフォルト: {DEFAULT_PORT}）")
+    parser.add_argument('--verbose', action='store_true', help="アクセスログを出力")
+    args = parser.parse_args(argv)
+
+    start_background_warm_up()
+    server = create_server(args.host, args.port, verbose=args.verbose)
+    print(f"✅ http://{args.host}:{server.server_address[1]} で待ち受けています（Ctrl+C で終了）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
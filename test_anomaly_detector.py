@@ -0,0 +1,138 @@
+"""
+anomaly_detector.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.anomaly_detector import extract_statistical_outliers, resolve_thresholds
+from modules.data_processor import extract_abnormal_values, split_abnormal_bands
+import pandas as pd
+
+def make_comparison_df():
+    """
+    テスト用の比較データを作成（路線Aは安定、路線Bは変動が大きい）
+    """
+    return pd.DataFrame({
+        'stationid': list(range(1, 13)),
+        'railroad': ['路線A'] * 6 + ['路線B'] * 6,
+        'cityid': [13101] * 12,
+        '値上げ率': ['2%', '3%', '2%', '3%', '2%', '12%',
+                 '-20%', '25%', '-15%', '30%', '-25%', 'データなし'],
+    })
+
+def test_mad_outliers():
+    """
+    中央値/MADによるグループ内の外れ値検出テスト
+    """
+    print("=" * 50)
+    print("[テスト1] 中央値/MADによる外れ値検出")
+    print("=" * 50)
+
+    df = make_comparison_df()
+    result_df = extract_statistical_outliers(df, group_by='railroad', method='mad', score_threshold=3.5)
+
+    print("\n【抽出結果】")
+    print(result_df)
+
+    # 安定した路線Aの12%は外れ値、変動の大きい路線Bの値は外れ値ではない
+    assert list(result_df['stationid']) == [6], f"[NG] 抽出結果エラー: {list(result_df['stationid'])}"
+    assert 'グループ中央値' in result_df.columns, "[NG] グループ中央値列がありません"
+    assert '偏差スコア' in result_df.columns, "[NG] 偏差スコア列がありません"
+    print("[OK] 中央値/MADによる外れ値検出成功")
+
+def test_zscore_min_group_size():
+    """
+    件数の少ないグループが判定対象外になることのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 最小グループ件数")
+    print("=" * 50)
+
+    df = make_comparison_df()
+    result_df = extract_statistical_outliers(
+        df, group_by='railroad', method='zscore', score_threshold=0.5, min_group_size=7
+    )
+
+    assert result_df.empty, "[NG] 件数不足のグループから抽出されました"
+    print("[OK] 件数不足のグループは判定対象外")
+
+    # 元のDataFrameに列が追加されていないこと
+    assert list(df.columns) == ['stationid', 'railroad', 'cityid', '値上げ率'], "[NG] 入力が変更されています"
+    print("[OK] 入力のDataFrameは変更されない")
+
+def test_threshold_table():
+    """
+    路線・市区町村別の閾値テーブルのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト3] 路線・市区町村別の閾値テーブル")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5],
+        'railroad': ['路線A', '路線A', '路線B', '路線B', '路線C'],
+        'cityid': [13101.0, 13102.0, 13101.0, 13103.0, None],
+        '値上げ率': ['15%', '-15%', '25%', '9%', 'データなし'],
+    })
+    table = {
+        'default': 20,
+        'railroad': {'路線A': 10},
+        'cityid': {'13103': 5},
+        'railroad_cityid': {('路線A', 13102): 50},
+    }
+
+    thresholds = resolve_thresholds(df, table)
+    print(f"各行の閾値: {list(thresholds)}")
+    assert list(thresholds) == [10, 50, 20, 5, 20], f"[NG] 閾値の割り当てエラー: {list(thresholds)}"
+    print("[OK] 閾値の割り当て成功（路線×市区町村 > 市区町村 > 路線 > 既定）")
+
+    abnormal_df = extract_abnormal_values(df, threshold=table)
+    print(abnormal_df)
+    assert list(abnormal_df['stationid']) == [3, 1, 4], f"[NG] 抽出結果エラー: {list(abnormal_df['stationid'])}"
+    assert list(df.columns) == ['stationid', 'railroad', 'cityid', '値上げ率'], "[NG] 入力に一時列が残っています"
+    print("[OK] 閾値テーブルによる抽出成功")
+
+def test_tiered_bands():
+    """
+    段階別の区分による異常値抽出のテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト4] 段階別の区分")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5, 6, 7],
+        '値上げ率': ['5%', '-12%', '25%', 'データなし', '60%', '-55%', '10%'],
+    })
+
+    abnormal_df = extract_abnormal_values(df, bands=[50, 10, 20])
+    print(abnormal_df)
+    assert list(abnormal_df['stationid']) == [5, 6, 3, 7, 2], f"[NG] 抽出結果エラー: {list(abnormal_df['stationid'])}"
+    assert list(abnormal_df['異常値区分']) == [
+        '±50%以上', '±50%以上', '±20%以上50%未満', '±10%以上20%未満', '±10%以上20%未満'
+    ], f"[NG] 区分エラー: {list(abnormal_df['異常値区分'])}"
+    print("[OK] 区分の判定と並び順が正しい")
+
+    # 最小の基準値で抽出した件数と一致すること
+    assert len(abnormal_df) == len(extract_abnormal_values(df, threshold=10)), "[NG] 件数エラー"
+
+    sheets = split_abnormal_bands(abnormal_df, [10, 20, 50])
+    assert [(label, len(band_df)) for label, band_df in sheets] == [
+        ('±50%以上', 2), ('±20%以上50%未満', 1), ('±10%以上20%未満', 2)
+    ], "[NG] 区分ごとの分割エラー"
+    print("[OK] 区分ごとの分割成功")
+
+if __name__ == '__main__':
+    try:
+        test_mad_outliers()
+        test_zscore_min_group_size()
+        test_threshold_table()
+        test_tiered_bands()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
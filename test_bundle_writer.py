@@ -0,0 +1,76 @@
+"""
+bundle_writer.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from utils.bundle_writer import write_bundle, METADATA_FILE_NAME
+from io import BytesIO
+import json
+import zipfile
+import pandas as pd
+
+def make_sheets():
+    """
+    テスト用のシート（価格列は数値と「データなし」が混在）
+    """
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3],
+        '前回新築換算平均価格': [100, 'データなし', 300],
+        '値上げ率': ['10%', 'データなし', '-5%'],
+    })
+    return [('比較データ', df, '比較の備考'), ('前回データ', df.head(2), {'A1': '元の備考', 'F1': '新築換算坪単価'})]
+
+def test_bundle_formats():
+    """
+    CSV / CSV.gz / Parquet のバンドル作成テスト
+    """
+    print("=" * 50)
+    print("[テスト1] 出力形式ごとのバンドル作成")
+    print("=" * 50)
+
+    for output_format in ['csv', 'csv.gz', 'parquet']:
+        output = write_bundle(make_sheets(), output_format=output_format, compression_level=1)
+        archive = zipfile.ZipFile(output)
+        metadata = json.loads(archive.read(METADATA_FILE_NAME))
+
+        names = [sheet['file'] for sheet in metadata['sheets']]
+        assert names == [f'01_比較データ.{output_format}', f'02_前回データ.{output_format}'], f"[NG] ファイル名エラー: {names}"
+        assert metadata['sheets'][1]['comment'] == {'A1': '元の備考', 'F1': '新築換算坪単価'}, "[NG] 備考行エラー"
+
+        data = BytesIO(archive.read(names[0]))
+        if output_format == 'parquet':
+            df = pd.read_parquet(data)
+        else:
+            df = pd.read_csv(data, compression='gzip' if output_format == 'csv.gz' else None)
+        assert list(df['値上げ率']) == ['10%', 'データなし', '-5%'], f"[NG] 内容エラー: {list(df['値上げ率'])}"
+        assert len(df) == metadata['sheets'][0]['rows'], "[NG] 行数エラー"
+        print(f"[OK] {output_format}: {len(output.getvalue())}バイト")
+
+def test_invalid_options():
+    """
+    不正な出力形式・圧縮レベルのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 不正なオプション")
+    print("=" * 50)
+
+    for options in [{'output_format': 'xlsx'}, {'output_format': 'csv', 'compression_level': 0}]:
+        try:
+            write_bundle(make_sheets(), **options)
+            assert False, f"[NG] エラーになりません: {options}"
+        except ValueError as e:
+            print(f"[OK] {options}: {e}")
+
+if __name__ == '__main__':
+    try:
+        test_bundle_formats()
+        test_invalid_options()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
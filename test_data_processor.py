@@ -5,7 +5,7 @@ data_processor.py の動作確認テスト（統合テスト）
 import sys
 sys.path.append('.')
 
-from modules.data_processor import process_excel_files
+from modules.data_processor import process_excel_files, extract_changed_rows
 import pandas as pd
 
 def test_full_process():
@@ -106,9 +106,32 @@ def test_full_process():
     print(f"\n確認: {output_filename} をExcelで開いて、")
     print("       3シートが正しく作成されているか確認してください。")
 
+def test_delta_rows():
+    """
+    差分出力（価格が変化した行・片方のみの行）の抽出テスト
+    """
+    print("\n" + "=" * 60)
+    print("[テスト] 差分出力の行抽出")
+    print("=" * 60)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5, 6],
+        '前回新築換算平均価格': [100, 100, 'データなし', 0, 100, 100],
+        '今回新築換算平均価格': [100, 100.5, 50, 10, 'データなし', 103],
+    })
+
+    changed_df = extract_changed_rows(df)
+    assert list(changed_df['stationid']) == [2, 3, 4, 5, 6], f"[NG] 差分エラー: {list(changed_df['stationid'])}"
+    print("[OK] 許容範囲0%: 価格が変化した行と片方のみの行を抽出")
+
+    changed_df = extract_changed_rows(df, tolerance=1)
+    assert list(changed_df['stationid']) == [3, 4, 5, 6], f"[NG] 差分エラー: {list(changed_df['stationid'])}"
+    print("[OK] 許容範囲±1%: 小さな変化の行を除外")
+
 if __name__ == '__main__':
     try:
         test_full_process()
+        test_delta_rows()
     except Exception as e:
         print(f"\n[NG] エラーが発生しました: {str(e)}")
         import traceback
@@ -0,0 +1,76 @@
+"""
+data_quality.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.data_quality import check_data_quality
+from modules.calculator import calculate_j_k_l_m_columns
+import pandas as pd
+
+def make_dataframe():
+    """
+    テスト用のデータ（数値以外・ゼロ・負の値・キー欠損を含む）
+    """
+    return pd.DataFrame({
+        'stationid': [1, 2, 3, 4, None],
+        'railroad': ['路線A', '路線A', '', '路線B', '路線B'],
+        'priceunitconvnewly': [100, 'abc', '1,234', 0, None],
+        'priceunitnewly': [100, 200, -5, 300, 400],
+        'priceunitusedsigned': [100, 200, 300, 400, 500],
+    })
+
+def test_quality_report():
+    """
+    問題のあるセルの件数と位置のテスト
+    """
+    print("=" * 50)
+    print("[テスト1] データ品質チェック")
+    print("=" * 50)
+
+    quality_df, stats = check_data_quality([('今回データ', make_dataframe())])
+
+    print("\n【チェック結果】")
+    print(quality_df)
+
+    assert stats['invalid'] == 1, f"[NG] 数値以外の件数エラー: {stats['invalid']}"
+    assert stats['zero'] == 1, f"[NG] ゼロの件数エラー: {stats['zero']}"
+    assert stats['negative'] == 1, f"[NG] 負の値の件数エラー: {stats['negative']}"
+    assert stats['missing_key'] == 2, f"[NG] キー欠損の件数エラー: {stats['missing_key']}"
+    assert stats['blank'] == 1, f"[NG] 空欄の件数エラー: {stats['blank']}"
+    assert stats['total'] == 5, f"[NG] 合計件数エラー: {stats['total']}"
+    print("[OK] 件数の集計成功")
+
+    # 行番号は出力シート上の行（1行目: 備考行、2行目: ヘッダー行）
+    assert list(quality_df['行番号']) == [4, 5, 5, 6, 7], f"[NG] 行番号エラー: {list(quality_df['行番号'])}"
+    invalid_row = quality_df[quality_df['問題'] == '数値以外'].iloc[0]
+    assert invalid_row['値'] == 'abc' and invalid_row['stationid'] == 2, "[NG] 位置エラー"
+    print("[OK] 問題のあるセルの位置特定成功")
+
+def test_calculation_with_invalid_values():
+    """
+    数値以外の値があっても計算がエラーにならないことのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 数値以外の値を含む計算")
+    print("=" * 50)
+
+    result_df = calculate_j_k_l_m_columns(make_dataframe())
+
+    print(result_df[['priceunitconvnewly', '新築換算平均価格']])
+    assert list(result_df['新築換算平均価格']) == [2118, 'データなし', 26130, 'データなし', 'データなし'], \
+        f"[NG] 計算結果エラー: {list(result_df['新築換算平均価格'])}"
+    print("[OK] 数値以外の値は「データなし」として計算")
+
+if __name__ == '__main__':
+    try:
+        test_quality_report()
+        test_calculation_with_invalid_values()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,51 @@
+"""
+equivalence_harness.py（計算処理の等価性検証）の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+sys.path.append('scripts')
+
+import pandas as pd
+from equivalence_harness import run_harness, diff_frames
+
+def test_engines_equivalent():
+    """
+    一括計算・行位置による照合の結果が従来の実装と一致するかのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] 従来の実装との一致")
+    print("=" * 50)
+
+    diffs = run_harness(rows=3000, seeds=2, workbook_rows=200, verbose=False)
+    assert not diffs, "[NG] 従来の実装と異なります:\n" + '\n'.join(diffs)
+    print("[OK] 境界値・ランダムなデータ・Excelファイルの全てで一致")
+
+def test_diff_frames():
+    """
+    値の型の違い（1 と 1.0）や「データなし」の位置の違いを検出できるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 差分の検出")
+    print("=" * 50)
+
+    expected = pd.DataFrame({'差異': pd.Series([1, 'データなし'], dtype=object)})
+    assert diff_frames(expected, expected.copy(), 'df') == [], "[NG] 同じデータで差分が検出されました"
+
+    float_value = pd.DataFrame({'差異': pd.Series([1.0, 'データなし'], dtype=object)})
+    assert diff_frames(expected, float_value, 'df'), "[NG] 1 と 1.0 の違いが検出されません"
+
+    swapped = pd.DataFrame({'差異': pd.Series(['データなし', 1], dtype=object)})
+    assert diff_frames(expected, swapped, 'df'), "[NG] 「データなし」の位置の違いが検出されません"
+    print("[OK] 値の型・「データなし」の位置の違いを検出")
+
+if __name__ == '__main__':
+    try:
+        test_engines_equivalent()
+        test_diff_frames()
+        print("\n" + "=" * 50)
+        print("[OK] 全てのテストが成功しました")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -5,6 +5,7 @@ excel_handler.py の動作確認テスト
 import sys
 sys.path.append('.')
 
+from io import BytesIO
 from utils.excel_handler import read_excel_with_comment, write_excel_with_sheets
 import pandas as pd
 
@@ -67,10 +68,32 @@ def test_write_excel(df, comment):
     print("   - シート2: 今回データ（5行）")
     print("   - シート3: 比較データ（3行）")
 
+def test_read_csv_with_progress():
+    """
+    Shift_JISのCSVを進捗の通知先付きで読み込むテスト
+    """
+    print("\n" + "=" * 50)
+    print("【テスト3】Shift_JISのCSVの読み込み（進捗通知あり）")
+    print("=" * 50)
+
+    text = "備考：テストデータ\nstationid,railroad,駅名\n1,JR山手線,東京\n2,JR山手線,有楽町\n"
+    file = BytesIO(text.encode('shift_jis'))
+    file.name = 'sample.csv'
+    progress = []
+
+    df, comment = read_excel_with_comment(file, progress_callback=lambda done, total: progress.append((done, total)))
+
+    assert comment == "備考：テストデータ", f"[NG] 備考行が不正です: {comment}"
+    assert list(df['駅名']) == ['東京', '有楽町'], f"[NG] 文字化けしています: {list(df['駅名'])}"
+    assert progress and progress[-1][0] == progress[-1][1], "[NG] 読み込みの進捗が通知されていません"
+
+    print("[OK] 検出したエンコーディングで読み込み、進捗を通知")
+
 if __name__ == '__main__':
     try:
         df, comment = test_read_excel()
         test_write_excel(df, comment)
+        test_read_csv_with_progress()
         print("\n" + "=" * 50)
         print("[OK] すべてのテストが成功しました！")
         print("=" * 50)
@@ -0,0 +1,77 @@
+"""
+job_queue.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import threading
+from utils import job_queue
+from utils.job_queue import submit_job, get_job_status, wait_for_job, discard_job, report_progress
+
+def test_queue_order():
+    """
+    待ち順位と実行結果のテスト
+    """
+    print("=" * 50)
+    print("[テスト1] 待ち順位と実行結果")
+    print("=" * 50)
+
+    release = threading.Event()
+
+    def blocking_job(value):
+        report_progress(0.5, "実行中")
+        release.wait(5)
+        return value * 2
+
+    job_ids = [submit_job(blocking_job, i, size_bytes=10) for i in range(job_queue.MAX_WORKERS + 2)]
+
+    # ワーカー数を超えたジョブは待ち行列に残る
+    last_status = get_job_status(job_ids[-1])
+    print(f"最後のジョブの状態: {last_status['state']}, 順位: {last_status['position']}")
+    assert last_status['state'] == 'queued', "[NG] 待ち行列に入っていません"
+    assert last_status['position'] >= 1, "[NG] 待ち順位が取得できません"
+
+    release.set()
+    for i, job_id in enumerate(job_ids):
+        status = get_job_status(job_id)
+        while status['state'] not in ('done', 'error'):
+            status = wait_for_job(job_id, timeout=1)
+        assert status['result'] == i * 2, f"[NG] 実行結果エラー: {status['result']}"
+        discard_job(job_id)
+
+    print("[OK] 待ち順位と実行結果のテスト成功")
+
+def test_admission_limit():
+    """
+    アップロードサイズによる受付制限のテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 受付制限")
+    print("=" * 50)
+
+    try:
+        submit_job(lambda: None, size_bytes=job_queue.MAX_INFLIGHT_BYTES + 1)
+        raise AssertionError("[NG] 上限を超えるジョブが受け付けられました")
+    except ValueError as e:
+        print(f"[OK] 期待通りエラー: {e}")
+
+    job_id = submit_job(lambda: 1 / 0)
+    status = wait_for_job(job_id, timeout=5)
+    while status['state'] not in ('done', 'error'):
+        status = wait_for_job(job_id, timeout=1)
+    assert status['state'] == 'error', "[NG] 例外がエラー状態になっていません"
+    discard_job(job_id)
+    print("[OK] 例外発生時はエラー状態になることを確認")
+
+if __name__ == '__main__':
+    try:
+        test_queue_order()
+        test_admission_limit()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
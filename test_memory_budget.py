@@ -0,0 +1,101 @@
+"""
+照合処理のメモリ使用量の確認テスト
+
+大きめの合成データで、マッチング・異常値抽出が入力や結果のDataFrameを
+余分にコピーしていないこと（追加で確保するメモリのピークが予算内であること）を確認します。
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.matcher import create_comparison_dataframe
+from modules.calculator import calculate_comparison_columns
+from modules.data_processor import extract_abnormal_values
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# 合成データの行数
+ROWS = 50000
+
+# 結果のDataFrameのサイズに対する、処理中に追加で確保してよいメモリのピークの倍率
+MATCH_BUDGET_RATIO = 2.0
+EXTRACT_BUDGET_RATIO = 1.3
+
+def make_dataframe(seed):
+    """
+    テスト用の合成データ（駅IDの一部が前回・今回で食い違い、価格に「データなし」を含む）
+    """
+    random = np.random.RandomState(seed)
+    stationid = random.permutation(ROWS + ROWS // 10)[:ROWS]
+    price = random.randint(1000, 9000, ROWS).astype(object)
+    price[random.rand(ROWS) < 0.03] = 'データなし'
+    return pd.DataFrame({
+        'stationid': stationid,
+        'name': [f'駅{i}' for i in range(ROWS)],
+        'railroad2': 'x',
+        'railroad': [f'路線{i % 50}' for i in stationid],
+        'cityid': 13100 + random.randint(0, 50, ROWS),
+        'priceunitconvnewly': random.rand(ROWS),
+        '新築換算平均価格': price,
+    })
+
+def measure_peak(func):
+    """
+    処理中に追加で確保したメモリのピーク（バイト）と処理結果を返す
+    """
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+def deep_size(df):
+    """
+    DataFrameのメモリ使用量（バイト）
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+def test_memory_budget():
+    """
+    マッチング・異常値抽出のメモリのピークのテスト
+    """
+    print("=" * 50)
+    print(f"[テスト] メモリのピーク（{ROWS:,}行）")
+    print("=" * 50)
+
+    previous_df = make_dataframe(0)
+    current_df = make_dataframe(1)
+    previous_columns = list(previous_df.columns)
+
+    peak, comparison_df = measure_peak(lambda: create_comparison_dataframe(previous_df, current_df))
+    budget = deep_size(comparison_df) * MATCH_BUDGET_RATIO
+    print(f"マッチング: ピーク {peak / 1e6:.1f}MB（予算 {budget / 1e6:.1f}MB）")
+    assert peak <= budget, f"[NG] マッチングのメモリ使用量が予算を超えています: {peak / 1e6:.1f}MB"
+    assert list(previous_df.columns) == previous_columns, "[NG] 入力のDataFrameに列が追加されています"
+    print("[OK] マッチングは予算内")
+
+    comparison_df = calculate_comparison_columns(comparison_df)
+    comparison_columns = list(comparison_df.columns)
+
+    peak, abnormal_df = measure_peak(lambda: extract_abnormal_values(comparison_df, threshold=20))
+    budget = deep_size(abnormal_df) * EXTRACT_BUDGET_RATIO
+    print(f"異常値抽出: ピーク {peak / 1e6:.1f}MB（予算 {budget / 1e6:.1f}MB）")
+    assert peak <= budget, f"[NG] 異常値抽出のメモリ使用量が予算を超えています: {peak / 1e6:.1f}MB"
+    assert list(comparison_df.columns) == comparison_columns, "[NG] 比較データに一時列が残っています"
+    print("[OK] 異常値抽出は予算内")
+
+if __name__ == '__main__':
+    try:
+        test_memory_budget()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,104 @@
+"""
+metrics.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import json
+import os
+import tempfile
+from io import BytesIO
+from utils.metrics import build_run_record, record_run, render_prometheus, get_metrics_state, reset_metrics
+from utils.worker_pool import _make_warm_up_files
+from modules.data_processor import process_excel_files
+
+def test_render_prometheus():
+    """
+    記録した処理がPrometheus形式のカウンター・ヒストグラムに反映されるかのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] Prometheus形式の出力")
+    print("=" * 50)
+
+    reset_metrics()
+    stats = {
+        'previous_rows': 1200, 'current_rows': 800, 'output_format': 'xlsx',
+        'stages': {'read_current': {'cached': False, 'seconds': 0.3}, 'match': {'cached': True, 'seconds': 0.0}},
+    }
+    record_run(build_run_record(stats, seconds=2.0, output_bytes=2048), textfile='', log_path='')
+    record_run(build_run_record(seconds=0.2, error='読み込みエラー'), textfile='', log_path='')
+
+    text = render_prometheus()
+    expected_lines = [
+        'excel_app_runs_total{status="success"} 1',
+        'excel_app_runs_total{status="failure"} 1',
+        'excel_app_run_duration_seconds_bucket{status="success",le="1"} 0',
+        'excel_app_run_duration_seconds_bucket{status="success",le="2.5"} 1',
+        'excel_app_run_duration_seconds_count{status="success"} 1',
+        'excel_app_stage_duration_seconds_bucket{stage="read_current",le="0.5"} 1',
+        'excel_app_stage_cache_hits_total{stage="match"} 1',
+        'excel_app_input_rows_bucket{side="previous",le="10000"} 1',
+        'excel_app_output_bytes_sum{format="xlsx"} 2048',
+    ]
+    for line in expected_lines:
+        assert line in text.splitlines(), f"[NG] 出力に含まれていません: {line}"
+    assert 'stage="match",le' not in text, "[NG] キャッシュを使用したステージの所要時間が記録されています"
+    print("[OK] 実行回数・所要時間・行数・バイト数を出力")
+
+def test_textfile_and_log():
+    """
+    Prometheus形式のファイルが複数回の記録の累計になり、JSONLに1行ずつ追記されるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] ファイルへの出力")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        textfile = os.path.join(temp_dir, 'excel_app.prom')
+        log_path = os.path.join(temp_dir, 'runs.jsonl')
+        for _ in range(3):
+            # プロセス内の集計を破棄しても（コマンドライン版の別実行に相当）ファイルは累計になる
+            reset_metrics()
+            record_run(build_run_record({'current_rows': 10}, seconds=0.05), textfile=textfile, log_path=log_path)
+
+        with open(textfile, encoding='utf-8') as f:
+            assert 'excel_app_runs_total{status="success"} 3' in f.read(), "[NG] ファイルが累計になっていません"
+        with open(log_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 3 and records[0]['current_rows'] == 10, "[NG] JSONLの記録が不正です"
+    print("[OK] Prometheus形式のファイルは累計、JSONLは1回ごとに追記")
+
+def test_process_excel_files_records():
+    """
+    process_excel_files() の成功・失敗が記録されるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト3] process_excel_files() の記録")
+    print("=" * 50)
+
+    reset_metrics()
+    previous_file, current_file = _make_warm_up_files()
+    process_excel_files(previous_file, current_file, cache_dir='')
+    try:
+        process_excel_files(BytesIO(b'broken'), current_file, cache_dir='')
+    except ValueError:
+        pass
+
+    state = get_metrics_state()
+    assert state['excel_app_runs_total'] == {'status="success"': 1, 'status="failure"': 1}, \
+        f"[NG] 実行回数が不正です: {state['excel_app_runs_total']}"
+    assert state['excel_app_input_rows']['side="current"']['sum'] == 3, "[NG] 入力行数が記録されていません"
+    print("[OK] 成功・失敗・入力行数を記録")
+
+if __name__ == '__main__':
+    try:
+        test_render_prometheus()
+        test_textfile_and_log()
+        test_process_excel_files_records()
+        print("\n" + "=" * 50)
+        print("[OK] 全てのテストが成功しました")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+"""
+pipeline.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import os
+import tempfile
+import pandas as pd
+from utils.result_cache import clear_cache
+from utils.worker_pool import _make_warm_up_files
+from modules.data_processor import prepare_comparison, build_output
+from modules.pipeline import run_pipeline, clear_disk_cache
+
+def read_sheets(output):
+    """
+    出力ファイルの全シートを読み込む
+    """
+    output.seek(0)
+    return pd.read_excel(output, sheet_name=None)
+
+def test_same_output():
+    """
+    パイプラインの出力が照合処理・出力処理を続けて実行した場合と同じかのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] 出力の一致")
+    print("=" * 50)
+
+    clear_cache()
+    previous_file, current_file = _make_warm_up_files()
+    expected, expected_stats = build_output(prepare_comparison(previous_file, current_file), threshold=10)
+    output, stats = run_pipeline(previous_file, current_file, threshold=10, cache_dir='')
+
+    expected_sheets = read_sheets(expected)
+    sheets = read_sheets(output)
+    assert list(sheets) == list(expected_sheets), "[NG] シート構成が異なります"
+    for name in sheets:
+        pd.testing.assert_frame_equal(sheets[name], expected_sheets[name])
+    assert stats['abnormal_rows'] == expected_stats['abnormal_rows'], "[NG] 異常値の件数が異なります"
+    assert stats['stage_cache_hits'] == 0, "[NG] 初回の処理でキャッシュが使われています"
+    print("[OK] 全シートが一致")
+
+def test_stage_cache():
+    """
+    設定を変えた場合に、影響するステージだけが再実行されるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] ステージ単位のキャッシュ")
+    print("=" * 50)
+
+    clear_cache()
+    previous_file, current_file = _make_warm_up_files()
+    run_pipeline(previous_file, current_file, threshold=20, cache_dir='')
+
+    _, stats = run_pipeline(previous_file, current_file, threshold=20, cache_dir='')
+    assert all(stage['cached'] for stage in stats['stages'].values()), "[NG] 同じ条件で再実行されました"
+    print(f"[OK] 同じ条件: 全{stats['stage_cache_hits']}ステージでキャッシュを使用")
+
+    _, stats = run_pipeline(previous_file, current_file, threshold=5, cache_dir='')
+    executed = [name for name, stage in stats['stages'].items() if not stage['cached']]
+    assert executed == ['abnormal', 'write'], f"[NG] 再実行されたステージ: {executed}"
+    print(f"[OK] 基準値の変更: {executed} のみ再実行")
+
+    _, stats = run_pipeline(previous_file, current_file, threshold=5, cache_dir='', summary_sheet=True)
+    executed = [name for name, stage in stats['stages'].items() if not stage['cached']]
+    assert executed == ['write'], f"[NG] 再実行されたステージ: {executed}"
+    print(f"[OK] シート構成の変更: {executed} のみ再実行")
+
+def test_disk_cache():
+    """
+    ディスクに保存したステージ結果をメモリのキャッシュ破棄後も再利用できるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト3] ディスクキャッシュ")
+    print("=" * 50)
+
+    previous_file, current_file = _make_warm_up_files()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        clear_cache()
+        expected, _ = run_pipeline(previous_file, current_file, cache_dir=cache_dir)
+        assert os.listdir(cache_dir), "[NG] ディスクに保存されていません"
+
+        clear_cache()
+        output, stats = run_pipeline(previous_file, current_file, cache_dir=cache_dir)
+        assert all(stage['cached'] for stage in stats['stages'].values()), "[NG] ディスクのキャッシュが使われていません"
+        assert output.getvalue() == expected.getvalue(), "[NG] 出力が異なります"
+
+        clear_disk_cache(cache_dir)
+        assert not os.listdir(cache_dir), "[NG] ディスクのキャッシュが削除されていません"
+    print("[OK] メモリのキャッシュ破棄後もディスクから再利用")
+
+def test_threshold_table():
+    """
+    路線×市区町村の行を含む閾値テーブルで処理でき、閾値の変更でキーが変わるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト4] 閾値テーブル（路線×市区町村）")
+    print("=" * 50)
+
+    clear_cache()
+    previous_file, current_file = _make_warm_up_files()
+    tables = [
+        {'default': 20, 'railroad': {}, 'cityid': {}, 'railroad_cityid': {('山手線', '13101'): threshold}}
+        for threshold in (5, 50)
+    ]
+    for table in tables:
+        expected, _ = build_output(prepare_comparison(previous_file, current_file), threshold=table)
+        output, stats = run_pipeline(previous_file, current_file, threshold=table, cache_dir='')
+        expected_sheets = read_sheets(expected)
+        sheets = read_sheets(output)
+        for name in sheets:
+            pd.testing.assert_frame_equal(sheets[name], expected_sheets[name])
+    executed = [name for name, stage in stats['stages'].items() if not stage['cached']]
+    assert executed == ['abnormal', 'write'], f"[NG] 閾値の変更で再実行されたステージ: {executed}"
+    print(f"[OK] 出力が一致し、閾値の変更では {executed} のみ再実行")
+
+if __name__ == '__main__':
+    try:
+        test_same_output()
+        test_stage_cache()
+        test_disk_cache()
+        test_threshold_table()
+        print("\n" + "=" * 50)
+        print("[OK] 全てのテストが成功しました")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
@@ -0,0 +1,62 @@
+"""
+preview.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.preview import get_page, sort_positions
+import pandas as pd
+
+def make_comparison():
+    """
+    テスト用の比較データ（「データなし」を含む価格・値上げ率）
+    """
+    return pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5],
+        'name': ['E駅', 'A駅', 'C駅', 'B駅', 'D駅'],
+        '前回新築換算平均価格': [100.0, 'データなし', 300.0, 50.0, 200.0],
+        '値上げ率': ['5%', 'データなし', '-12%', '100%', '0%'],
+    })
+
+def test_get_page():
+    """
+    ページ分割と並べ替えのテスト
+    """
+    print("=" * 50)
+    print("[テスト] プレビューのページ分割")
+    print("=" * 50)
+
+    df = make_comparison()
+
+    page_df, page, pages = get_page(df, 2, page_size=2)
+    assert (page, pages) == (2, 3), f"[NG] ページ数エラー: {page}, {pages}"
+    assert list(page_df['stationid']) == [3, 4], f"[NG] ページの行エラー: {list(page_df['stationid'])}"
+    page_df, page, _ = get_page(df, 99, page_size=2)
+    assert page == 3 and list(page_df['stationid']) == [5], "[NG] 範囲外のページが最後のページになっていません"
+    print("[OK] 元の順序でのページ分割")
+
+    # 値上げ率は数値として並べ替え、「データなし」は末尾
+    page_df, _, _ = get_page(df, 1, page_size=5, sort_by='値上げ率', ascending=False)
+    assert list(page_df['stationid']) == [4, 1, 5, 3, 2], f"[NG] 値上げ率の並べ替えエラー: {list(page_df['stationid'])}"
+    page_df, _, _ = get_page(df, 1, page_size=5, sort_by='前回新築換算平均価格', ascending=True)
+    assert list(page_df['stationid']) == [4, 1, 5, 3, 2], f"[NG] 価格の並べ替えエラー: {list(page_df['stationid'])}"
+    page_df, _, _ = get_page(df, 1, page_size=2, sort_by='name')
+    assert list(page_df['name']) == ['A駅', 'B駅'], f"[NG] 文字列の並べ替えエラー: {list(page_df['name'])}"
+    print("[OK] 数値・「データなし」・文字列の並べ替え")
+
+    # 同じDataFrame・列の並べ替え順はキャッシュを再利用
+    assert sort_positions(df, '値上げ率', False) is sort_positions(df, '値上げ率', False), \
+        "[NG] 並べ替え順が再計算されています"
+    print("[OK] 並べ替え順のキャッシュ")
+
+if __name__ == '__main__':
+    try:
+        test_get_page()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,65 @@
+"""
+profiling.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import json
+import os
+import pstats
+import tempfile
+import zipfile
+from utils.profiling import run_profiled
+from utils.worker_pool import _make_warm_up_files
+from modules.data_processor import process_excel_files
+
+def test_run_profiled():
+    """
+    処理結果とプロファイルのzip（所要時間・メモリ・ステージごとの所要時間）が得られるかのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] プロファイルの取得")
+    print("=" * 50)
+
+    previous_file, current_file = _make_warm_up_files()
+    events = []
+    (output, stats), profile = run_profiled(
+        process_excel_files, previous_file, current_file,
+        progress_callback=events.append, use_cache=False, cache_dir=''
+    )
+    assert stats['current_rows'] == 3 and output.getbuffer().nbytes > 0, "[NG] 処理結果が不正です"
+    assert events, "[NG] 呼び出し元の進捗の通知先が呼ばれていません"
+    assert stats['stage_cache_hits'] == 0, "[NG] キャッシュを使用しています"
+
+    with zipfile.ZipFile(profile) as archive:
+        names = set(archive.namelist())
+        expected = {'summary.json', 'profile.prof', 'profile_cumulative.txt', 'profile_tottime.txt', 'allocations.txt'}
+        assert names == expected, f"[NG] zipの内容が不正です: {names}"
+        summary = json.loads(archive.read('summary.json'))
+        cumulative = archive.read('profile_cumulative.txt').decode('utf-8')
+        prof_bytes = archive.read('profile.prof')
+
+    assert summary['peak_traced_bytes'] > 0, "[NG] 最大メモリが記録されていません"
+    stages = [timing['stage'] for timing in summary['stage_timings']]
+    assert 'write' in stages, f"[NG] ステージごとの所要時間が不正です: {stages}"
+    assert summary['pipeline_stages']['write']['cached'] is False, "[NG] パイプラインの記録がありません"
+    assert 'process_excel_files' in cumulative, "[NG] 関数ごとの所要時間に処理が含まれていません"
+
+    # profile.prof は pstats で読み込める
+    with tempfile.TemporaryDirectory() as temp_dir:
+        prof_path = os.path.join(temp_dir, 'profile.prof')
+        with open(prof_path, 'wb') as f:
+            f.write(prof_bytes)
+        assert pstats.Stats(prof_path).total_calls > 0, "[NG] profile.prof を読み込めません"
+    print(f"[OK] 最大メモリ {summary['peak_traced_bytes']:,}バイト、ステージ: {', '.join(stages)}")
+
+if __name__ == '__main__':
+    try:
+        test_run_profiled()
+        print("\n" + "=" * 50)
+        print("[OK] 全てのテストが成功しました")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
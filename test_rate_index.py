@@ -0,0 +1,85 @@
+"""
+rate_index.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.rate_index import build_rate_index, count_abnormal, preview_abnormal
+from modules.data_processor import extract_abnormal_values
+import pandas as pd
+
+def test_count_matches_extract():
+    """
+    二分探索による件数が異常値抽出の件数と一致することのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] 基準値ごとの異常値件数")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5, 6],
+        '値上げ率': ['5%', '-20%', '20%', 'データなし', '35%', '-8%'],
+    })
+    rate_index = build_rate_index(df)
+
+    for threshold in [1, 5, 8, 19, 20, 21, 35, 36]:
+        expected = len(extract_abnormal_values(df, threshold=threshold))
+        actual = count_abnormal(rate_index, threshold)
+        print(f"基準±{threshold}%: {actual}件 (期待値: {expected}件)")
+        assert actual == expected, f"[NG] 件数エラー: {actual} != {expected}"
+
+    print("[OK] 基準値ごとの異常値件数成功")
+
+def test_preview_top_rows():
+    """
+    上位データのプレビューテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 上位データのプレビュー")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5],
+        '値上げ率': ['5%', '-40%', '20%', 'データなし', '30%'],
+    })
+    rate_index = build_rate_index(df)
+
+    count, top_df = preview_abnormal(rate_index, df, threshold=10, limit=2)
+    print(top_df)
+    assert count == 3, f"[NG] 件数エラー: {count}"
+    assert list(top_df['stationid']) == [2, 5], f"[NG] 上位データエラー: {list(top_df['stationid'])}"
+    print("[OK] 上位データのプレビュー成功")
+
+def test_preview_tie_order():
+    """
+    値上げ率の絶対値が同じデータが元の行順で並ぶかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト3] 同値の並び順")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5],
+        '値上げ率': ['20%', '30%', '-20%', 'データなし', '20%'],
+    })
+    rate_index = build_rate_index(df)
+
+    count, top_df = preview_abnormal(rate_index, df, threshold=10)
+    print(top_df)
+    assert count == 4, f"[NG] 件数エラー: {count}"
+    assert list(top_df['stationid']) == [2, 1, 3, 5], f"[NG] 同値の並び順エラー: {list(top_df['stationid'])}"
+    print("[OK] 同値は元の行順")
+
+if __name__ == '__main__':
+    try:
+        test_count_matches_extract()
+        test_preview_top_rows()
+        test_preview_tie_order()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
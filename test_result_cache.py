@@ -0,0 +1,74 @@
+"""
+result_cache.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from io import BytesIO
+from utils import result_cache
+from utils.result_cache import make_cache_key, get_cached_result, store_result, clear_cache, get_cache_stats
+
+def test_cache_key():
+    """
+    キャッシュキーの生成テスト
+    """
+    print("=" * 50)
+    print("[テスト1] キャッシュキーの生成")
+    print("=" * 50)
+
+    key1 = make_cache_key(BytesIO(b'previous'), BytesIO(b'current'), 20)
+    key2 = make_cache_key(BytesIO(b'previous'), BytesIO(b'current'), 20)
+    key3 = make_cache_key(BytesIO(b'previous'), BytesIO(b'current'), 30)
+    key4 = make_cache_key(BytesIO(b'previous'), BytesIO(b'changed'), 20)
+
+    assert key1 == key2, "[NG] 同じ内容で異なるキーが生成されました"
+    assert key1 != key3, "[NG] 閾値の違いがキーに反映されていません"
+    assert key1 != key4, "[NG] ファイル内容の違いがキーに反映されていません"
+    print("[OK] キャッシュキーの生成成功")
+
+def test_eviction():
+    """
+    サイズ上限による破棄のテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] サイズ上限による破棄")
+    print("=" * 50)
+
+    clear_cache()
+    original_max_bytes = result_cache.MAX_CACHE_BYTES
+    result_cache.MAX_CACHE_BYTES = 100
+
+    try:
+        store_result('a', b'x' * 40, 40)
+        store_result('b', b'y' * 40, 40)
+
+        # aを参照して最近使用したものにする
+        assert get_cached_result('a') == b'x' * 40, "[NG] キャッシュが取得できません"
+
+        # 上限を超えるので、最も古く使われたbが破棄される
+        store_result('c', b'z' * 40, 40)
+
+        assert get_cached_result('b') is None, "[NG] 古い結果が破棄されていません"
+        assert get_cached_result('a') is not None, "[NG] 最近使用した結果が破棄されました"
+        assert get_cached_result('c') is not None, "[NG] 新しい結果が保存されていません"
+
+        stats = get_cache_stats()
+        print(f"統計: {stats}")
+        assert stats['bytes'] <= 100, "[NG] 上限を超えています"
+        print("[OK] サイズ上限による破棄成功")
+    finally:
+        result_cache.MAX_CACHE_BYTES = original_max_bytes
+        clear_cache()
+
+if __name__ == '__main__':
+    try:
+        test_cache_key()
+        test_eviction()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,79 @@
+"""
+result_store.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import time
+from utils import result_store
+from utils.result_store import put_result, open_result, has_result, clear_store, get_store_stats
+
+def test_spill_to_disk():
+    """
+    メモリ上限を超えた結果の一時ファイル退避テスト
+    """
+    print("=" * 50)
+    print("[テスト1] 一時ファイルへの退避")
+    print("=" * 50)
+
+    clear_store()
+    original_max_bytes = result_store.MAX_MEMORY_BYTES
+    result_store.MAX_MEMORY_BYTES = 150
+
+    try:
+        handle1 = put_result(b'a' * 100)
+        handle2 = put_result(b'b' * 100)
+
+        stats = get_store_stats()
+        print(f"統計: {stats}")
+        assert stats['memory_bytes'] <= 150, "[NG] メモリ上限を超えています"
+        assert stats['spilled_entries'] == 1, "[NG] 古い結果が退避されていません"
+
+        # 退避された結果も同じ内容で読み出せる
+        with open_result(handle1) as f:
+            assert f.read() == b'a' * 100, "[NG] 退避した結果の内容が異なります"
+        with open_result(handle2) as f:
+            assert f.read() == b'b' * 100, "[NG] メモリ上の結果の内容が異なります"
+
+        print("[OK] 一時ファイルへの退避成功")
+    finally:
+        result_store.MAX_MEMORY_BYTES = original_max_bytes
+        clear_store()
+
+def test_ttl_cleanup():
+    """
+    保持期間を過ぎた結果の削除テスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 保持期間切れの削除")
+    print("=" * 50)
+
+    original_ttl = result_store.RESULT_TTL
+    result_store.RESULT_TTL = 0
+
+    try:
+        handle = put_result(b'expired')
+        time.sleep(0.01)
+        assert not has_result(handle), "[NG] 期限切れの結果が残っています"
+
+        try:
+            open_result(handle)
+            raise AssertionError("[NG] 期限切れの結果が開けてしまいました")
+        except KeyError:
+            print("[OK] 期限切れの結果は開けないことを確認")
+    finally:
+        result_store.RESULT_TTL = original_ttl
+        clear_store()
+
+if __name__ == '__main__':
+    try:
+        test_spill_to_disk()
+        test_ttl_cleanup()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
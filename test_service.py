@@ -0,0 +1,155 @@
+"""
+service.py の動作確認テスト（HTTPサービス）
+"""
+
+import sys
+sys.path.append('.')
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+import service
+from utils import job_queue
+from utils.job_queue import get_job_status
+from utils.result_store import delete_result
+
+PREVIOUS_CSV = (
+    "備考\n"
+    "stationid,name,railroad2,railroad,cityid,priceunitconvnewly,新築換算平均価格\n"
+    "1,A駅,x,山手線,13101,400,8000\n"
+    "2,B駅,x,山手線,13102,200,4000\n"
+).encode('utf-8')
+
+CURRENT_CSV = (
+    "備考\n"
+    "stationid,name,railroad2,railroad,cityid,priceunitconvnewly,priceunitnewly,priceunitusedsigned\n"
+    "1,A駅,x,山手線,13101,500,450,400\n"
+    "3,C駅,x,中央線,13103,150,140,130\n"
+).encode('utf-8')
+
+def request(base_url, path, method='GET', data=None, headers=None):
+    """
+    リクエストを送信して (ステータス, 本文) を返す
+    """
+    req = urllib.request.Request(base_url + path, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def test_service():
+    """
+    アップロード → 処理 → ダウンロードのテスト
+    """
+    print("=" * 50)
+    print("[テスト] HTTPサービス")
+    print("=" * 50)
+
+    server = service.create_server('127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        status, body = request(base_url, '/health')
+        assert status == 200 and json.loads(body)['status'] == 'ok', "[NG] ヘルスチェックエラー"
+        print("[OK] ヘルスチェック")
+
+        upload_ids = []
+        for name, data in [('前回データ.csv', PREVIOUS_CSV), ('今回データ.csv', CURRENT_CSV)]:
+            status, body = request(base_url, '/uploads', 'POST', data, {'X-File-Name': quote(name)})
+            assert status == 201, f"[NG] アップロードエラー: {body.decode('utf-8')}"
+            upload_ids.append(json.loads(body)['upload_id'])
+        print("[OK] アップロード")
+
+        status, body = request(base_url, '/jobs', 'POST', json.dumps({
+            'previous_upload': upload_ids[0],
+            'current_upload': upload_ids[1],
+            'options': {'output_format': 'csv'},
+        }).encode('utf-8'))
+        assert status == 202, f"[NG] ジョブ作成エラー: {body.decode('utf-8')}"
+        job_id = json.loads(body)['job_id']
+
+        while True:
+            status, body = request(base_url, f'/jobs/{job_id}')
+            job = json.loads(body)
+            if job['state'] in ('done', 'error'):
+                break
+            time.sleep(0.05)
+        assert job['state'] == 'done', f"[NG] 処理エラー: {job['error']}"
+        assert job['stats']['comparison_rows'] == 3, f"[NG] 比較データの行数エラー: {job['stats']['comparison_rows']}"
+        print(f"[OK] 処理完了: 比較データ {job['stats']['comparison_rows']}行")
+
+        status, body = request(base_url, f'/jobs/{job_id}/output')
+        assert status == 200 and body[:2] == b'PK', "[NG] ダウンロードエラー"
+        assert len(body) == job['output_bytes'], "[NG] 出力ファイルのサイズが一致しません"
+        print(f"[OK] ダウンロード: {len(body)}バイト")
+
+        # 結果ストアから先に削除された場合（保持期間切れ）も状態を返す
+        delete_result(get_job_status(job_id)['result']['handle'])
+        status, body = request(base_url, f'/jobs/{job_id}')
+        assert status == 200 and json.loads(body)['output_bytes'] is None, \
+            f"[NG] 出力ファイルが削除されたジョブの状態を取得できません: {status}"
+        status, _ = request(base_url, f'/jobs/{job_id}/output')
+        assert status == 410, f"[NG] 出力ファイルが削除されたジョブのダウンロード: {status}"
+        print("[OK] 出力ファイルの保持期間切れ")
+
+        status, _ = request(base_url, f'/jobs/{job_id}', 'DELETE')
+        assert status == 200, "[NG] ジョブの削除エラー"
+        print("[OK] ジョブの削除")
+
+        status, body = request(base_url, '/metrics')
+        assert status == 200 and 'excel_app_runs_total{status="success"}' in body.decode('utf-8'), \
+            "[NG] メトリクスに処理の実行回数がありません"
+        print("[OK] メトリクス")
+
+        # 受付制限
+        max_upload_bytes = service.MAX_UPLOAD_BYTES
+        service.MAX_UPLOAD_BYTES = 10
+        try:
+            status, _ = request(base_url, '/uploads', 'POST', CURRENT_CSV, {'X-File-Name': 'big.csv'})
+        finally:
+            service.MAX_UPLOAD_BYTES = max_upload_bytes
+        assert status == 413, f"[NG] サイズ上限を超えたアップロードが受け付けられました: {status}"
+
+        upload_ids = []
+        for name, data in [('前回データ.csv', PREVIOUS_CSV), ('今回データ.csv', CURRENT_CSV)]:
+            status, body = request(base_url, '/uploads', 'POST', data, {'X-File-Name': quote(name)})
+            upload_ids.append(json.loads(body)['upload_id'])
+        job_request = json.dumps({'previous_upload': upload_ids[0], 'current_upload': upload_ids[1]}).encode('utf-8')
+        max_inflight_bytes = job_queue.MAX_INFLIGHT_BYTES
+        job_queue.MAX_INFLIGHT_BYTES = len(PREVIOUS_CSV)
+        try:
+            status, _ = request(base_url, '/jobs', 'POST', job_request)
+        finally:
+            job_queue.MAX_INFLIGHT_BYTES = max_inflight_bytes
+        assert status == 413, f"[NG] ジョブ1件のサイズ上限を超えたジョブが受け付けられました: {status}"
+        status, _ = request(base_url, '/jobs', 'POST', job_request)
+        assert status == 202, f"[NG] サイズ上限で拒否されたアップロードを再利用できません: {status}"
+
+        status, _ = request(base_url, '/jobs', 'POST', b'{"options": {"unknown": 1}}')
+        assert status == 400, f"[NG] 不正なオプションが受け付けられました: {status}"
+        status, _ = request(base_url, '/jobs', 'POST', b'{"options": {"workers": "many"}}')
+        assert status == 400, f"[NG] 不正なプロセス数が受け付けられました: {status}"
+        options = {'workers': 500}
+        service.validate_options(options)
+        assert options['workers'] == max(service.DEFAULT_WORKERS, 1), \
+            f"[NG] プロセス数がサーバーの設定までに制限されていません: {options['workers']}"
+        print("[OK] サイズ上限・不正なオプションを拒否")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == '__main__':
+    try:
+        test_service()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
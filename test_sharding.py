@@ -0,0 +1,89 @@
+"""
+sharding.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import modules.sharding as sharding
+from modules.sharding import assign_shards, run_sharded
+from modules.matcher import build_match_keys
+import pandas as pd
+
+def make_dataframes():
+    """
+    テスト用の前回・今回データ（同じ駅が都道府県をまたいで移った行・前回のみ・今回のみの行を含む）
+    """
+    previous_df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5, 6, 6],
+        'name': ['A駅', 'B駅', 'C駅', 'D駅', 'E駅', 'F駅', 'F駅'],
+        'railroad2': 'x',
+        'railroad': ['山手線', '山手線', '中央線', '中央線', '京浜東北線', '東海道線', '東海道線'],
+        'cityid': [13101, 13102, 13103, 14101, 11101, 27101, 26101],
+        '新築換算平均価格': [5000, 4000, 'データなし', 3000, 2000, 1000, 1500],
+    })
+    current_df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 7],
+        'name': ['A駅', 'B駅', 'C駅', 'D駅', 'G駅'],
+        'railroad2': 'x',
+        'railroad': ['山手線', '山手線', '中央線', '中央線', '総武線'],
+        'cityid': [13101, 13102, 13103, 13104, 12101],
+        'priceunitconvnewly': [400.0, 200.0, 150.0, 0.0, 120.0],
+        'priceunitnewly': [350.0, 180.0, 140.0, 100.0, 110.0],
+        'priceunitusedsigned': [300.0, 160.0, 130.0, 90.0, 100.0],
+    })
+    return previous_df, current_df
+
+def test_assign_shards():
+    """
+    同じマッチングキーの行が同じ分割に入るかのテスト
+    """
+    print("=" * 50)
+    print("[テスト] 分割の割り当て")
+    print("=" * 50)
+
+    previous_df, current_df = make_dataframes()
+    for shard_by in ['railroad', 'city_prefix']:
+        previous_shards, current_shards = assign_shards(previous_df, current_df, 3, shard_by=shard_by)
+        assert previous_shards.max() < 3 and current_shards.max() < 3, "[NG] 分割番号が分割数を超えています"
+
+        shard_by_key = {}
+        keys = list(build_match_keys(previous_df)) + list(build_match_keys(current_df))
+        for key, shard in zip(keys, list(previous_shards) + list(current_shards)):
+            assert shard_by_key.setdefault(key, shard) == shard, f"[NG] {shard_by}: {key} が複数の分割に入っています"
+        print(f"[OK] {shard_by}: 同じキーの行は同じ分割")
+
+def test_run_sharded():
+    """
+    分割して並列に処理した結果が分割しない場合と同じかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト] 分割並列処理の結果")
+    print("=" * 50)
+
+    previous_df, current_df = make_dataframes()
+    expected_current, expected_comparison = run_sharded(previous_df, current_df.copy(), workers=1)
+
+    # テストデータは小さいため、行数に関係なく分割する
+    min_sharded_rows = sharding.MIN_SHARDED_ROWS
+    sharding.MIN_SHARDED_ROWS = 0
+    try:
+        for shard_by in ['railroad', 'city_prefix']:
+            current, comparison = run_sharded(previous_df, current_df.copy(), workers=2, shard_by=shard_by)
+            pd.testing.assert_frame_equal(current, expected_current)
+            pd.testing.assert_frame_equal(comparison, expected_comparison)
+            print(f"[OK] {shard_by}: 今回データ・比較データが分割しない場合と一致")
+    finally:
+        sharding.MIN_SHARDED_ROWS = min_sharded_rows
+
+if __name__ == '__main__':
+    try:
+        test_assign_shards()
+        test_run_sharded()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,67 @@
+"""
+shared_frames.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from utils.shared_frames import share_frame, attach_frame, release_blocks
+import numpy as np
+import pandas as pd
+
+def make_dataframe():
+    """
+    テスト用のデータ（数値列・文字列列・「データなし」を含む混在列・欠損を含む）
+    """
+    return pd.DataFrame({
+        'stationid': [1, 2, 3, 4],
+        'name': ['A駅', 'B駅', None, 'D駅'],
+        'cityid': [13101.0, np.nan, 13103.0, 14101.0],
+        '新築換算平均価格': [5000, 'データなし', np.nan, 3000],
+    })
+
+def test_attach_frame():
+    """
+    共有メモリに配置したデータへの接続のテスト
+    """
+    print("=" * 50)
+    print("[テスト] 共有メモリのDataFrame")
+    print("=" * 50)
+
+    df = make_dataframe()
+    handle, blocks = share_frame(df)
+    try:
+        # 全体に接続（数値列はコピーなし、文字列・混在列はカテゴリ）
+        shared_df, attached_blocks = attach_frame(handle)
+        assert shared_df['stationid'].dtype == df['stationid'].dtype, "[NG] 数値列の型が変わっています"
+        assert isinstance(shared_df['name'].dtype, pd.CategoricalDtype), "[NG] 文字列列がカテゴリになっていません"
+        assert list(shared_df['新築換算平均価格'].astype(object).fillna('欠損')) == [5000, 'データなし', '欠損', 3000], \
+            "[NG] 混在列の値が一致しません"
+        shared_df = None
+        release_blocks(attached_blocks)
+        print("[OK] 全体に接続")
+
+        # 一部の行だけを元の型で取り出す
+        positions = np.array([3, 0, 2])
+        subset_df, attached_blocks = attach_frame(handle, positions)
+        pd.testing.assert_frame_equal(subset_df, df.iloc[positions])
+        assert attached_blocks == [], "[NG] 行の取り出し後も共有メモリに接続しています"
+        print("[OK] 一部の行を元の型で取り出し")
+
+        # handle は小さい（値の一覧も共有メモリに配置されている）
+        import pickle
+        assert len(pickle.dumps(handle)) < 2000, "[NG] handle にデータが含まれています"
+        print("[OK] handle はブロック名と型のみ")
+    finally:
+        release_blocks(blocks, unlink=True)
+
+if __name__ == '__main__':
+    try:
+        test_attach_frame()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,107 @@
+"""
+summary.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+from modules.summary import build_summary, build_top_movers
+from modules.data_processor import extract_abnormal_values
+import pandas as pd
+
+def test_rollup_by_railroad_and_cityid():
+    """
+    路線別・市区町村別の集計テスト
+    """
+    print("=" * 50)
+    print("[テスト1] 路線別・市区町村別の集計")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'railroad': ['路線A', '路線A', '路線B', '路線B'],
+        'cityid': [13101.0, 13101.0, '13102', 13102],
+        '前回新築換算平均価格': [100, 200, 'データなし', 300],
+        '今回新築換算平均価格': [110, 260, 500, 'データなし'],
+        '値上げ率': ['10%', '30%', 'データなし', 'データなし'],
+    })
+    abnormal_df = extract_abnormal_values(df, threshold=20)
+    summary_df = build_summary(df, abnormal_df)
+
+    print("\n【集計結果】")
+    print(summary_df.T)
+
+    assert list(summary_df['集計単位']) == ['路線', '路線', '市区町村', '市区町村'], "[NG] 集計単位エラー"
+    assert list(summary_df['キー']) == ['路線A', '路線B', '13101', '13102'], f"[NG] キーエラー: {list(summary_df['キー'])}"
+    assert list(summary_df['件数']) == [2, 2, 2, 2], "[NG] 件数エラー"
+    assert list(summary_df['マッチ件数']) == [2, 0, 2, 0], "[NG] マッチ件数エラー"
+    assert summary_df.loc[0, '前回新築換算平均価格（平均）'] == 150, "[NG] 前回平均エラー"
+    assert summary_df.loc[0, '今回新築換算平均価格（中央値）'] == 185, "[NG] 今回中央値エラー"
+    assert summary_df.loc[0, '平均値上げ率'] == 20, "[NG] 平均値上げ率エラー"
+    assert list(summary_df['異常値件数']) == [1, 0, 1, 0], "[NG] 異常値件数エラー"
+    assert list(summary_df['10〜20%']) == [1, 0, 1, 0], "[NG] ヒストグラムエラー"
+    assert list(summary_df['20〜50%']) == [1, 0, 1, 0], "[NG] ヒストグラムエラー"
+    print("[OK] 路線別・市区町村別の集計成功")
+
+def test_rollup_without_cityid():
+    """
+    cityidが全て空欄の場合の集計テスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト] cityidが全て空欄")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'railroad': ['路線A', '路線B'],
+        'cityid': [float('nan'), float('nan')],
+        '前回新築換算平均価格': [100, 200],
+        '今回新築換算平均価格': [110, 260],
+        '値上げ率': ['10%', '30%'],
+    })
+    abnormal_df = extract_abnormal_values(df, threshold=20)
+    summary_df = build_summary(df, abnormal_df)
+
+    cities = summary_df[summary_df['集計単位'] == '市区町村']
+    assert list(cities['キー']) == ['データなし'], f"[NG] キーエラー: {list(cities['キー'])}"
+    assert list(cities['件数']) == [2], "[NG] 件数エラー"
+    print("[OK] 空欄のcityidは「データなし」として集計")
+
+def test_top_movers():
+    """
+    上位・下位N件の抽出テスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] 上位変動の抽出")
+    print("=" * 50)
+
+    df = pd.DataFrame({
+        'stationid': [1, 2, 3, 4, 5, 6, 7],
+        'railroad': ['路線A', '路線A', '路線A', '路線B', '路線B', '路線B', '路線A'],
+        '値上げ率': ['5%', '-10%', '30%', 'データなし', '12%', '-3%', '30%'],
+    })
+    movers_df = build_top_movers(df, n=2)
+
+    print("\n【抽出結果】")
+    print(movers_df)
+
+    overall_up = movers_df[(movers_df['区分'] == '全体') & (movers_df['方向'] == '上昇')]
+    assert list(overall_up['stationid']) == [3, 7], f"[NG] 全体の上昇エラー: {list(overall_up['stationid'])}"
+    overall_down = movers_df[(movers_df['区分'] == '全体') & (movers_df['方向'] == '下落')]
+    assert list(overall_down['stationid']) == [2, 6], f"[NG] 全体の下落エラー: {list(overall_down['stationid'])}"
+    b_up = movers_df[(movers_df['路線'] == '路線B') & (movers_df['方向'] == '上昇')]
+    assert list(b_up['stationid']) == [5, 6], f"[NG] 路線別の上昇エラー: {list(b_up['stationid'])}"
+    assert list(b_up['順位']) == [1, 2], "[NG] 順位エラー"
+    assert 4 not in set(movers_df['stationid']), "[NG] 「データなし」が含まれています"
+    print("[OK] 上位変動の抽出成功")
+
+if __name__ == '__main__':
+    try:
+        test_rollup_by_railroad_and_cityid()
+        test_rollup_without_cityid()
+        test_top_movers()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,123 @@
+"""
+upload_buffer.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import os
+import tempfile
+from io import BytesIO
+from utils.upload_buffer import open_upload, track_peak_memory, UploadBuffer
+from utils.excel_handler import read_excel_with_comment, detect_csv_encoding
+from utils.file_validator import validate_file
+from utils.result_cache import hash_file
+from utils.worker_pool import _make_warm_up_files
+from modules.data_processor import process_excel_files
+
+CSV_TEXT = "備考：テストデータ\nstationid,railroad,駅名\n1,JR山手線,東京\n2,JR山手線,有楽町\n"
+
+def _named_bytes(data, name):
+    file = BytesIO(data)
+    file.name = name
+    return file
+
+def test_file_interface():
+    """
+    BytesIO と同じ読み出し結果になり、元のファイルをコピーせずに参照できるかのテスト
+    """
+    print("=" * 50)
+    print("[テスト1] ファイルとしての読み出し")
+    print("=" * 50)
+
+    data = CSV_TEXT.encode('utf-8') * 100
+    source = _named_bytes(data, 'sample.csv')
+    buffer = open_upload(source)
+    expected = BytesIO(data)
+
+    assert isinstance(buffer, UploadBuffer) and buffer.name == 'sample.csv' and buffer.size == len(data), \
+        "[NG] ファイル名・サイズが不正です"
+    assert source.tell() == 0, "[NG] 元のファイルの位置が戻っていません"
+    assert buffer.readline() == expected.readline(), "[NG] readline() の結果が異なります"
+    assert buffer.read(17) == expected.read(17), "[NG] read() の結果が異なります"
+    target, expected_target = bytearray(33), bytearray(33)
+    assert buffer.readinto(target) == expected.readinto(expected_target) and target == expected_target, \
+        "[NG] readinto() の結果が異なります"
+    buffer.seek(-10, 2)
+    assert buffer.read() == data[-10:], "[NG] 末尾からの位置指定が不正です"
+    assert buffer.read() == b'', "[NG] 末尾で空のbytesを返していません"
+    assert hash_file(buffer) == hash_file(BytesIO(data)), "[NG] ハッシュが元のファイルと異なります"
+
+    with buffer.getbuffer() as view:
+        assert view.nbytes == len(data) and view[:5] == data[:5], "[NG] getbuffer() の内容が不正です"
+
+    empty = open_upload(_named_bytes(b'', 'empty.csv'))
+    assert empty.size == 0 and empty.read() == b'' and empty.readline() == b'', "[NG] 空のファイルを扱えません"
+
+    buffer.close()
+    try:
+        buffer.read()
+        assert False, "[NG] 閉じたバッファを読み込めています"
+    except ValueError:
+        pass
+    print("[OK] read / readline / readinto / seek / getbuffer が BytesIO と同じ結果")
+
+def test_readers():
+    """
+    バリデーション・エンコーディング判定・読み込みがバッファ・ファイルパスで同じ結果になるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト2] バッファ・ファイルパスからの読み込み")
+    print("=" * 50)
+
+    csv_data = CSV_TEXT.encode('cp932')
+    previous_file, _ = _make_warm_up_files()
+    for name, data in [('sample.csv', csv_data), ('sample.xlsx', previous_file.getvalue())]:
+        buffer = open_upload(_named_bytes(data, name))
+        validate_file(buffer, "前回データ")
+        expected_df, expected_comment = read_excel_with_comment(_named_bytes(data, name))
+        df, comment = read_excel_with_comment(buffer)
+        assert df.equals(expected_df) and comment == expected_comment, f"[NG] {name}: 読み込み結果が異なります"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            df, comment = read_excel_with_comment(path)
+        assert df.equals(expected_df) and comment == expected_comment, f"[NG] {name}: ファイルパスの読み込み結果が異なります"
+
+    assert detect_csv_encoding(open_upload(_named_bytes(csv_data, 'sample.csv'))) == 'shift_jis', \
+        "[NG] エンコーディングの判定が不正です"
+    print("[OK] CSV（Shift_JIS）・Excelともに BytesIO と同じ読み込み結果")
+
+def test_peak_memory():
+    """
+    最大メモリ使用量が計測・処理統計に出力されるかのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト3] 最大メモリ使用量")
+    print("=" * 50)
+
+    with track_peak_memory() as memory:
+        pass
+    if memory['peak_rss_bytes'] is None:
+        print("[SKIP] この環境ではピークRSSを取得できません")
+        return
+    assert memory['peak_rss_increase_bytes'] >= 0, "[NG] 増加量が不正です"
+
+    previous_file, current_file = _make_warm_up_files()
+    _, stats = process_excel_files(open_upload(previous_file), open_upload(current_file), cache_dir='')
+    assert stats['peak_rss_bytes'] >= memory['peak_rss_bytes'], "[NG] 処理統計に最大メモリ使用量がありません"
+    print(f"[OK] 最大メモリ使用量: {stats['peak_rss_bytes']:,}バイト")
+
+if __name__ == '__main__':
+    try:
+        test_file_interface()
+        test_readers()
+        test_peak_memory()
+        print("\n" + "=" * 50)
+        print("[OK] 全てのテストが成功しました")
+        print("=" * 50)
+    except AssertionError as e:
+        print(f"\n{e}")
+        sys.exit(1)
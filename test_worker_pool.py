@@ -0,0 +1,69 @@
+"""
+worker_pool.py の動作確認テスト
+"""
+
+import sys
+sys.path.append('.')
+
+import os
+import time
+from utils.worker_pool import (
+    warm_up, start_background_warm_up, wait_for_warm_up, get_process_pool, start_process_pool,
+    shutdown_process_pool
+)
+
+def test_warm_up():
+    """
+    自プロセス内のウォームアップのテスト
+    """
+    print("=" * 50)
+    print("[テスト] ウォームアップ")
+    print("=" * 50)
+
+    seconds = warm_up()
+    assert seconds > 0, "[NG] ウォームアップの時間が取得できません"
+    print(f"[OK] 小さなデータで全処理を実行: {seconds:.2f}秒")
+
+    start_background_warm_up()
+    assert start_background_warm_up() is False, "[NG] ウォームアップが2回開始されています"
+    status = wait_for_warm_up(timeout=60)
+    assert status['done'], "[NG] バックグラウンドのウォームアップが完了しません"
+    print(f"[OK] バックグラウンドのウォームアップ: {status['seconds']:.2f}秒")
+
+def test_process_pool():
+    """
+    常駐のプロセスプールのテスト
+    """
+    print("\n" + "=" * 50)
+    print("[テスト] 常駐のプロセスプール")
+    print("=" * 50)
+
+    try:
+        pool = get_process_pool()
+        assert get_process_pool() is pool, "[NG] プールが作り直されています"
+        worker_pid = pool.submit(os.getpid).result(timeout=120)
+        assert worker_pid != os.getpid(), "[NG] ジョブが別プロセスで実行されていません"
+        assert pool.submit(os.getpid).result(timeout=60) == worker_pid, "[NG] ワーカーが再利用されていません"
+        print("[OK] ウォームアップ済みのワーカーを再利用")
+
+        # 実行中の他のジョブがある状態で別のワーカー数を指定しても、そのジョブは取り消されない
+        futures = [pool.submit(time.sleep, 0.1) for _ in range(6)]
+        start_process_pool(3)
+        assert get_process_pool() is pool, "[NG] ワーカー数の指定でプールが作り直されています"
+        for future in futures:
+            future.result(timeout=120)
+        print("[OK] 実行中のジョブを取り消さずにプールを共有")
+    finally:
+        shutdown_process_pool()
+
+if __name__ == '__main__':
+    try:
+        test_warm_up()
+        test_process_pool()
+        print("\n" + "=" * 50)
+        print("[OK] すべてのテストが成功しました！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n[NG] エラーが発生しました: {str(e)}")
+        import traceback
+        traceback.print_exc()
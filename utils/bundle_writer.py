@@ -0,0 +1,152 @@
+"""
+出力バンドル作成モジュール
+
+このモジュールは、Excel以外の出力形式（後続のデータ処理向け）の作成を担当します。
+- 各シートのDataFrameをCSV / CSV（gzip圧縮） / Parquet で書き出し、1つのzipにまとめる
+- 各シートの備考行はシート名・行数・列名とともに metadata.json に格納
+- 圧縮レベルを指定可能
+"""
+
+import json
+from datetime import datetime
+from io import BytesIO
+
+# 出力形式ごとの表示名・拡張子・MIMEタイプ
+OUTPUT_FORMATS = {
+    'xlsx': {
+        'label': 'Excel（.xlsx）',
+        'extension': 'xlsx',
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    },
+    'csv': {
+        'label': 'CSV（zip）',
+        'extension': 'zip',
+        'mime': 'application/zip',
+    },
+    'csv.gz': {
+        'label': 'CSV・gzip圧縮（zip）',
+        'extension': 'zip',
+        'mime': 'application/zip',
+    },
+    'parquet': {
+        'label': 'Parquet（zip）',
+        'extension': 'zip',
+        'mime': 'application/zip',
+    },
+}
+
+# 圧縮レベルの既定値と範囲（zlib / zstd 共通で 1〜9 を使用）
+DEFAULT_COMPRESSION_LEVEL = 6
+MIN_COMPRESSION_LEVEL = 1
+MAX_COMPRESSION_LEVEL = 9
+
+# バンドル内のメタデータファイル名
+METADATA_FILE_NAME = 'metadata.json'
+
+
+def _bundle_file_name(index, sheet_name, output_format):
+    """
+    バンドル内のファイル名を作成（例: "03_比較データ.csv.gz"）
+    """
+    return f"{index:02d}_{sheet_name}.{output_format}"
+
+
+def _to_parquet_frame(df):
+    """
+    Parquetに書き出せるようにDataFrameの文字列混在列を変換
+
+    価格列などは数値と「データなし」が混在するため、object型の列は文字列型に揃えます。
+    """
+    object_columns = df.columns[df.dtypes == object]
+    if len(object_columns) == 0:
+        return df
+    return df.astype({column: 'string' for column in object_columns})
+
+
+def write_bundle(sheets, output_format='csv', compression_level=DEFAULT_COMPRESSION_LEVEL,
+                 progress_callback=None):
+    """
+    シートごとのDataFrameをzipバンドルとして書き出す
+
+    Args:
+        sheets: (シート名, DataFrame, 備考行) のリスト
+            備考行は文字列、またはセル位置をキーとする辞書（Excel出力と同じ形式）
+        output_format: 'csv' / 'csv.gz' / 'parquet'（デフォルト: 'csv'）
+        compression_level: 圧縮レベル（1〜9、デフォルト: 6）
+            csv はzipの圧縮、csv.gz はgzipの圧縮、parquet はzstdの圧縮に使用する
+        progress_callback: 書き込み進捗の通知先（オプション）
+            callback(書き込み済み行数, 全体行数) の形式で呼び出される
+
+    Returns:
+        BytesIO: zipファイルのバイナリ
+
+    Raises:
+        ValueError: 出力形式・圧縮レベルが不正な場合、Parquet出力で pyarrow がない場合
+    """
+    import gzip
+    import zipfile
+
+    if output_format not in OUTPUT_FORMATS or output_format == 'xlsx':
+        raise ValueError(f"出力形式が不正です: {output_format}")
+    if not MIN_COMPRESSION_LEVEL <= compression_level <= MAX_COMPRESSION_LEVEL:
+        raise ValueError(
+            f"圧縮レベルは{MIN_COMPRESSION_LEVEL}〜{MAX_COMPRESSION_LEVEL}で指定してください"
+        )
+    if output_format == 'parquet':
+        # Parquetの書き出しに使うpyarrowは任意の依存パッケージ
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet形式で出力するには pyarrow をインストールしてください（pip install pyarrow）")
+
+    # CSVはzip側で圧縮し、圧縮済みの csv.gz / parquet はそのまま格納する
+    if output_format == 'csv':
+        archive_options = {'compression': zipfile.ZIP_DEFLATED, 'compresslevel': compression_level}
+    else:
+        archive_options = {'compression': zipfile.ZIP_STORED}
+
+    total_rows = sum(len(df) for _, df, _ in sheets)
+    written_rows = 0
+    metadata = {
+        'format': output_format,
+        'compression_level': compression_level,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'sheets': [],
+    }
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', **archive_options) as archive:
+        for index, (sheet_name, df, comment) in enumerate(sheets, start=1):
+            file_name = _bundle_file_name(index, sheet_name, output_format)
+
+            with archive.open(file_name, 'w', force_zip64=True) as entry:
+                if output_format == 'csv':
+                    df.to_csv(entry, index=False, encoding='utf-8')
+                elif output_format == 'csv.gz':
+                    with gzip.GzipFile(fileobj=entry, mode='wb',
+                                       compresslevel=compression_level, mtime=0) as compressed:
+                        df.to_csv(compressed, index=False, encoding='utf-8')
+                else:
+                    _to_parquet_frame(df).to_parquet(
+                        entry, index=False, compression='zstd', compression_level=compression_level
+                    )
+
+            metadata['sheets'].append({
+                'name': sheet_name,
+                'file': file_name,
+                'rows': len(df),
+                'columns': [str(column) for column in df.columns],
+                'comment': comment,
+            })
+
+            written_rows += len(df)
+            if progress_callback is not None:
+                progress_callback(written_rows, total_rows)
+
+        archive.writestr(
+            METADATA_FILE_NAME,
+            json.dumps(metadata, ensure_ascii=False, indent=2).encode('utf-8')
+        )
+
+    output.seek(0)
+    return output
@@ -5,13 +5,71 @@ Excel読み書きモジュール
 - 備考行（1行目）を保持しながら読み込み（Excelの場合）
 - CSVファイルの読み込み対応（複数エンコーディング自動検出）
 - 3シート構成のExcelファイルを作成
+- 路線・市区町村別の閾値テーブルの読み込み
 """
 
-import pandas as pd
-import openpyxl
-from io import BytesIO, StringIO
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+from io import BytesIO
+from utils.upload_buffer import open_upload
+
+# pandas / openpyxl は初回使用時に読み込む（起動時間短縮のため）
+
+# 書き込み時の進捗報告の単位（行数）
+WRITE_CHUNK_ROWS = 5000
+
+# 比較データ形式のシートのヘッダー色付け（F・G列を黄色、H・I列を橙色）
+COMPARISON_HEADER_FILLS = {'F2': 'yellow', 'G2': 'yellow', 'H2': 'orange', 'I2': 'orange'}
+
+
+class _ProgressReader:
+    """
+    読み込み位置を進捗として報告するファイルラッパー
+
+    pandas / openpyxl からは元のファイルオブジェクトと同じように扱えます。
+    """
+
+    def __init__(self, file, progress_callback):
+        self._file = file
+        self._progress_callback = progress_callback
+        position = file.tell()
+        file.seek(0, 2)
+        self._total = file.tell()
+        file.seek(position)
+        self._reported = 0
+        # pandas はこの属性でバイナリかどうかを判定し、指定のエンコーディングで読み込む
+        # （BytesIO には mode 属性がないため、未設定だとUTF-8として読み込まれる）
+        self.mode = getattr(file, 'mode', 'rb')
+
+    def _report(self):
+        position = self._file.tell()
+        # 1%以上進んだときだけ報告（zip形式は前後に読み込むため最大位置を使う）
+        if position - self._reported >= self._total / 100 or position == self._total:
+            if position > self._reported:
+                self._reported = position
+                self._progress_callback(position, self._total)
+
+    def read(self, size=-1):
+        data = self._file.read(size)
+        self._report()
+        return data
+
+    def read1(self, size=-1):
+        if hasattr(self._file, 'read1'):
+            data = self._file.read1(size)
+        else:
+            data = self._file.read(size)
+        self._report()
+        return data
+
+    def readinto(self, buffer):
+        size = self._file.readinto(buffer)
+        self._report()
+        return size
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
 
 
 def detect_csv_encoding(file):
@@ -27,6 +85,11 @@ def detect_csv_encoding(file):
     # よく使われるエンコーディングを試す
     encodings = ['utf-8-sig', 'utf-8', 'shift_jis', 'cp932', 'iso-2022-jp', 'euc-jp']
 
+    if hasattr(file, 'getbuffer'):
+        # BytesIO互換のオブジェクト（utils.upload_buffer を含む）は先頭をコピーせずに参照
+        with file.getbuffer() as view:
+            return _detect_encoding(view[:10000], encodings)
+
     if hasattr(file, 'seek'):
         file.seek(0)
 
@@ -36,11 +99,18 @@ def detect_csv_encoding(file):
     if hasattr(file, 'seek'):
         file.seek(0)
 
+    return _detect_encoding(sample, encodings)
+
+
+def _detect_encoding(sample, encodings):
+    """
+    先頭のバイト列をデコードできる最初のエンコーディングを返す
+    """
     # 各エンコーディングを試す
     for encoding in encodings:
         try:
-            if isinstance(sample, bytes):
-                sample.decode(encoding)
+            if isinstance(sample, (bytes, memoryview)):
+                str(sample, encoding)
             return encoding
         except (UnicodeDecodeError, LookupError):
             continue
@@ -49,7 +119,7 @@ def detect_csv_encoding(file):
     return 'utf-8'
 
 
-def read_excel_with_comment(file):
+def read_excel_with_comment(file, progress_callback=None):
     """
     ExcelファイルまたはCSVファイルを読み込み、備考行とデータを返す
 
@@ -58,6 +128,8 @@ def read_excel_with_comment(file):
 
     Args:
         file: Streamlitのアップロードファイル or ファイルパス
+        progress_callback: 読み込み進捗の通知先（オプション）
+            callback(読み込み済みバイト数, 全体バイト数) の形式で呼び出される
 
     Returns:
         tuple: (DataFrame, 備考行の文字列)
@@ -65,11 +137,28 @@ def read_excel_with_comment(file):
     Raises:
         ValueError: ファイル読み込みエラー
     """
+    import pandas as pd
+    import openpyxl
+
+    # ファイルパスの場合はメモリマップして、エンコーディング判定・備考行の取得・読み込みで同じバッファを参照する
+    if not hasattr(file, 'read'):
+        try:
+            mapped_file = open_upload(file)
+        except OSError as e:
+            raise ValueError(f"ファイルの読み込みエラー: {str(e)}")
+        with mapped_file:
+            return read_excel_with_comment(mapped_file, progress_callback=progress_callback)
+
     try:
         # ファイル名から拡張子を判定
         file_name = file.name if hasattr(file, 'name') else str(file)
         is_csv = file_name.lower().endswith('.csv')
 
+        # 本読み込みは進捗報告付きのラッパー経由で行う
+        data_source = file
+        if progress_callback is not None and hasattr(file, 'seek'):
+            data_source = _ProgressReader(file, progress_callback)
+
         if is_csv:
             # CSVファイルの処理
             # エンコーディングを自動検出
@@ -80,7 +169,7 @@ def read_excel_with_comment(file):
                 file.seek(0)
 
             # まず2行目をヘッダーとして読み込み（備考行がある場合を想定）
-            df = pd.read_csv(file, header=1, encoding=encoding)
+            df = pd.read_csv(data_source, header=1, encoding=encoding)
 
             # ファイルポインタをリセット
             if hasattr(file, 'seek'):
@@ -121,17 +210,20 @@ def read_excel_with_comment(file):
 
         else:
             # Excelファイルの処理（既存のロジック）
-            # openpyxlで1行目を取得
-            wb = openpyxl.load_workbook(file)
-            ws = wb.active
-            first_row_value = ws[1][0].value if ws[1][0].value else ""
+            # openpyxlで1行目を取得（読み取り専用モードで1行目だけを読み込む）
+            wb = openpyxl.load_workbook(file, read_only=True)
+            try:
+                first_row = next(wb.active.iter_rows(min_row=1, max_row=1, max_col=1, values_only=True), ())
+            finally:
+                wb.close()
+            first_row_value = first_row[0] if first_row and first_row[0] else ""
 
             # ファイルポインタをリセット（ファイルオブジェクトの場合のみ）
             if hasattr(file, 'seek'):
                 file.seek(0)
 
             # まず2行目をヘッダーとして読み込み
-            df = pd.read_excel(file, header=1)
+            df = pd.read_excel(data_source, header=1)
 
             # 必須カラムのチェック
             required_columns = ['stationid', 'railroad']
@@ -170,37 +262,132 @@ def read_excel_with_comment(file):
         raise ValueError(f"ファイルの読み込みエラー: {str(e)}")
 
 
+def read_threshold_table(file, default_threshold=20):
+    """
+    路線・市区町村別の閾値テーブル（CSV or Excel）を読み込む
+
+    1行目がヘッダーで、railroad / cityid / threshold の3列を持つファイルを想定します。
+    - railroad のみ指定: その路線の閾値
+    - cityid のみ指定: その市区町村の閾値
+    - 両方指定: その路線×市区町村の閾値
+    - 両方空欄: 既定の閾値
+
+    Args:
+        file: アップロードファイル or ファイルパス
+        default_threshold: テーブルに既定値の行がない場合の閾値
+
+    Returns:
+        dict: 閾値テーブル（anomaly_detector.resolve_thresholds() の形式）
+
+    Raises:
+        ValueError: ファイル読み込みエラー・形式エラー
+    """
+    import pandas as pd
+
+    try:
+        file_name = file.name if hasattr(file, 'name') else str(file)
+        if file_name.lower().endswith('.csv'):
+            encoding = detect_csv_encoding(file)
+            df = pd.read_csv(file, encoding=encoding, dtype={'railroad': str, 'cityid': str})
+        else:
+            df = pd.read_excel(file, dtype={'railroad': str, 'cityid': str})
+    except Exception as e:
+        raise ValueError(f"閾値テーブルの読み込みエラー: {str(e)}")
+
+    df.columns = [col.lower() if isinstance(col, str) else col for col in df.columns]
+    if 'threshold' not in df.columns or not ({'railroad', 'cityid'} & set(df.columns)):
+        raise ValueError("閾値テーブルには threshold 列と、railroad または cityid 列が必要です")
+
+    thresholds = pd.to_numeric(df['threshold'], errors='coerce')
+    if thresholds.isna().any() or (thresholds <= 0).any():
+        raise ValueError("閾値テーブルの threshold 列には正の数値を指定してください")
+
+    railroad = df['railroad'].str.strip() if 'railroad' in df.columns else pd.Series(pd.NA, index=df.index)
+    cityid = df['cityid'].str.strip() if 'cityid' in df.columns else pd.Series(pd.NA, index=df.index)
+    has_railroad = railroad.notna() & (railroad != '')
+    has_cityid = cityid.notna() & (cityid != '')
+
+    table = {'default': default_threshold, 'railroad': {}, 'cityid': {}, 'railroad_cityid': {}}
+
+    default_rows = thresholds[~has_railroad & ~has_cityid]
+    if not default_rows.empty:
+        table['default'] = float(default_rows.iloc[-1])
+
+    only_railroad = has_railroad & ~has_cityid
+    table['railroad'] = dict(zip(railroad[only_railroad], thresholds[only_railroad]))
+
+    only_cityid = ~has_railroad & has_cityid
+    table['cityid'] = dict(zip(cityid[only_cityid], thresholds[only_cityid]))
+
+    both = has_railroad & has_cityid
+    table['railroad_cityid'] = dict(zip(zip(railroad[both], cityid[both]), thresholds[both]))
+
+    return table
+
+
 def write_excel_with_sheets(
     sheet1_df, sheet1_comment,
     sheet2_df, sheet2_comment,
     sheet3_df, sheet3_comment,
-    sheet4_df=None, sheet4_comment=""
+    sheet4_df=None, sheet4_comment="",
+    progress_callback=None,
+    extra_sheets=None
 ):
     """
     3シートまたは4シートのExcelファイルを作成
 
     Args:
-        sheet1_df: シート1のDataFrame
+        sheet1_df: シート1のDataFrame（Noneの場合は前回データシートを省略）
         sheet1_comment: シート1の備考行（文字列 or 辞書）
-        sheet2_df: シート2のDataFrame
+        sheet2_df: シート2のDataFrame（Noneの場合は今回データシートを省略）
         sheet2_comment: シート2の備考行（文字列 or 辞書）
         sheet3_df: シート3のDataFrame
         sheet3_comment: シート3の備考行（文字列 or 辞書）
         sheet4_df: シート4のDataFrame（オプション）
         sheet4_comment: シート4の備考行（オプション、文字列 or 辞書）
+        progress_callback: 書き込み進捗の通知先（オプション）
+            callback(書き込み済み行数, 全体行数) の形式で呼び出される
+        extra_sheets: 追加するシートのリスト（オプション）
+            (シート名, DataFrame, 備考行, ヘッダーの色付けdict) の形式で、異常値シートの後に追加される
+            色付けdictは {'F2': 'yellow', ...} の形式（COMPARISON_HEADER_FILLS を参照）
 
     Returns:
         BytesIO: Excelファイルのバイナリ
     """
+    import pandas as pd
+    from openpyxl import load_workbook
+    from openpyxl.styles import PatternFill
+
     output = BytesIO()
 
+    sheets_to_write = [
+        ('前回データ', sheet1_df),
+        ('今回データ', sheet2_df),
+        ('比較データ', sheet3_df)
+    ]
+    sheets_to_write = [(name, df) for name, df in sheets_to_write if df is not None]
+    if sheet4_df is not None:
+        sheets_to_write.append(('異常値シート', sheet4_df))
+    extra_sheets = extra_sheets or []
+    sheets_to_write.extend((name, df) for name, df, _, _ in extra_sheets)
+
+    total_rows = sum(len(df) for _, df in sheets_to_write)
+    written_rows = 0
+
     # まずpandasでベースを作成（1行目に備考行用スペースを空けてデータを書き込む）
+    # 進捗を報告できるよう、WRITE_CHUNK_ROWS 行ずつ同じシートに追記する
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        sheet1_df.to_excel(writer, sheet_name='前回データ', index=False, startrow=1)
-        sheet2_df.to_excel(writer, sheet_name='今回データ', index=False, startrow=1)
-        sheet3_df.to_excel(writer, sheet_name='比較データ', index=False, startrow=1)
-        if sheet4_df is not None:
-            sheet4_df.to_excel(writer, sheet_name='異常値シート', index=False, startrow=1)
+        for sheet_name, df in sheets_to_write:
+            df.iloc[:WRITE_CHUNK_ROWS].to_excel(writer, sheet_name=sheet_name, index=False, startrow=1)
+            for start in range(WRITE_CHUNK_ROWS, len(df), WRITE_CHUNK_ROWS):
+                if progress_callback is not None:
+                    progress_callback(written_rows + start, total_rows)
+                df.iloc[start:start + WRITE_CHUNK_ROWS].to_excel(
+                    writer, sheet_name=sheet_name, index=False, header=False, startrow=start + 2
+                )
+            written_rows += len(df)
+            if progress_callback is not None:
+                progress_callback(written_rows, total_rows)
 
     # openpyxlで備考行を1行目に追加
     output.seek(0)
@@ -214,8 +401,11 @@ def write_excel_with_sheets(
     ]
     if sheet4_df is not None:
         sheets_to_process.append(('異常値シート', sheet4_comment))
+    sheets_to_process.extend((name, comment) for name, _, comment, _ in extra_sheets)
 
     for sheet_name, comment in sheets_to_process:
+        if sheet_name not in wb.sheetnames:
+            continue
         ws = wb[sheet_name]
 
         # commentが辞書の場合は各セルに個別に設定
@@ -233,16 +423,18 @@ def write_excel_with_sheets(
     orange_fill = PatternFill(start_color='FFD2B3', end_color='FFD2B3', fill_type='solid')
 
     # 前回データシートの色付け（2行目 = ヘッダー行）
-    ws_previous = wb['前回データ']
-    ws_previous['J2'].fill = yellow_fill  # J列を黄色
-    ws_previous['L2'].fill = yellow_fill  # L列を黄色
-    ws_previous['M2'].fill = orange_fill  # M列を橙色
+    if sheet1_df is not None:
+        ws_previous = wb['前回データ']
+        ws_previous['J2'].fill = yellow_fill  # J列を黄色
+        ws_previous['L2'].fill = yellow_fill  # L列を黄色
+        ws_previous['M2'].fill = orange_fill  # M列を橙色
 
     # 今回データシートの色付け（2行目 = ヘッダー行）
-    ws_current = wb['今回データ']
-    ws_current['J2'].fill = yellow_fill  # J列を黄色
-    ws_current['L2'].fill = yellow_fill  # L列を黄色
-    ws_current['M2'].fill = orange_fill  # M列を橙色
+    if sheet2_df is not None:
+        ws_current = wb['今回データ']
+        ws_current['J2'].fill = yellow_fill  # J列を黄色
+        ws_current['L2'].fill = yellow_fill  # L列を黄色
+        ws_current['M2'].fill = orange_fill  # M列を橙色
 
     # 比較データシートの色付け（2行目 = ヘッダー行）
     ws_comparison = wb['比較データ']
@@ -259,6 +451,13 @@ def write_excel_with_sheets(
         ws_abnormal['H2'].fill = orange_fill  # H列を橙色
         ws_abnormal['I2'].fill = orange_fill  # I列を橙色
 
+    # 追加シートの色付け（2行目 = ヘッダー行）
+    fills = {'yellow': yellow_fill, 'orange': orange_fill}
+    for sheet_name, _, _, header_fills in extra_sheets:
+        ws_extra = wb[sheet_name]
+        for cell_position, color in (header_fills or {}).items():
+            ws_extra[cell_position].fill = fills[color]
+
     # BytesIOに保存
     output = BytesIO()
     wb.save(output)
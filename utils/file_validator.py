@@ -3,14 +3,18 @@
 
 このモジュールは、アップロードされたExcelファイルまたはCSVファイルの妥当性を検証します。
 - ファイル形式のチェック（.xlsx, .csv）
-- ファイル読み込みテスト
+- ファイル読み込みテスト（先頭の行のみ）
 - 必須カラムの存在確認
 - データ行の存在確認
 """
 
-import pandas as pd
 from utils.excel_handler import detect_csv_encoding
 
+# pandas は初回使用時に読み込む（起動時間短縮のため）
+
+# 検証で読み込む先頭のデータ行数（ファイル全体は読み込み処理で1回だけ解析する）
+VALIDATION_ROWS = 100
+
 
 def validate_file(file, file_name):
     """
@@ -23,6 +27,8 @@ def validate_file(file, file_name):
     Raises:
         ValueError: バリデーションエラー
     """
+    import pandas as pd
+
     # 1. 拡張子チェック
     is_xlsx = file.name.endswith('.xlsx')
     is_csv = file.name.endswith('.csv')
@@ -37,9 +43,9 @@ def validate_file(file, file_name):
             encoding = detect_csv_encoding(file)
             if hasattr(file, 'seek'):
                 file.seek(0)
-            df = pd.read_csv(file, header=1, encoding=encoding)
+            df = pd.read_csv(file, header=1, encoding=encoding, nrows=VALIDATION_ROWS)
         else:
-            df = pd.read_excel(file, header=1)
+            df = pd.read_excel(file, header=1, nrows=VALIDATION_ROWS)
 
         # 3. ヘッダー行の存在チェック
         if df.empty:
@@ -62,9 +68,9 @@ def validate_file(file, file_name):
 
             # 1行目をヘッダーとして読み込み
             if is_csv:
-                df_alt = pd.read_csv(file, header=0, encoding=encoding)
+                df_alt = pd.read_csv(file, header=0, encoding=encoding, nrows=VALIDATION_ROWS)
             else:
-                df_alt = pd.read_excel(file, header=0)
+                df_alt = pd.read_excel(file, header=0, nrows=VALIDATION_ROWS)
 
             if not df_alt.empty:
                 df_alt_columns_lower = [col.lower() if isinstance(col, str) else col for col in df_alt.columns]
@@ -0,0 +1,254 @@
+"""
+ジョブキューモジュール
+
+このモジュールは、複数ユーザーからの処理要求を共有ワーカーで順番に実行します。
+- 同時実行数を制限したワーカースレッドでジョブを実行
+- 待ち行列の長さとアップロードサイズの合計で受付を制限
+- 待ち順位・進捗状況の取得
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+# 同時に処理を実行するワーカー数
+MAX_WORKERS = int(os.environ.get('EXCEL_APP_MAX_WORKERS', 2))
+
+# 待ち行列に積める最大ジョブ数（実行中を除く）
+MAX_QUEUE_LENGTH = int(os.environ.get('EXCEL_APP_MAX_QUEUE_LENGTH', 8))
+
+# 受付中（待機中 + 実行中）ジョブのアップロードサイズ合計の上限（デフォルト: 100MB）
+MAX_INFLIGHT_BYTES = int(os.environ.get('EXCEL_APP_MAX_INFLIGHT_BYTES', 100 * 1024 * 1024))
+
+# 完了したジョブを保持する秒数
+FINISHED_JOB_TTL = 600
+
+_condition = threading.Condition()
+_pending = deque()  # 待機中のジョブID（先頭から実行）
+_jobs = {}          # ジョブID -> ジョブ情報
+_workers = []
+_inflight_bytes = 0
+_local = threading.local()
+
+
+class JobTooLargeError(ValueError):
+    """
+    1件のジョブのアップロードサイズが受付上限を超えている（待っても受け付けられない）場合の例外
+    """
+
+
+def _ensure_workers():
+    """
+    ワーカースレッドを必要数まで起動（_condition取得中に呼び出す）
+    """
+    while len(_workers) < MAX_WORKERS:
+        worker = threading.Thread(
+            target=_worker_loop,
+            name=f"excel-app-worker-{len(_workers) + 1}",
+            daemon=True
+        )
+        _workers.append(worker)
+        worker.start()
+
+
+def _prune_finished_jobs():
+    """
+    保持期間を過ぎた完了ジョブを削除（_condition取得中に呼び出す）
+    """
+    now = time.time()
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job['finished_at'] is not None and now - job['finished_at'] > FINISHED_JOB_TTL
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+
+
+def _worker_loop():
+    """
+    ワーカースレッドのメインループ
+    """
+    global _inflight_bytes
+    while True:
+        with _condition:
+            while not _pending:
+                _condition.wait()
+            job_id = _pending.popleft()
+            job = _jobs[job_id]
+            job['state'] = 'running'
+            job['started_at'] = time.time()
+
+        _local.job_id = job_id
+        try:
+            result = job['func'](*job['args'], **job['kwargs'])
+            error = None
+        except Exception as e:
+            result = None
+            error = str(e)
+        finally:
+            _local.job_id = None
+
+        with _condition:
+            job['result'] = result
+            job['error'] = error
+            job['state'] = 'error' if error is not None else 'done'
+            job['progress'] = 1.0
+            job['finished_at'] = time.time()
+            # 実行が終わった時点で関数と引数（アップロードファイル）への参照を外す
+            job['func'] = job['args'] = job['kwargs'] = None
+            _inflight_bytes -= job['size_bytes']
+            _condition.notify_all()
+
+
+def submit_job(func, *args, size_bytes=0, **kwargs):
+    """
+    ジョブを待ち行列に追加
+
+    Args:
+        func: 実行する関数
+        *args: 関数の位置引数
+        size_bytes: アップロードサイズの合計（受付制限の判定用）
+        **kwargs: 関数のキーワード引数
+
+    Returns:
+        str: ジョブID
+
+    Raises:
+        JobTooLargeError: アップロードサイズの合計が1件で受付上限を超えている場合
+        ValueError: 受付制限を超えている場合（混雑）
+    """
+    global _inflight_bytes
+
+    if size_bytes > MAX_INFLIGHT_BYTES:
+        limit_mb = MAX_INFLIGHT_BYTES // (1024 * 1024)
+        raise JobTooLargeError(f"アップロードサイズが上限（{limit_mb}MB）を超えています")
+
+    with _condition:
+        _prune_finished_jobs()
+
+        if len(_pending) >= MAX_QUEUE_LENGTH or _inflight_bytes + size_bytes > MAX_INFLIGHT_BYTES:
+            raise ValueError("処理が混み合っています。しばらくしてから再実行してください")
+
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            'func': func,
+            'args': args,
+            'kwargs': kwargs,
+            'size_bytes': size_bytes,
+            'state': 'queued',
+            'progress': 0.0,
+            'message': '',
+            'result': None,
+            'error': None,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        _pending.append(job_id)
+        _inflight_bytes += size_bytes
+
+        _ensure_workers()
+        _condition.notify_all()
+
+    return job_id
+
+
+def report_progress(fraction, message=''):
+    """
+    実行中ジョブの進捗を更新（ジョブ内で実行される処理から呼び出す）
+
+    ワーカースレッド以外から呼び出された場合は何もしません。
+
+    Args:
+        fraction: 進捗率（0.0〜1.0）
+        message: 進捗メッセージ
+    """
+    job_id = getattr(_local, 'job_id', None)
+    if job_id is None:
+        return
+
+    with _condition:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job['progress'] = max(0.0, min(1.0, fraction))
+            job['message'] = message
+            _condition.notify_all()
+
+
+def get_job_status(job_id):
+    """
+    ジョブの状態を取得
+
+    Args:
+        job_id: submit_job() が返したジョブID
+
+    Returns:
+        dict: state（queued/running/done/error）, position（待ち順位、1始まり。
+              待機中以外は0）, progress, message, result, error
+
+    Raises:
+        KeyError: ジョブが存在しない場合
+    """
+    with _condition:
+        job = _jobs[job_id]
+        position = 0
+        if job['state'] == 'queued':
+            position = _pending.index(job_id) + 1
+        return {
+            'state': job['state'],
+            'position': position,
+            'progress': job['progress'],
+            'message': job['message'],
+            'result': job['result'],
+            'error': job['error'],
+        }
+
+
+def wait_for_job(job_id, timeout=None):
+    """
+    ジョブの状態（進捗を含む）が変化するまで待機
+
+    Args:
+        job_id: ジョブID
+        timeout: 最大待機秒数
+
+    Returns:
+        dict: get_job_status() と同じ形式の状態
+    """
+    with _condition:
+        if _jobs[job_id]['finished_at'] is None:
+            _condition.wait(timeout)
+    return get_job_status(job_id)
+
+
+def discard_job(job_id):
+    """
+    完了したジョブの結果を破棄
+
+    Args:
+        job_id: ジョブID
+    """
+    with _condition:
+        job = _jobs.get(job_id)
+        if job is not None and job['finished_at'] is not None:
+            del _jobs[job_id]
+
+
+def get_queue_stats():
+    """
+    ジョブキューの統計情報を取得
+
+    Returns:
+        dict: 待機数・実行数・受付中サイズ
+    """
+    with _condition:
+        running = sum(1 for job in _jobs.values() if job['state'] == 'running')
+        return {
+            'queued': len(_pending),
+            'running': running,
+            'workers': MAX_WORKERS,
+            'inflight_bytes': _inflight_bytes,
+            'max_inflight_bytes': MAX_INFLIGHT_BYTES,
+        }
@@ -0,0 +1,235 @@
+"""
+処理メトリクスモジュール
+
+このモジュールは、処理の実行回数・所要時間・データ量を記録し、外部の監視ツール向けに出力します。
+- 実行回数（成功・失敗）、全体とステージごとの所要時間、入力行数、出力バイト数をヒストグラム・カウンターで集計
+- Prometheus のテキスト形式で出力（HTTPサービスの /metrics、または node_exporter の textfile collector 用のファイル）
+- 1回の処理ごとの記録をJSONLファイルに追記（規模・最大メモリ使用量の推移、処理の遅延の調査用）
+
+出力先は環境変数で指定します（未指定の場合はプロセス内での集計のみ）。
+    EXCEL_APP_METRICS_TEXTFILE: Prometheus形式のファイル（例: /var/lib/node_exporter/excel_app.prom）
+        同じファイルに書き込む全プロセス（コマンドライン版の各実行を含む）の累計を出力
+    EXCEL_APP_METRICS_LOG: 処理ごとの記録を追記するJSONLファイル
+"""
+
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows ではファイルロックなしで書き込む
+    fcntl = None
+
+# Prometheus形式のファイルの出力先（空の場合は出力しない）
+METRICS_TEXTFILE = os.environ.get('EXCEL_APP_METRICS_TEXTFILE', '')
+
+# 処理ごとの記録（JSONL）の出力先（空の場合は出力しない）
+METRICS_LOG = os.environ.get('EXCEL_APP_METRICS_LOG', '')
+
+# 所要時間のヒストグラムの区切り（秒）
+DURATION_BUCKETS = [0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+
+# 入力行数のヒストグラムの区切り
+ROW_BUCKETS = [1000, 10000, 50000, 100000, 500000, 1000000, 5000000]
+
+# 出力バイト数のヒストグラムの区切り
+BYTE_BUCKETS = [1024 ** 2, 10 * 1024 ** 2, 50 * 1024 ** 2, 100 * 1024 ** 2, 500 * 1024 ** 2, 1024 ** 3]
+
+# メトリクスの定義（メトリクス名 -> (種類, 説明, ヒストグラムの区切り)）
+METRICS = {
+    'excel_app_runs_total': ('counter', '処理の実行回数（status: success / failure）', None),
+    'excel_app_run_duration_seconds': ('histogram', '処理全体の所要時間（秒）', DURATION_BUCKETS),
+    'excel_app_stage_duration_seconds': ('histogram', 'キャッシュを使わずに実行したステージの所要時間（秒）',
+                                         DURATION_BUCKETS),
+    'excel_app_stage_cache_hits_total': ('counter', 'キャッシュを使用したステージの数', None),
+    'excel_app_input_rows': ('histogram', '入力データの行数（side: previous / current）', ROW_BUCKETS),
+    'excel_app_output_bytes': ('histogram', '出力ファイルのバイト数', BYTE_BUCKETS),
+}
+
+_lock = threading.Lock()
+_state = {}  # メトリクス名 -> ラベル文字列 -> 値（カウンター）or {'buckets', 'sum', 'count'}（ヒストグラム）
+
+
+def _labels(**labels):
+    """
+    ラベルをPrometheus形式の文字列に変換（例: stage="read_current"）
+    """
+    return ','.join(f'{name}="{value}"' for name, value in sorted(labels.items()))
+
+
+def _increment(state, name, labels, amount=1):
+    values = state.setdefault(name, {})
+    values[labels] = values.get(labels, 0) + amount
+
+
+def _observe(state, name, labels, value):
+    buckets = METRICS[name][2]
+    series = state.setdefault(name, {}).setdefault(
+        labels, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+    )
+    for i, edge in enumerate(buckets):
+        if value <= edge:
+            series['buckets'][i] += 1
+    series['sum'] += value
+    series['count'] += 1
+
+
+def build_run_record(stats=None, seconds=0.0, output_bytes=None, error=None):
+    """
+    1回の処理の記録を作成
+
+    Args:
+        stats: process_excel_files() / build_output() の処理統計（失敗した場合はNone）
+        seconds: 処理全体の所要時間（秒）
+        output_bytes: 出力ファイルのバイト数
+        error: 失敗した場合のエラーメッセージ
+
+    Returns:
+        dict: recorded_at, status, seconds, previous_rows, current_rows, comparison_rows,
+            abnormal_rows, output_bytes, output_format, peak_rss_bytes, peak_rss_increase_bytes, stages, error
+    """
+    stats = stats or {}
+    return {
+        'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'status': 'failure' if error is not None else 'success',
+        'seconds': seconds,
+        'previous_rows': stats.get('previous_rows'),
+        'current_rows': stats.get('current_rows'),
+        'comparison_rows': stats.get('comparison_rows'),
+        'abnormal_rows': stats.get('abnormal_rows'),
+        'output_bytes': output_bytes,
+        'output_format': stats.get('output_format'),
+        'peak_rss_bytes': stats.get('peak_rss_bytes'),
+        'peak_rss_increase_bytes': stats.get('peak_rss_increase_bytes'),
+        'stages': stats.get('stages', {}),
+        'error': error,
+    }
+
+
+def _apply_record(state, record):
+    """
+    1回の処理の記録をメトリクスに加算
+    """
+    _increment(state, 'excel_app_runs_total', _labels(status=record['status']))
+    _observe(state, 'excel_app_run_duration_seconds', _labels(status=record['status']), record['seconds'])
+
+    for stage, timing in record['stages'].items():
+        if timing['cached']:
+            _increment(state, 'excel_app_stage_cache_hits_total', _labels(stage=stage))
+        else:
+            _observe(state, 'excel_app_stage_duration_seconds', _labels(stage=stage), timing['seconds'])
+
+    for side in ('previous', 'current'):
+        if record[f'{side}_rows'] is not None:
+            _observe(state, 'excel_app_input_rows', _labels(side=side), record[f'{side}_rows'])
+    if record['output_bytes'] is not None:
+        _observe(state, 'excel_app_output_bytes', _labels(format=record['output_format']), record['output_bytes'])
+
+
+def render_prometheus(state=None):
+    """
+    メトリクスをPrometheusのテキスト形式に変換
+
+    Args:
+        state: 変換するメトリクス（デフォルト: このプロセスで記録したメトリクス）
+
+    Returns:
+        str: Prometheusのテキスト形式
+    """
+    if state is None:
+        state = get_metrics_state()
+
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(state.get(name, {}).items()):
+            if kind == 'counter':
+                lines.append(f'{name}{{{labels}}} {value}')
+                continue
+            separator = ',' if labels else ''
+            for edge, count in zip(buckets, value['buckets']):
+                lines.append(f'{name}_bucket{{{labels}{separator}le="{edge:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {value["count"]}')
+            lines.append(f'{name}_sum{{{labels}}} {value["sum"]:g}')
+            lines.append(f'{name}_count{{{labels}}} {value["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _update_textfile(path, record):
+    """
+    Prometheus形式のファイルに記録を加算
+
+    累計は同じディレクトリの <ファイル名>.state.json に保持し、複数プロセスからの同時書き込みは
+    ファイルロックで順番に処理します（node_exporter が書き込み途中のファイルを読まないように置き換えで更新）。
+    """
+    state_path = f'{path}.state.json'
+    with open(f'{path}.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            state = {}
+            if os.path.exists(state_path):
+                try:
+                    with open(state_path, encoding='utf-8') as f:
+                        state = json.load(f)
+                except ValueError:
+                    # 壊れている場合は集計し直す
+                    state = {}
+            _apply_record(state, record)
+
+            for target, content in ((state_path, json.dumps(state, ensure_ascii=False)),
+                                    (path, render_prometheus(state))):
+                temp_path = f'{target}.{os.getpid()}.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(temp_path, target)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def record_run(record, textfile=None, log_path=None):
+    """
+    1回の処理の記録をメトリクスに加算し、設定された出力先に書き込む
+
+    メトリクスの書き込みに失敗しても処理結果には影響させません（例外は送出しない）。
+
+    Args:
+        record: build_run_record() の戻り値
+        textfile: Prometheus形式のファイル（デフォルト: 環境変数 EXCEL_APP_METRICS_TEXTFILE）
+        log_path: JSONLファイル（デフォルト: 環境変数 EXCEL_APP_METRICS_LOG）
+    """
+    textfile = METRICS_TEXTFILE if textfile is None else textfile
+    log_path = METRICS_LOG if log_path is None else log_path
+
+    with _lock:
+        _apply_record(_state, record)
+
+    try:
+        if textfile:
+            _update_textfile(textfile, record)
+        if log_path:
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError:
+        pass
+
+
+def get_metrics_state():
+    """
+    このプロセスで記録したメトリクスのコピーを取得
+    """
+    with _lock:
+        return copy.deepcopy(_state)
+
+
+def reset_metrics():
+    """
+    このプロセスで記録したメトリクスを破棄
+    """
+    with _lock:
+        _state.clear()
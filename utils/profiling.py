@@ -0,0 +1,195 @@
+"""
+プロファイル取得モジュール
+
+このモジュールは、特定のファイルで処理が遅い場合の調査用に、1回の処理のプロファイルを取得します。
+- cProfile による関数ごとの呼び出し回数・所要時間
+- tracemalloc によるメモリ確保の多い箇所（処理終了時点で保持されている分、ソースの行単位）と最大使用量
+- 進捗イベントから求めたステージごとの所要時間
+これらを1つのzip（プロファイル）にまとめ、出力ファイルと一緒にダウンロードできるようにします。
+
+プロファイルの取得は、画面のチェックボックス・コマンドラインの --profile・環境変数 EXCEL_APP_PROFILE=1 で有効にします。
+"""
+
+import json
+import os
+import platform
+import threading
+import time
+import zipfile
+from datetime import datetime
+from io import BytesIO, StringIO
+
+# 既定でプロファイルを取得するか（'1' の場合は取得する）
+PROFILE_ENABLED = os.environ.get('EXCEL_APP_PROFILE', '0') == '1'
+
+# テキストのレポートに出力する関数の数
+TOP_FUNCTIONS = 40
+
+# テキストのレポートに出力するメモリ確保箇所の数
+TOP_ALLOCATIONS = 25
+
+# プロファイルのzipの拡張子
+PROFILE_EXTENSION = 'profile.zip'
+
+# tracemalloc はプロセス全体で1つのため、プロファイルの取得は同時に1つまで
+_lock = threading.Lock()
+
+
+def _stage_recorder(progress_callback):
+    """
+    進捗イベントからステージの切り替わり時刻を記録する通知先を作成
+
+    Returns:
+        tuple: (通知先, 切り替わりの記録のリスト [(時刻, ステージ名, 表示名)])
+    """
+    changes = []
+
+    def callback(event):
+        if not changes or changes[-1][1] != event['stage']:
+            changes.append((time.perf_counter(), event['stage'], event['label']))
+        if progress_callback is not None:
+            progress_callback(event)
+
+    return callback, changes
+
+
+def _stage_timings(changes, finished_at):
+    """
+    ステージの切り替わりの記録からステージごとの所要時間を求める
+    """
+    timings = []
+    for i, (started_at, stage, label) in enumerate(changes):
+        ended_at = changes[i + 1][0] if i + 1 < len(changes) else finished_at
+        timings.append({'stage': stage, 'label': label, 'seconds': ended_at - started_at})
+    return timings
+
+
+def _format_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    """
+    メモリ確保の多い箇所（ソースの行単位）をテキストに変換
+    """
+    statistics = snapshot.statistics('lineno')
+    lines = [f"{'サイズ(KB)':>12}{'件数':>10}  箇所"]
+    for stat in statistics[:limit]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:>12.1f}{stat.count:>10}  {frame.filename}:{frame.lineno}")
+    return '\n'.join(lines) + '\n', [
+        {'file': stat.traceback[0].filename, 'line': stat.traceback[0].lineno,
+         'bytes': stat.size, 'count': stat.count}
+        for stat in statistics[:limit]
+    ]
+
+
+def _format_stats(profiler, sort_key, limit=TOP_FUNCTIONS):
+    """
+    cProfile の結果を指定した並べ替えのテキストに変換
+    """
+    import pstats
+
+    stream = StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort_key).print_stats(limit)
+    return stream.getvalue()
+
+
+def build_profile_archive(profiler, snapshot, peak_bytes, seconds, stage_timings, stats=None):
+    """
+    プロファイルの各ファイルをzipにまとめる
+
+    zipの内容:
+        summary.json          所要時間・最大メモリ・ステージごとの所要時間・メモリ確保の多い箇所・実行環境
+        profile.prof          cProfile の結果（python -m pstats profile.prof や snakeviz で表示可能）
+        profile_cumulative.txt / profile_tottime.txt  関数ごとの所要時間（累計順・自身の時間順）
+        allocations.txt       メモリ確保の多い箇所
+
+    Returns:
+        BytesIO: zipファイル
+    """
+    import marshal
+    import pandas as pd
+
+    profiler.create_stats()
+    allocations_text, allocations = _format_allocations(snapshot)
+    summary = {
+        'profiled_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'seconds': seconds,
+        'peak_traced_bytes': peak_bytes,
+        'stage_timings': stage_timings,
+        # パイプラインのステージごとの記録（キャッシュ使用の有無を含む、modules.pipeline）
+        'pipeline_stages': (stats or {}).get('stages'),
+        'previous_rows': (stats or {}).get('previous_rows'),
+        'current_rows': (stats or {}).get('current_rows'),
+        'top_allocations': allocations,
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'notes': [
+            'tracemalloc は Python のメモリ確保のみを計測します（Arrow形式の文字列列などのバッファは含まれません）',
+            'メモリ確保の多い箇所は処理終了時点で保持されている分です（途中で解放された一時データは最大使用量のみに反映）',
+            '並列処理（workers > 1）のワーカープロセス内の処理はプロファイルに含まれません',
+        ],
+    }
+
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('summary.json', json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+        archive.writestr('profile.prof', marshal.dumps(profiler.stats))
+        archive.writestr('profile_cumulative.txt', _format_stats(profiler, 'cumulative'))
+        archive.writestr('profile_tottime.txt', _format_stats(profiler, 'tottime'))
+        archive.writestr('allocations.txt', allocations_text)
+    output.seek(0)
+    return output
+
+
+def run_profiled(func, *args, progress_callback=None, **kwargs):
+    """
+    関数を cProfile・tracemalloc で計測しながら実行し、プロファイルのzipを作成
+
+    func は progress_callback 引数を受け取り、(出力, 処理統計dict) を返す関数
+    （process_excel_files() など）を想定しています。
+
+    Args:
+        func: 実行する関数
+        *args, **kwargs: func の引数
+        progress_callback: 進捗イベントの通知先（ステージごとの所要時間の計測にも使用）
+
+    Returns:
+        tuple: (func の戻り値, プロファイルのzipのBytesIO)
+    """
+    import cProfile
+    import tracemalloc
+
+    callback, changes = _stage_recorder(progress_callback)
+
+    with _lock:
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+
+        started_at = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                result = func(*args, progress_callback=callback, **kwargs)
+            finally:
+                profiler.disable()
+            finished_at = time.perf_counter()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            ])
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    stats = result[1] if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], dict) else None
+    archive = build_profile_archive(
+        profiler, snapshot, peak_bytes, finished_at - started_at,
+        _stage_timings(changes, finished_at), stats=stats
+    )
+    return result, archive
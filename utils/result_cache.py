@@ -0,0 +1,201 @@
+"""
+処理結果キャッシュモジュール
+
+このモジュールは、処理結果をセッションをまたいで再利用するためのキャッシュを担当します。
+- アップロード内容のハッシュ・閾値・コードバージョンからキャッシュキーを生成
+- サイズ上限付きのLRU方式で古い結果から破棄
+- 複数セッション（スレッド）からの同時アクセスに対応
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# キャッシュ全体の上限バイト数（環境変数で変更可能、デフォルト: 256MB）
+MAX_CACHE_BYTES = int(os.environ.get('EXCEL_APP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# キャッシュに保持する最大件数
+MAX_CACHE_ENTRIES = int(os.environ.get('EXCEL_APP_CACHE_MAX_ENTRIES', 32))
+
+# 結果ストア（utils.result_store）のハンドルと処理統計だけを保持するエントリのサイズ
+# （出力ファイル本体のサイズは結果ストアの上限で管理するため、キャッシュの上限には含めない）
+HANDLE_ENTRY_BYTES = 4 * 1024
+
+# コードバージョンの算出対象ディレクトリ
+_SOURCE_DIRS = ('modules', 'utils')
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (value, nbytes)
+_total_bytes = 0
+_hits = 0
+_misses = 0
+_code_version = None
+
+
+def get_code_version():
+    """
+    処理コードのバージョン（ソースファイルのハッシュ）を取得
+
+    modules/ と utils/ 配下の .py ファイルの内容から算出するため、
+    処理ロジックを変更すると古いキャッシュは自動的に使われなくなります。
+
+    Returns:
+        str: コードバージョン（16進数16文字）
+    """
+    global _code_version
+    if _code_version is None:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digest = hashlib.sha256()
+        for dir_name in _SOURCE_DIRS:
+            dir_path = os.path.join(base_dir, dir_name)
+            for file_name in sorted(os.listdir(dir_path)):
+                if file_name.endswith('.py'):
+                    digest.update(file_name.encode('utf-8'))
+                    with open(os.path.join(dir_path, file_name), 'rb') as f:
+                        digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def hash_file(file):
+    """
+    アップロードファイルの内容のハッシュを計算
+
+    Args:
+        file: ファイルオブジェクト or ファイルパス
+
+    Returns:
+        str: 内容のSHA-256ハッシュ（16進数）
+    """
+    digest = hashlib.sha256()
+
+    if not hasattr(file, 'read'):
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # BytesIO互換のオブジェクトはコピーせずにバッファを参照
+    if hasattr(file, 'getbuffer'):
+        digest.update(file.getbuffer())
+    else:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    return digest.hexdigest()
+
+
+def _freeze(value):
+    """
+    dict / list を含む値をキーとして使えるハッシュ可能な形に変換
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def make_cache_key(previous_file, current_file, threshold, **options):
+    """
+    キャッシュキーを生成
+
+    Args:
+        previous_file: 前回データのファイル
+        current_file: 今回データのファイル
+        threshold: 異常値の基準（数値 or 閾値テーブル）
+        **options: 出力に影響するその他の処理オプション
+
+    Returns:
+        tuple: (前回ハッシュ, 今回ハッシュ, 閾値, コードバージョン, オプション)
+    """
+    return (
+        hash_file(previous_file),
+        hash_file(current_file),
+        _freeze(threshold),
+        get_code_version(),
+        _freeze(options),
+    )
+
+
+def get_cached_result(key):
+    """
+    キャッシュから結果を取得
+
+    Args:
+        key: make_cache_key() で生成したキー
+
+    Returns:
+        キャッシュされた値（存在しない場合はNone）
+    """
+    global _hits, _misses
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            _misses += 1
+            return None
+        # 最近使用したものとして末尾に移動
+        _entries.move_to_end(key)
+        _hits += 1
+        return entry[0]
+
+
+def store_result(key, value, nbytes):
+    """
+    結果をキャッシュに保存し、上限を超えた分を古い順に破棄
+
+    Args:
+        key: make_cache_key() で生成したキー
+        value: 保存する値
+        nbytes: 値のサイズ（バイト）
+    """
+    global _total_bytes
+    # 単体で上限を超える結果はキャッシュしない
+    if nbytes > MAX_CACHE_BYTES:
+        return
+
+    with _lock:
+        if key in _entries:
+            _total_bytes -= _entries.pop(key)[1]
+
+        _entries[key] = (value, nbytes)
+        _total_bytes += nbytes
+
+        while _entries and (_total_bytes > MAX_CACHE_BYTES or len(_entries) > MAX_CACHE_ENTRIES):
+            _, (_, evicted_bytes) = _entries.popitem(last=False)
+            _total_bytes -= evicted_bytes
+
+
+def clear_cache():
+    """
+    キャッシュを全て破棄
+    """
+    global _total_bytes, _hits, _misses
+    with _lock:
+        _entries.clear()
+        _total_bytes = 0
+        _hits = 0
+        _misses = 0
+
+
+def get_cache_stats():
+    """
+    キャッシュの統計情報を取得
+
+    Returns:
+        dict: 件数・使用バイト数・ヒット数・ミス数
+    """
+    with _lock:
+        return {
+            'entries': len(_entries),
+            'bytes': _total_bytes,
+            'max_bytes': MAX_CACHE_BYTES,
+            'hits': _hits,
+            'misses': _misses,
+        }
@@ -0,0 +1,219 @@
+"""
+処理結果ストアモジュール
+
+このモジュールは、生成した出力ファイルをセッションの外で共有管理します。
+- 最近の結果はメモリ上に保持（全体のバイト数上限あり）
+- 上限を超えた古い結果は一時ファイルに退避
+- 一定時間アクセスのない結果は自動削除
+- セッションはハンドル（ID）のみを保持し、ダウンロード時にストアから読み出す
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+
+# メモリ上に保持する結果の合計上限（環境変数で変更可能、デフォルト: 64MB）
+MAX_MEMORY_BYTES = int(os.environ.get('EXCEL_APP_STORE_MAX_MEMORY_BYTES', 64 * 1024 * 1024))
+
+# 最終アクセスから結果を保持する秒数（デフォルト: 1時間）
+RESULT_TTL = int(os.environ.get('EXCEL_APP_STORE_TTL', 3600))
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # ハンドル -> 結果情報（最終アクセス順）
+_memory_bytes = 0
+_spill_dir = None
+
+
+def _get_spill_dir():
+    """
+    退避先の一時ディレクトリを取得（初回のみ作成、_lock取得中に呼び出す）
+    """
+    global _spill_dir
+    if _spill_dir is None:
+        _spill_dir = tempfile.mkdtemp(prefix='excel_app_results_')
+    return _spill_dir
+
+
+def _remove_entry(handle):
+    """
+    結果を削除（_lock取得中に呼び出す）
+    """
+    global _memory_bytes
+    entry = _entries.pop(handle)
+    if entry['data'] is not None:
+        _memory_bytes -= entry['size']
+    if entry['path'] is not None:
+        try:
+            os.remove(entry['path'])
+        except OSError:
+            pass
+
+
+def _cleanup_expired():
+    """
+    保持期間を過ぎた結果を削除（_lock取得中に呼び出す）
+    """
+    now = time.time()
+    expired = [
+        handle for handle, entry in _entries.items()
+        if now - entry['last_access'] > RESULT_TTL
+    ]
+    for handle in expired:
+        _remove_entry(handle)
+
+
+def _spill_to_disk():
+    """
+    メモリ上限を超えた分を、最終アクセスの古い順に一時ファイルへ退避（_lock取得中に呼び出す）
+    """
+    global _memory_bytes
+    for handle, entry in _entries.items():
+        if _memory_bytes <= MAX_MEMORY_BYTES:
+            break
+        if entry['data'] is None:
+            continue
+
+        path = os.path.join(_get_spill_dir(), f"{handle}.bin")
+        with open(path, 'wb') as f:
+            f.write(entry['data'])
+        entry['path'] = path
+        entry['data'] = None
+        _memory_bytes -= entry['size']
+
+
+def put_result(data):
+    """
+    結果をストアに保存
+
+    Args:
+        data: 保存するバイト列（bytes or BytesIO）
+
+    Returns:
+        str: 結果のハンドル
+    """
+    global _memory_bytes
+    if isinstance(data, BytesIO):
+        data = data.getvalue()
+
+    handle = uuid.uuid4().hex
+    now = time.time()
+
+    with _lock:
+        _cleanup_expired()
+        _entries[handle] = {
+            'data': data,
+            'path': None,
+            'size': len(data),
+            'created_at': now,
+            'last_access': now,
+        }
+        _memory_bytes += len(data)
+        _spill_to_disk()
+
+    return handle
+
+
+def has_result(handle):
+    """
+    結果がストアに存在するか確認
+
+    Args:
+        handle: put_result() が返したハンドル
+
+    Returns:
+        bool: 存在する場合True
+    """
+    with _lock:
+        _cleanup_expired()
+        return handle in _entries
+
+
+def open_result(handle):
+    """
+    結果を読み出し用のファイルオブジェクトとして開く
+
+    メモリ上の結果はコピーせずにBytesIOで、退避済みの結果は一時ファイルとして開きます。
+
+    Args:
+        handle: put_result() が返したハンドル
+
+    Returns:
+        ファイルオブジェクト（呼び出し側でcloseすること）
+
+    Raises:
+        KeyError: 結果が存在しない（期限切れを含む）場合
+    """
+    with _lock:
+        _cleanup_expired()
+        entry = _entries[handle]
+        entry['last_access'] = time.time()
+        _entries.move_to_end(handle)
+
+        if entry['data'] is not None:
+            return BytesIO(entry['data'])
+        return open(entry['path'], 'rb')
+
+
+def get_result_size(handle):
+    """
+    結果のサイズを取得
+
+    Args:
+        handle: put_result() が返したハンドル
+
+    Returns:
+        int: バイト数
+
+    Raises:
+        KeyError: 結果が存在しない場合
+    """
+    with _lock:
+        return _entries[handle]['size']
+
+
+def delete_result(handle):
+    """
+    結果をストアから削除
+
+    Args:
+        handle: put_result() が返したハンドル
+    """
+    with _lock:
+        if handle in _entries:
+            _remove_entry(handle)
+
+
+def clear_store():
+    """
+    すべての結果と退避ファイルを削除
+    """
+    global _spill_dir
+    with _lock:
+        for handle in list(_entries):
+            _remove_entry(handle)
+        if _spill_dir is not None:
+            shutil.rmtree(_spill_dir, ignore_errors=True)
+            _spill_dir = None
+
+
+def get_store_stats():
+    """
+    ストアの統計情報を取得
+
+    Returns:
+        dict: 件数・メモリ使用量・退避件数・退避サイズ
+    """
+    with _lock:
+        spilled = [entry for entry in _entries.values() if entry['data'] is None]
+        return {
+            'entries': len(_entries),
+            'memory_bytes': _memory_bytes,
+            'max_memory_bytes': MAX_MEMORY_BYTES,
+            'spilled_entries': len(spilled),
+            'spilled_bytes': sum(entry['size'] for entry in spilled),
+        }
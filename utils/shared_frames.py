@@ -0,0 +1,178 @@
+"""
+共有メモリによるDataFrame受け渡しモジュール
+
+このモジュールは、プロセスプールのワーカーへDataFrameをpickleせずに渡すための共有メモリ転送を担当します。
+- 数値列（整数・小数・真偽値・日時）はそのまま multiprocessing.shared_memory のブロックに配置
+- 文字列や「データなし」を含む列はカテゴリコード（整数）と値の一覧（pickle）を共有メモリに配置
+- handle にはブロック名と型だけを入れる（分割ごとのジョブに付けて送っても小さい）
+- ワーカー側はブロックに接続してコピーなしでDataFrameを組み立てる（必要な行だけを取り出すことも可能）
+"""
+
+import pickle
+
+# pandas / numpy は初回使用時に読み込む（起動時間短縮のため）
+
+# 共有メモリにそのまま配置する列の型の種類（numpy の dtype.kind）
+SHARED_DTYPE_KINDS = 'iufbM'
+
+# ワーカーで読み込んだカテゴリの値の一覧（ブロック名 -> Index）
+# 同じ入力データの分割を続けて処理するときに、値の一覧を分割ごとに読み込み直さない
+_uniques_cache = {}
+_UNIQUES_CACHE_SIZE = 32
+
+
+def _create_block(data, blocks):
+    """
+    バイト列と同じサイズの共有メモリのブロックを作成して書き込む（0バイトの場合も1バイト確保する）
+    """
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    blocks.append(block)
+    block.buf[:len(data)] = data
+    return block.name
+
+
+def _load_uniques(spec):
+    """
+    共有メモリからカテゴリの値の一覧を読み込む（ワーカー内でキャッシュ）
+    """
+    from multiprocessing import shared_memory
+
+    name = spec['uniques_block']
+    if name not in _uniques_cache:
+        if len(_uniques_cache) >= _UNIQUES_CACHE_SIZE:
+            _uniques_cache.clear()
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            _uniques_cache[name] = pickle.loads(block.buf[:spec['uniques_size']])
+        finally:
+            block.close()
+    return _uniques_cache[name]
+
+
+def share_frame(df):
+    """
+    DataFrameの各列を共有メモリに配置
+
+    ワーカーへは handle（小さなdict）だけを渡し、attach_frame() で接続します。
+
+    Args:
+        df: 配置するDataFrame
+
+    Returns:
+        tuple: (handle, 作成したブロックのリスト)
+            ブロックはワーカーの処理が終わってから release_blocks(blocks, unlink=True) で解放すること
+    """
+    import numpy as np
+    import pandas as pd
+
+    blocks = []
+    columns = []
+
+    try:
+        for column in df.columns:
+            series = df[column]
+            dtype = series.dtype
+            if isinstance(dtype, np.dtype) and dtype.kind in SHARED_DTYPE_KINDS:
+                values = series.to_numpy()
+                spec = {'name': column, 'kind': 'values', 'dtype': values.dtype.str}
+            else:
+                # 文字列・混在列はカテゴリコードに変換（欠損は -1）
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(np.int32 if len(uniques) < 2 ** 31 else np.int64, copy=False)
+                uniques_data = pickle.dumps(uniques, protocol=pickle.HIGHEST_PROTOCOL)
+                spec = {'name': column, 'kind': 'codes', 'dtype': values.dtype.str,
+                        'uniques_block': _create_block(uniques_data, blocks), 'uniques_size': len(uniques_data)}
+
+            spec['block'] = _create_block(np.ascontiguousarray(values).view(np.uint8), blocks)
+            columns.append(spec)
+    except Exception:
+        release_blocks(blocks, unlink=True)
+        raise
+
+    index = df.index
+    handle = {
+        'rows': len(df),
+        'index': None if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1 else index,
+        'columns': columns,
+    }
+    return handle, blocks
+
+
+def release_blocks(blocks, unlink=False):
+    """
+    共有メモリのブロックへの接続を閉じる
+
+    Args:
+        blocks: share_frame() / attach_frame() が返したブロックのリスト
+        unlink: True の場合はブロック自体も削除する（作成側で使用）
+    """
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
+
+
+def attach_frame(handle, positions=None):
+    """
+    共有メモリのDataFrameに接続
+
+    Args:
+        handle: share_frame() が返した handle
+        positions: 取り出す行位置の配列（オプション）
+            None の場合: コピーなしのDataFrameを返す（コード化した列は Categorical になる）
+            指定した場合: その行だけを元の型に戻したDataFrameを返す（共有メモリへの参照は残らない）
+
+    Returns:
+        tuple: (DataFrame, 接続したブロックのリスト)
+            ブロックはDataFrameを使い終わってから release_blocks() で閉じること
+            （positions 指定時は空リスト、接続はすでに閉じている）
+    """
+    import numpy as np
+    import pandas as pd
+    from multiprocessing import shared_memory
+    from pandas.api.extensions import take
+
+    blocks = []
+    data = {}
+    rows = handle['rows']
+
+    try:
+        for spec in handle['columns']:
+            block = shared_memory.SharedMemory(name=spec['block'])
+            blocks.append(block)
+            values = np.ndarray((rows,), dtype=np.dtype(spec['dtype']), buffer=block.buf)
+
+            if positions is not None:
+                # 必要な行だけを取り出す（コピー）
+                values = values[positions]
+                if spec['kind'] == 'codes':
+                    values = take(_load_uniques(spec).array, values, allow_fill=True)
+                data[spec['name']] = values
+            elif spec['kind'] == 'codes':
+                data[spec['name']] = pd.Categorical.from_codes(
+                    values, dtype=pd.CategoricalDtype(_load_uniques(spec))
+                )
+            else:
+                data[spec['name']] = values
+
+        index = handle['index']
+        if positions is not None:
+            index = pd.RangeIndex(rows)[positions] if index is None else index[positions]
+        elif index is None:
+            index = pd.RangeIndex(rows)
+
+        df = pd.DataFrame(data, index=index, columns=[spec['name'] for spec in handle['columns']],
+                          copy=positions is not None)
+    except Exception:
+        data = values = None
+        release_blocks(blocks)
+        raise
+
+    if positions is not None:
+        data = values = None
+        release_blocks(blocks)
+        blocks = []
+
+    return df, blocks
@@ -0,0 +1,222 @@
+"""
+アップロードファイルのバッファモジュール
+
+このモジュールは、アップロードファイルを1回だけ一時ファイルに書き出してメモリマップし、
+以降のバリデーション・エンコーディング判定・読み込み・ハッシュ計算を同じバッファの参照で行えるようにします。
+- アップロードファイル（BytesIO互換）は一時ファイルに1回だけ書き出す（ファイルパスはそのままメモリマップ）
+- 読み出しはメモリマップの位置指定で行い、getbuffer() はコピーせずに memoryview を返す
+- 処理中の最大メモリ使用量（ピークRSS）の計測
+
+一時ファイルの書き出し先は環境変数 EXCEL_APP_UPLOAD_SPOOL_DIR で指定します（未指定の場合はOSの一時ディレクトリ）。
+一時ファイルは作成直後に削除されるため、バッファが参照されなくなった時点でディスクからも解放されます。
+"""
+
+import io
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# 一時ファイルの書き出し先（空の場合はOSの一時ディレクトリ）
+SPOOL_DIR = os.environ.get('EXCEL_APP_UPLOAD_SPOOL_DIR', '')
+
+# read() しかできないファイルを一時ファイルに書き出すときの単位
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadBuffer(io.BufferedIOBase):
+    """
+    メモリマップしたアップロードファイルの読み出し専用のファイルオブジェクト
+
+    pandas / openpyxl / zipfile からは BytesIO と同じように扱えます。
+    """
+
+    def __init__(self, mapping, name):
+        super().__init__()
+        self._mapping = mapping
+        self._position = 0
+        self.name = name
+        self.size = len(mapping)
+        # pandas はこの属性でバイナリかどうかを判定する（utils.excel_handler._ProgressReader と同様）
+        self.mode = 'rb'
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        self._check_closed()
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._check_closed()
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"whence が不正です: {whence}")
+        if position < 0:
+            raise ValueError(f"負の位置には移動できません: {position}")
+        self._position = position
+        return position
+
+    def _end(self, size):
+        if size is None or size < 0:
+            return self.size
+        return min(self.size, self._position + size)
+
+    def read(self, size=-1):
+        self._check_closed()
+        end = self._end(size)
+        data = self._mapping[self._position:end] if end > self._position else b''
+        self._position = max(self._position, end)
+        return data
+
+    def read1(self, size=-1):
+        return self.read(size)
+
+    def readinto(self, buffer):
+        self._check_closed()
+        target = memoryview(buffer).cast('B')
+        end = self._end(len(target))
+        size = max(0, end - self._position)
+        if size:
+            # 呼び出し元のバッファに直接コピー（中間のbytesを作らない）
+            with memoryview(self._mapping) as view:
+                target[:size] = view[self._position:end]
+            self._position = end
+        return size
+
+    def readline(self, size=-1):
+        self._check_closed()
+        end = self._end(size)
+        newline = self._mapping.find(b'\n', self._position, end)
+        if newline != -1:
+            end = newline + 1
+        return self.read(end - self._position)
+
+    def getbuffer(self):
+        """
+        内容全体の memoryview を取得（コピーしない、BytesIO.getbuffer() と同様）
+        """
+        self._check_closed()
+        return memoryview(self._mapping)
+
+    def close(self):
+        if not self.closed and isinstance(self._mapping, mmap.mmap):
+            try:
+                self._mapping.close()
+            except BufferError:
+                # getbuffer() の memoryview が残っている場合は参照がなくなった時点で解放される
+                pass
+        super().close()
+
+    def _check_closed(self):
+        if self.closed:
+            raise ValueError("閉じたファイルは読み込めません")
+
+
+def _map_file(f):
+    """
+    ファイル全体を読み出し専用でメモリマップ（空のファイルは mmap できないため空のbytes）
+    """
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def open_upload(source, name=None):
+    """
+    アップロードファイルをメモリマップしたバッファを作成
+
+    Args:
+        source: Streamlitのアップロードファイル（BytesIO互換）、ファイルオブジェクト or ファイルパス
+            ファイルパスはコピーせずにそのままメモリマップする
+        name: ファイル名（デフォルト: source の name 属性、ファイルパスの場合はパス）
+
+    Returns:
+        UploadBuffer: メモリマップしたバッファ
+    """
+    if not hasattr(source, 'read'):
+        with open(source, 'rb') as f:
+            return UploadBuffer(_map_file(f), name or str(source))
+
+    name = name or getattr(source, 'name', '')
+    with tempfile.TemporaryFile(dir=SPOOL_DIR or None) as spool:
+        if hasattr(source, 'getbuffer'):
+            # BytesIO互換のオブジェクトはコピーせずにバッファから書き出す
+            with source.getbuffer() as view:
+                spool.write(view)
+        else:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            shutil.copyfileobj(source, spool, CHUNK_SIZE)
+        spool.flush()
+        # メモリマップは一時ファイルを閉じた（削除した）後も有効
+        mapping = _map_file(spool)
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return UploadBuffer(mapping, name)
+
+
+def peak_rss_bytes():
+    """
+    プロセスの最大メモリ使用量（ピークRSS、バイト）を取得
+
+    Returns:
+        int or None: ピークRSS（resource モジュールがない環境ではNone）
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux はキロバイト単位、macOS はバイト単位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def track_peak_memory():
+    """
+    ブロック内の処理での最大メモリ使用量を計測
+
+    ピークRSSはプロセス全体の値のため、増加量はそれまでの最大値を超えた分のみです
+    （同じプロセスで先により大きなファイルを処理していた場合は0）。
+
+    Yields:
+        dict: ブロックを抜けた後に peak_rss_bytes（ピークRSS）、
+            peak_rss_increase_bytes（ブロック内での増加量）が設定される
+    """
+    usage = {}
+    before = peak_rss_bytes()
+    try:
+        yield usage
+    finally:
+        after = peak_rss_bytes()
+        usage['peak_rss_bytes'] = after
+        usage['peak_rss_increase_bytes'] = None if after is None else after - before
+
+
+def describe_peak_memory(usage):
+    """
+    最大メモリ使用量を表示用の文字列に変換
+
+    Args:
+        usage: peak_rss_bytes, peak_rss_increase_bytes を含むdict（処理統計など）
+
+    Returns:
+        str or None: 例: "512.0MB（この処理での増加: 128.0MB）"（計測できない環境ではNone）
+    """
+    if usage.get('peak_rss_bytes') is None:
+        return None
+    megabyte = 1024 * 1024
+    return (f"{usage['peak_rss_bytes'] / megabyte:,.1f}MB"
+            f"（この処理での増加: {usage['peak_rss_increase_bytes'] / megabyte:,.1f}MB）")
@@ -0,0 +1,217 @@
+"""
+ワーカープールモジュール
+
+このモジュールは、初回の処理要求が遅くならないように、処理用のモジュールを事前に読み込んで温めておきます。
+- 分割並列処理（modules.sharding）で使う常駐のプロセスプール
+  （各ワーカーは起動時に処理モジュールを読み込み、小さなデータで1回処理を実行しておく）
+- Streamlit版のジョブ実行スレッド向けに、自プロセス内で同じウォームアップをバックグラウンドで実行
+- 起動時間を短くするため、pandas / openpyxl の読み込みはウォームアップの中で行う
+"""
+
+import importlib
+import os
+import threading
+import time
+
+# ワーカーの起動時に読み込むモジュール
+PRELOAD_MODULES = [
+    'utils.excel_handler',
+    'modules.calculator',
+    'modules.matcher',
+    'modules.data_processor',
+]
+
+# 起動時にウォームアップを実行するか（'0' の場合は実行しない）
+WARM_UP_ENABLED = os.environ.get('EXCEL_APP_WARM_UP', '1') != '0'
+
+# ワーカープロセスの起動方式（Streamlitなどスレッドを使うプロセスからも安全に起動できる spawn を使用）
+START_METHOD = 'spawn'
+
+# 常駐のプロセスプールのワーカー数の上限（各処理の並列数はこの範囲で modules.sharding が制限する）
+MAX_WORKERS = max(1, int(os.environ.get(
+    'EXCEL_APP_MAX_WORKERS',
+    max(os.cpu_count() or 1, int(os.environ.get('EXCEL_APP_SHARD_WORKERS', 1)))
+)))
+
+_lock = threading.Lock()
+_pool = None
+_warm_up_thread = None
+_warm_up_done = threading.Event()
+_warm_up_seconds = None
+
+
+def _make_warm_up_files():
+    """
+    ウォームアップ用の小さな前回・今回データ（備考行つきのExcel）を作成
+
+    Returns:
+        tuple: (前回データのBytesIO, 今回データのBytesIO)
+    """
+    from io import BytesIO
+    import openpyxl
+
+    base_columns = ['stationid', 'name', 'railroad2', 'railroad', 'cityid',
+                    'priceunitconvnewly', 'priceunitnewly', 'priceunitusedsigned']
+    rows = [
+        [1, 'A駅', 'x', '山手線', 13101, 400.0, 350.0, 300.0],
+        [2, 'B駅', 'x', '山手線', 13102, 200.0, 180.0, 160.0],
+        [3, 'C駅', 'x', '中央線', 13103, 150.0, 140.0, 0.0],
+    ]
+
+    files = []
+    for is_previous in (True, False):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['ウォームアップ'])
+        sheet.append(base_columns + (['新築換算平均価格'] if is_previous else []))
+        for row in rows:
+            sheet.append(row + ([int(round(row[5] * 0.3025 * 70 * 0.9))] if is_previous else []))
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        files.append(output)
+    return files[0], files[1]
+
+
+def warm_up():
+    """
+    処理モジュールを読み込み、小さなデータで全処理（読み込み〜Excel生成）を1回実行
+
+    pandas / openpyxl の読み込みと、openpyxl のスタイル処理などの初回実行時の準備を済ませます。
+
+    Returns:
+        float: ウォームアップにかかった秒数
+    """
+    started_at = time.perf_counter()
+
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+
+    from modules.pipeline import run_pipeline
+
+    # 処理のメトリクス（utils.metrics）に記録しないように process_excel_files() を経由せずに実行
+    previous_file, current_file = _make_warm_up_files()
+    run_pipeline(previous_file, current_file, workers=1, cache_dir='', summary_sheet=True, top_movers=5)
+
+    return time.perf_counter() - started_at
+
+
+def _initialize_worker():
+    """
+    ワーカープロセスの初期化（プロセスプールの initializer）
+    """
+    if WARM_UP_ENABLED:
+        warm_up()
+
+
+def _ping():
+    """
+    ワーカープロセスの起動確認用のジョブ
+    """
+    return os.getpid()
+
+
+def get_process_pool():
+    """
+    常駐のプロセスプールを取得（未作成・異常終了した場合は作り直す）
+
+    プールのワーカー数は MAX_WORKERS で固定し、処理ごとのワーカー数の指定では作り直しません
+    （作り直すと、同時に実行中の他のジョブの分割処理が取り消されるため）。
+    ワーカープロセスは実際に使われた数だけ起動されます。
+
+    Returns:
+        ProcessPoolExecutor: 各ワーカーはウォームアップ済み（初期化中の場合は完了後にジョブを実行）
+    """
+    global _pool
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _lock:
+        # ワーカーが異常終了したプールは使えないため作り直す（未完了のジョブはすでに失敗している）
+        broken = _pool is not None and getattr(_pool, '_broken', False)
+        if _pool is None or broken:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_initialize_worker
+            )
+        return _pool
+
+
+def start_process_pool(workers):
+    """
+    プロセスプールのワーカーをすべて起動してウォームアップを開始（完了は待たない）
+
+    Args:
+        workers: 起動するワーカープロセス数（MAX_WORKERS まで）
+    """
+    pool = get_process_pool()
+    for _ in range(min(workers, MAX_WORKERS)):
+        pool.submit(_ping)
+
+
+def shutdown_process_pool():
+    """
+    常駐のプロセスプールを終了
+    """
+    global _pool
+
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _warm_up_current_process():
+    """
+    自プロセス内のウォームアップ（バックグラウンドスレッドで実行）
+    """
+    global _warm_up_seconds
+    try:
+        _warm_up_seconds = warm_up()
+    except Exception:
+        # ウォームアップの失敗は本処理に影響させない（初回の処理が遅くなるだけ）
+        _warm_up_seconds = None
+    finally:
+        _warm_up_done.set()
+
+
+def start_background_warm_up():
+    """
+    自プロセス内のウォームアップをバックグラウンドスレッドで開始（2回目以降の呼び出しは何もしない）
+
+    Returns:
+        bool: ウォームアップを開始したか（無効化されている場合・開始済みの場合はFalse）
+    """
+    global _warm_up_thread
+
+    if not WARM_UP_ENABLED:
+        return False
+
+    with _lock:
+        if _warm_up_thread is not None:
+            return False
+        _warm_up_thread = threading.Thread(
+            target=_warm_up_current_process,
+            name='excel-app-warm-up',
+            daemon=True
+        )
+        _warm_up_thread.start()
+    return True
+
+
+def wait_for_warm_up(timeout=None):
+    """
+    自プロセス内のウォームアップの完了を待つ
+
+    Args:
+        timeout: 最大待ち時間（秒、Noneの場合は完了まで待つ）
+
+    Returns:
+        dict: done（完了したか）, seconds（ウォームアップにかかった秒数、失敗・未完了の場合はNone）
+    """
+    if _warm_up_thread is not None:
+        _warm_up_done.wait(timeout)
+    return {'done': _warm_up_done.is_set(), 'seconds': _warm_up_seconds}